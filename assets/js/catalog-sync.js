@@ -0,0 +1,119 @@
+/**
+ * Local IndexedDB copy of a catalog dataset, kept in sync with scripts/api.py /catalog/{dataset}.
+ * The first visit downloads the full snapshot; later visits fetch only the rows added, removed
+ * or changed since the stored version (scripts/catalog_feed.py), or a 304 when nothing changed.
+ *
+ * Usage:
+ *   const records = await loadCatalogRecords('master', '../../data/satellite_master_list.csv', parseCSV);
+ * Records are plain objects keyed by column name, like the pages' CSV parsers return.
+ * When the API is down the last synced copy is used; with neither, the CSV is downloaded and parsed.
+ */
+
+const CATALOG_API_BASE = 'http://localhost:8000';
+
+class CatalogSync {
+    constructor(dataset, apiBase = CATALOG_API_BASE) {
+        this.dataset = dataset;
+        this.apiBase = apiBase;
+        this.db = null;
+    }
+
+    open() {
+        if (this.db) return Promise.resolve(this.db);
+        return new Promise((resolve, reject) => {
+            const request = indexedDB.open(`satreg-catalog-${this.dataset}`, 1);
+            request.onupgradeneeded = () => {
+                request.result.createObjectStore('rows', { keyPath: '__id' });
+                request.result.createObjectStore('meta');
+            };
+            request.onsuccess = () => resolve(this.db = request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    static done(tx) {
+        return new Promise((resolve, reject) => {
+            tx.oncomplete = () => resolve();
+            tx.onerror = tx.onabort = () => reject(tx.error);
+        });
+    }
+
+    async state() {
+        const db = await this.open();
+        const tx = db.transaction('meta');
+        const request = tx.objectStore('meta').get('state');
+        await CatalogSync.done(tx);
+        return request.result || { version: 0, etag: null };
+    }
+
+    // Bring the local copy up to date. Returns { version, full, changed }.
+    async sync() {
+        const state = await this.state();
+        const url = `${this.apiBase}/catalog/${this.dataset}` + (state.version ? `?since=${state.version}` : '');
+        const response = await fetch(url, { headers: state.etag ? { 'If-None-Match': state.etag } : {} });
+        if (response.status === 304) return { version: state.version, full: false, changed: 0 };
+        if (!response.ok) throw new Error(`Catalog sync failed: HTTP ${response.status}`);
+        const feed = await response.json();
+
+        const tx = this.db.transaction(['rows', 'meta'], 'readwrite');
+        const rows = tx.objectStore('rows');
+        if (feed.full) {
+            rows.clear();
+            for (const [id, ...values] of feed.rows) {
+                const record = { __id: id };
+                feed.columns.forEach((column, i) => { record[column] = values[i]; });
+                rows.put(record);
+            }
+        } else {
+            for (const change of feed.changes) {
+                if (change.op === 'removed') {
+                    rows.delete(change.id);
+                } else if (change.op === 'added') {
+                    rows.put({ __id: change.id, ...change.fields });
+                } else {
+                    const request = rows.get(change.id);
+                    request.onsuccess = () => rows.put({ ...(request.result || { __id: change.id }), ...change.fields });
+                }
+            }
+        }
+        tx.objectStore('meta').put({ version: feed.version, etag: response.headers.get('ETag') }, 'state');
+        await CatalogSync.done(tx);
+
+        const changed = feed.full ? feed.rows.length : feed.changes.length;
+        console.log(`✓ Catalog ${this.dataset} v${feed.version}: ${feed.full ? 'full snapshot' : 'delta'}, ${changed} rows`);
+        return { version: feed.version, full: feed.full, changed };
+    }
+
+    async records() {
+        const db = await this.open();
+        const tx = db.transaction('rows');
+        const request = tx.objectStore('rows').getAll();
+        await CatalogSync.done(tx);
+        return request.result;
+    }
+}
+
+// Synced records when the API is reachable, otherwise the CSV parsed by the page's own parser.
+async function loadCatalogRecords(dataset, csvUrl, parseCSV, apiBase = CATALOG_API_BASE) {
+    if (typeof indexedDB !== 'undefined') {
+        const catalog = new CatalogSync(dataset, apiBase);
+        try {
+            await catalog.sync();
+            return await catalog.records();
+        } catch (error) {
+            console.warn(`Catalog sync unavailable (${error.message})`);
+        }
+        try {
+            // API down: a previously synced copy is still better than re-downloading the CSV
+            if ((await catalog.state()).version) return await catalog.records();
+        } catch (error) {
+            console.warn(`Local catalog unavailable (${error.message}); loading ${csvUrl}`);
+        }
+    }
+    const response = await fetch(csvUrl);
+    return parseCSV(await response.text());
+}
+
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = { CatalogSync, loadCatalogRecords };
+}
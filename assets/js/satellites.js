@@ -112,6 +112,85 @@ class SatelliteManager {
             };
         }).filter(item => item.position !== null);
     }
+
+    // Load server-propagated positions (scripts/api.py /czml) into a Cesium viewer.
+    // Cesium interpolates the sampled positions itself, so no per-frame propagate() calls are needed.
+    // With options.add === false the data source is only returned, for pages that draw their own
+    // entities and take positions from it (see remapHeights); the viewer's clock is left alone then.
+    // Rejects when the API is unreachable, so callers can fall back to propagating in the browser.
+    async loadCZML(viewer, apiBase = 'http://localhost:8000', options = {}) {
+        const params = new URLSearchParams({
+            duration: options.duration || 5400,
+            step: options.step || 60
+        });
+        if (options.start) params.set('start', options.start.toISOString());
+        if (options.ids) params.set('ids', options.ids.join(','));
+
+        const dataSource = await Cesium.CzmlDataSource.load(`${apiBase}/czml?${params}`);
+        if (options.add !== false) {
+            await viewer.dataSources.add(dataSource);
+            viewer.clock.shouldAnimate = true;
+        }
+        console.log(`✓ Loaded ${dataSource.entities.values.length} satellites from CZML`);
+        return dataSource;
+    }
+
+    // Resample a CZML position every stepSeconds over [start, stop] with each height replaced by
+    // heightMeters(trueHeightKm), for the trackers' compressed or fixed display altitudes. Done once
+    // per satellite at load, so rendering still only interpolates.
+    static remapHeights(position, start, stop, stepSeconds, heightMeters) {
+        const remapped = new Cesium.SampledPositionProperty();
+        remapped.setInterpolationOptions({
+            interpolationAlgorithm: Cesium.LagrangePolynomialApproximation,
+            interpolationDegree: 5
+        });
+        for (let t = start.clone(); Cesium.JulianDate.lessThanOrEquals(t, stop);
+             t = Cesium.JulianDate.addSeconds(t, stepSeconds, new Cesium.JulianDate())) {
+            const cartesian = position.getValue(t);
+            if (!cartesian) continue;
+            const c = Cesium.Cartographic.fromCartesian(cartesian);
+            remapped.addSample(t, Cesium.Cartesian3.fromRadians(c.longitude, c.latitude, heightMeters(c.height / 1000)));
+        }
+        return remapped;
+    }
+
+    // Fetch a precomputed one-orbit ground track and orbit ring (scripts/groundtracks.py).
+    // Returns { noradId, epoch, periodSeconds, groundTrack: [[[lat, lon], ...], ...], orbitRingKm: [[x, y, z], ...] }
+    async loadGroundTrack(noradId, apiBase = 'http://localhost:8000') {
+        const response = await fetch(`${apiBase}/tracks/${noradId}`);
+        if (!response.ok) return null;
+        return SatelliteManager.decodeTrack(new DataView(await response.arrayBuffer()));
+    }
+
+    static decodeTrack(view) {
+        const Q = 32767;
+        const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+        if (magic !== 'GTRK') throw new Error('Not a ground-track record');
+        const noradId = view.getUint32(5, true);
+        const epoch = new Date(view.getFloat64(9, true) * 1000);
+        const periodSeconds = view.getFloat32(17, true);
+        const nSegments = view.getUint16(21, true);
+        const nRing = view.getUint16(25, true);
+        const ringScale = view.getFloat32(27, true);
+
+        let pos = 31;
+        const segmentLengths = [];
+        for (let i = 0; i < nSegments; i++, pos += 2) segmentLengths.push(view.getUint16(pos, true));
+
+        const groundTrack = segmentLengths.map(length => {
+            const points = [];
+            for (let i = 0; i < length; i++, pos += 4) {
+                points.push([view.getInt16(pos, true) / Q * 90, view.getInt16(pos + 2, true) / Q * 180]);
+            }
+            return points;
+        });
+
+        const orbitRingKm = [];
+        for (let i = 0; i < nRing; i++, pos += 6) {
+            orbitRingKm.push([0, 2, 4].map(k => view.getInt16(pos + k, true) / Q * ringScale));
+        }
+        return { noradId, epoch, periodSeconds, groundTrack, orbitRingKm };
+    }
 }
 
 // Export for use in main script
@@ -0,0 +1,492 @@
+"""HTTP API for the catalog, served with FastAPI/uvicorn.
+
+    python scripts/api.py --port 8000
+    uvicorn api:app --app-dir scripts
+
+Endpoints:
+    GET /czml             CZML with sampled positions for a time window (streamed)
+    GET /tracks           Packed ground-track/orbit-ring records for ``ids``
+    GET /tracks/{norad}   One record (binary, or ``?format=json``)
+    GET /decay            Reentry forecasts, soonest first (``within_days``, ``limit``)
+    GET /decay/{norad}    Forecast for one object
+    GET /density/summary  Per-date object counts by altitude shell and inclination band
+    GET /density          Full shell × band × RAAN grid for one snapshot ``date``
+    GET /sky              Satellites above an observer's horizon: look angles, sunlight, magnitude
+    GET /satellites       Search (``q``) and page (``offset``, ``limit``) through the catalog
+    GET /stats            Catalog counts by status, orbit regime, type, owner and state
+    GET /geo              GEO objects within ±``width`` of longitude ``lon``
+    GET /geo/slots        GEO belt occupancy by longitude slot
+    GET /geo/events       Station-keeping events: objects leaving, returning to or moving their box
+    POST /coverage        Satellites, coverage fraction and revisit gaps over a polygon
+    GET /catalog/{dataset}  Catalog changes since ``since`` (or a full snapshot), for client-side sync
+    GET /metrics          Prometheus metrics for this process
+
+scripts/loadtest.py drives a dashboard/registry/tracker request mix against it.
+"""
+
+from __future__ import annotations
+import argparse, hashlib, json, threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+import catalog_feed
+import coverage
+import czml
+import decay
+import density
+import geo
+import groundtracks
+import illumination
+import metrics
+import propagation
+from satrecord import SatelliteTable
+
+MAX_SAMPLES = 2881          # per satellite per document (e.g. 48 h at 60 s)
+CZML_CACHE_BYTES = 256 * 2**20       # all cached CZML documents together
+CZML_CACHE_DOCUMENT = 48 * 2**20     # larger documents are streamed but not kept
+FEED_CACHE_BYTES = 64 * 2**20
+FEED_CACHE_DOCUMENT = 16 * 2**20
+
+app = FastAPI(title="Satellite Registry API")
+# The HTML pages are served separately (python -m http.server), so allow cross-origin GETs.
+# POST /coverage can start an expensive computation, so it isn't open to other origins.
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["GET"], allow_headers=["*"],
+                   expose_headers=["ETag"])
+app.add_middleware(GZipMiddleware, minimum_size=4096)
+
+
+class ChunkCache:
+    """LRU of fully generated responses, stored as their text chunks.
+
+    Bounded by the total size of the chunks (``max_bytes``), not the number of
+    entries, since one full-catalog CZML document can be tens of MB; a response
+    over ``max_entry_bytes`` is never kept.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries: OrderedDict[tuple, tuple[list[str], int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> list[str] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: tuple, chunks: list[str]):
+        size = sum(len(c) for c in chunks)
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (chunks, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def stream(self, key: tuple, source):
+        """Yield from ``source`` while recording it; cache only if it completes within max_entry_bytes."""
+        chunks, size = [], 0
+        for chunk in source:
+            if chunks is not None:
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > self.max_entry_bytes:
+                    chunks = None  # too big to keep: stop holding the chunks already sent
+            yield chunk
+        if chunks is not None:
+            self.put(key, chunks)
+
+
+czml_cache = ChunkCache(CZML_CACHE_BYTES, CZML_CACHE_DOCUMENT)
+
+
+def parse_ids(ids: str | None) -> list[int] | None:
+    if not ids:
+        return None
+    try:
+        return sorted({int(x) for x in ids.split(",") if x.strip()})
+    except ValueError:
+        raise HTTPException(400, "ids must be a comma-separated list of NORAD IDs")
+
+
+def etag_for(key: tuple) -> str:
+    return '"' + hashlib.sha1(repr(key).encode()).hexdigest()[:20] + '"'
+
+
+@app.get("/czml")
+def get_czml(request: Request,
+             start: str | None = Query(None, description="ISO-8601 UTC start (default now)"),
+             duration: int = Query(5400, gt=0, description="Window length in seconds"),
+             step: int = Query(60, gt=0, description="Seconds between samples"),
+             ids: str | None = Query(None, description="Comma-separated NORAD IDs (default all)")):
+    if duration // step + 1 > MAX_SAMPLES:
+        raise HTTPException(400, f"duration/step gives more than {MAX_SAMPLES} samples per satellite")
+    try:
+        t0 = propagation.floor_time(propagation.parse_time(start), step)
+    except ValueError:
+        raise HTTPException(400, "start must be an ISO-8601 timestamp")
+    catalog = propagation.get_catalog()
+    id_list = parse_ids(ids)
+    key = (catalog.version, t0.isoformat(), duration, step, tuple(id_list) if id_list else None)
+    headers = {"ETag": etag_for(key), "Cache-Control": "public, max-age=60"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    cached = czml_cache.get(key)
+    if cached is not None:
+        metrics.counter("czml_cache_total", outcome="hit")
+        return StreamingResponse(iter(cached), media_type="application/json", headers=headers)
+    metrics.counter("czml_cache_total", outcome="miss")
+    body = czml_cache.stream(key, czml.iter_czml(catalog, t0, duration, step, id_list))
+    return StreamingResponse(body, media_type="application/json", headers=headers)
+
+
+_file_cache: dict[Path, tuple[int, object]] = {}
+
+
+def load_cached(path: Path, loader, missing: str):
+    """``loader(path)`` memoised on the file's mtime; 503 with ``missing`` if the file isn't built yet."""
+    if not path.exists():
+        raise HTTPException(503, missing)
+    mtime = path.stat().st_mtime_ns
+    cached = _file_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _file_cache[path] = (mtime, loader(path))
+    return cached[1]
+
+
+def tracks_index() -> dict:
+    return load_cached(groundtracks.INDEX_FILE, lambda p: groundtracks.load_index(),
+                       "ground tracks not built; run scripts/groundtracks.py")
+
+
+def decay_forecast() -> dict[int, dict]:
+    return load_cached(decay.DEFAULT_OUTPUT, decay.load_forecast, "no forecast yet; run scripts/decay.py")
+
+
+def decay_json(row: dict) -> dict:
+    out = dict(row)
+    for key in ("NORAD_CAT_ID", "ELEMENT_SET_NO"):
+        out[key] = int(row[key]) if row[key] else None
+    for key in ("PERIGEE_KM", "APOGEE_KM", "LIFETIME_DAYS"):
+        out[key] = float(row[key]) if row[key] else None
+    return out
+
+
+@app.get("/tracks/{norad}")
+def get_track(norad: int, request: Request, format: str = Query("bin", pattern="^(bin|json)$")):
+    index = tracks_index()
+    entry = index["tracks"].get(str(norad))
+    if entry is None:
+        raise HTTPException(404, f"no track for NORAD {norad}")
+    headers = {"ETag": etag_for((norad, entry["epoch_jd"], *index["tolerances"])),
+               "Cache-Control": "public, max-age=3600"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    blob = groundtracks.read_record(norad, index)
+    if format == "json":
+        return JSONResponse(groundtracks.decode_track(blob), headers=headers)
+    return Response(blob, media_type="application/octet-stream", headers=headers)
+
+
+@app.get("/tracks")
+def get_tracks(ids: str = Query(..., description="Comma-separated NORAD IDs")):
+    """Records for ``ids`` back to back; each is self-delimiting via its header counts."""
+    index = tracks_index()
+    id_list = parse_ids(ids)
+    return Response(b"".join(groundtracks.read_records(id_list, index)), media_type="application/octet-stream",
+                    headers={"Cache-Control": "public, max-age=3600"})
+
+
+@app.get("/decay")
+def get_decay(within_days: float | None = Query(None, gt=0, description="Only objects reentering this soon after now"),
+              limit: int = Query(100, gt=0, le=10000)):
+    """Forecasts ordered by nominal reentry date (objects with no decay signal last)."""
+    rows = decay_forecast().values()
+    if within_days is not None:
+        cutoff = (datetime.now(timezone.utc) + timedelta(days=within_days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        rows = [r for r in rows if r["REENTRY_NOMINAL"] and r["REENTRY_NOMINAL"] <= cutoff]
+    return [decay_json(r) for r in list(rows)[:limit]]
+
+
+@app.get("/decay/{norad}")
+def get_decay_one(norad: int):
+    row = decay_forecast().get(norad)
+    if row is None:
+        raise HTTPException(404, f"no forecast for NORAD {norad} (not in LEO or not in the catalog)")
+    return decay_json(row)
+
+
+@app.get("/density/summary")
+def get_density_summary():
+    return load_cached(density.SUMMARY_FILE, lambda p: json.loads(p.read_text()),
+                       "density grids not built; run scripts/density.py")
+
+
+@app.get("/density")
+def get_density(date: str | None = Query(None, description="Snapshot date YYYY-MM-DD (default latest)")):
+    index, grids = load_cached(density.GRIDS_FILE, lambda p: density.load_grids(),
+                               "density grids not built; run scripts/density.py")
+    dates = [s["date"] for s in index["snapshots"]]
+    if not dates:
+        raise HTTPException(404, "no snapshots")
+    if date is None:
+        date = dates[-1]
+    if date not in dates:
+        raise HTTPException(404, f"no snapshot for {date}")
+    return {
+        "date": date,
+        "alt_edges_km": index["alt_edges_km"],
+        "inc_edges_deg": index["inc_edges_deg"],
+        "raan_sectors": index["raan_sectors"],
+        "counts": np.round(grids[dates.index(date)], 2).tolist(),
+    }
+
+
+@app.get("/sky")
+def get_sky(lat: float = Query(..., ge=-90, le=90), lon: float = Query(..., ge=-180, le=180),
+            alt: float = Query(0.0, description="Observer height in km"),
+            time: str | None = Query(None, description="ISO-8601 UTC time (default now)"),
+            min_elevation: float = Query(0.0, ge=-90, lt=90),
+            shadow: str = Query("conical", description="cylindrical or conical")):
+    try:
+        t = propagation.parse_time(time)
+    except ValueError:
+        raise HTTPException(400, "time must be an ISO-8601 timestamp")
+    if shadow not in illumination.SHADOW_MODELS:
+        raise HTTPException(400, f"shadow must be one of {', '.join(illumination.SHADOW_MODELS)}")
+    catalog = propagation.get_catalog()
+    _, jd, fr = propagation.time_grid(t, 0, 1)
+    err, r, _ = propagation.propagate(catalog.satrec_array(np.arange(len(catalog))), jd, fr)
+    sun = illumination.sun_position(jd, fr)
+    lit = illumination.shadow_fraction(r, sun, shadow)
+    r_ecef, sun_ecef = propagation.teme_to_ecef(r, jd, fr), propagation.teme_to_ecef(sun, jd, fr)
+    elev, az, rng = illumination.look_angles(r_ecef, lat, lon, alt)
+    sun_elev, _, _ = illumination.look_angles(sun_ecef, lat, lon, alt)
+    mag = illumination.visual_magnitude(illumination.standard_magnitude(*catalog.sizes.T), r_ecef, sun_ecef,
+                                        illumination.geodetic_to_ecef(lat, lon, alt), lit)
+
+    rows = np.flatnonzero((err[:, 0] == 0) & (elev[:, 0] >= min_elevation))
+    rows = rows[np.argsort(-elev[rows, 0])]
+    return {
+        "time": t.isoformat(),
+        "sun_elevation": round(float(sun_elev[0]), 2),
+        "satellites": [{
+            "norad_id": int(catalog.norad_ids[i]),
+            "name": catalog.names[i],
+            "elevation": round(float(elev[i, 0]), 2),
+            "azimuth": round(float(az[i, 0]), 2),
+            "range_km": round(float(rng[i, 0]), 1),
+            "sunlit": round(float(lit[i, 0]), 3),
+            "magnitude": None if np.isnan(mag[i, 0]) else round(float(mag[i, 0]), 1),
+        } for i in rows],
+    }
+
+
+SEARCH_FIELDS = ("NORAD_CAT_ID", "OBJECT_NAME", "OBJECT_ID", "Type", "Owner", "State", "STATUS", "EPOCH",
+                 "MEAN_MOTION", "ECCENTRICITY", "INCLINATION", "TLE_FETCHED")
+
+
+def orbit_regime(mean_motion: np.ndarray, ecc: np.ndarray) -> np.ndarray:
+    """LEO/MEO/GEO/HEO from mean motion (rev/day) and eccentricity; '' when unknown."""
+    regime = np.where(mean_motion > 11.25, "LEO", "MEO")
+    regime = np.where((mean_motion > geo.GEO_MEAN_MOTION[0]) & (mean_motion < geo.GEO_MEAN_MOTION[1])
+                      & (ecc < geo.GEO_MAX_ECC), "GEO", regime)
+    regime = np.where(ecc >= 0.25, "HEO", regime)
+    return np.where(np.isnan(mean_motion), "", regime)
+
+
+class CatalogRows:
+    """The TLE catalog CSV kept in memory for search, paging and aggregate stats."""
+
+    def __init__(self, path: Path):
+        table = SatelliteTable.from_csv(path, usecols=SEARCH_FIELDS + ("N2YO_SAT_NAME", "Name"))
+        ids = np.array([-1 if v is None else v for v in table.column("NORAD_CAT_ID")], dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        self.records = [{f: table.value(f, i) if f in table.columns else None for f in SEARCH_FIELDS} for i in order]
+        names = [table[i].get("OBJECT_NAME") or table[i].get("N2YO_SAT_NAME") or table[i].get("Name") or ""
+                 for i in order]
+        for rec, name in zip(self.records, names):
+            rec["OBJECT_NAME"] = name
+        self.ids = ids[order]
+        self.search_keys = [f"{name}\x1f{rec['OBJECT_ID'] or ''}".upper() for rec, name in zip(self.records, names)]
+        mm = np.array([np.nan if r["MEAN_MOTION"] is None else r["MEAN_MOTION"] for r in self.records], dtype=float)
+        ecc = np.array([np.nan if r["ECCENTRICITY"] is None else r["ECCENTRICITY"] for r in self.records], dtype=float)
+        for rec, regime in zip(self.records, orbit_regime(mm, ecc)):
+            rec["REGIME"] = str(regime) or None
+        self.stats = self._stats()
+
+    def _stats(self, top: int = 20) -> dict:
+        def counts(field: str, limit: int | None = None, key=lambda v: v) -> dict[str, int]:
+            values, n = np.unique([key(r[field] or "") for r in self.records], return_counts=True)
+            order = np.argsort(-n, kind="stable")[:limit]
+            return {str(values[i]) or "unknown": int(n[i]) for i in order}
+        return {"total": len(self.records), "with_tle": sum(r["TLE_FETCHED"] == "YES" for r in self.records),
+                "by_status": counts("STATUS"), "by_regime": counts("REGIME"), "by_type": counts("Type", top, key=lambda v: v[:1]),  # GCAT P/R/C/D...
+                "by_owner": counts("Owner", top), "by_state": counts("State", top)}
+
+    def search(self, q: str | None) -> np.ndarray:
+        """Row indices matching ``q``: a NORAD ID, or a substring of the name or international designator."""
+        if not q:
+            return np.arange(len(self.records))
+        q = q.strip().upper()
+        if q.isdigit():
+            return np.flatnonzero(self.ids == int(q))
+        return np.array([i for i, key in enumerate(self.search_keys) if q in key], dtype=np.intp)
+
+
+def catalog_rows() -> CatalogRows:
+    return load_cached(propagation.DEFAULT_TLE_CSV, CatalogRows, f"{propagation.DEFAULT_TLE_CSV.name} not found")
+
+
+@app.get("/satellites")
+def get_satellites(q: str | None = Query(None, description="NORAD ID, or part of a name or designator"),
+                   regime: str | None = Query(None, pattern="^(LEO|MEO|GEO|HEO)$"),
+                   offset: int = Query(0, ge=0), limit: int = Query(50, gt=0, le=1000)):
+    """Search and page through the catalog, ordered by NORAD ID."""
+    rows = catalog_rows()
+    hits = rows.search(q)
+    if regime:
+        hits = hits[[rows.records[i]["REGIME"] == regime for i in hits]] if len(hits) else hits
+    return {"total": len(hits), "offset": offset, "limit": limit,
+            "satellites": [rows.records[i] for i in hits[offset:offset + limit]]}
+
+
+@app.get("/stats")
+def get_stats():
+    """Catalog counts by status, orbit regime, type, owner and state."""
+    return catalog_rows().stats
+
+
+def geo_index() -> geo.GeoIndex:
+    return load_cached(geo.STATE_FILE, lambda p: geo.GeoIndex.from_state(geo.load_state(p)),
+                       "GEO index not built; run scripts/geo.py")
+
+
+def parse_optional_time(value: str | None) -> datetime | None:
+    try:
+        return propagation.parse_time(value) if value else None
+    except ValueError:
+        raise HTTPException(400, "time must be an ISO-8601 timestamp")
+
+
+@app.get("/geo")
+def get_geo(lon: float = Query(..., ge=-180, le=180),
+            width: float = Query(0.5, gt=0, le=180, description="Half-width of the longitude range (deg)"),
+            time: str | None = Query(None, description="Move longitudes along their drift to this ISO-8601 time")):
+    """GEO objects within ±width of a longitude, nearest first."""
+    index = geo_index()
+    return {"reference": index.reference.date().isoformat(), "lon": lon, "width": width,
+            "objects": index.within(lon, width, parse_optional_time(time))}
+
+
+@app.get("/geo/slots")
+def get_geo_slots(width: float = Query(geo.DEFAULT_SLOT_WIDTH, ge=0.01, le=30),
+                  time: str | None = Query(None, description="Move longitudes along their drift to this ISO-8601 time")):
+    """Occupied longitude slots of the GEO belt."""
+    index = geo_index()
+    return {"reference": index.reference.date().isoformat(), "width": width, "objects": len(index),
+            "slots": index.slots(width, parse_optional_time(time))}
+
+
+@app.get("/geo/events")
+def get_geo_events(since: str | None = Query(None, description="Only events on or after this date (YYYY-MM-DD)"),
+                   norad: int | None = None, limit: int = Query(500, gt=0, le=10000)):
+    """Station-keeping events (left_box, returned, relocated), newest first."""
+    events = load_cached(geo.EVENTS_FILE, geo.load_events, "GEO index not built; run scripts/geo.py")
+    rows = [e for e in reversed(events) if (since is None or e["date"] >= since)
+            and (norad is None or e["norad"] == norad)]
+    return rows[:limit]
+
+
+class CoverageQuery(BaseModel):
+    polygon: list[tuple[float, float]] = Field(..., description="Region vertices as [lon, lat] pairs")
+    start: str | None = Field(None, description="ISO-8601 UTC window start (default the current hour)")
+    duration: int = Field(coverage.DEFAULT_DURATION, gt=0, le=7 * 86400)
+    step: int = Field(coverage.DEFAULT_STEP, ge=10)
+    resolution: float = Field(coverage.DEFAULT_RESOLUTION, ge=0.25, le=10)
+    min_elevation: float = Field(coverage.DEFAULT_MIN_ELEVATION, ge=0, lt=90)
+
+
+@app.post("/coverage")
+def post_coverage(query: CoverageQuery):
+    """Windows over coverage.MAX_* are refused with 400; a miss while another window computes gets 429."""
+    try:
+        t0 = coverage.default_start(query.start, query.step)
+    except ValueError:
+        raise HTTPException(400, "start must be an ISO-8601 timestamp")
+    try:
+        result = coverage.get_coverage(propagation.get_catalog(), t0, query.duration, query.step,
+                                       query.resolution, query.min_elevation)
+    except coverage.CoverageBusy as e:
+        raise HTTPException(429, str(e), headers={"Retry-After": "30"})
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    try:
+        return coverage.query_region(result, query.polygon)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+_feed_cache = ChunkCache(FEED_CACHE_BYTES, FEED_CACHE_DOCUMENT)
+
+
+@app.get("/catalog/{dataset}")
+def get_catalog_changes(dataset: str, request: Request,
+                        since: int | None = Query(None, ge=0, description="Version the client already has")):
+    try:
+        feed = catalog_feed.get_feed(dataset)
+    except KeyError:
+        raise HTTPException(404, f"unknown dataset {dataset!r}; expected one of {', '.join(catalog_feed.DATASETS)}")
+    # Read once: versions.json can be rewritten by catalog_feed.py between two reads
+    versions = feed.versions()
+    latest = versions[-1]["version"] if versions else 0
+    if not latest:
+        raise HTTPException(503, f"no {dataset} versions yet; run scripts/catalog_feed.py --dataset {dataset}")
+    # The ETag names the version the client ends up with, whatever ``since`` it came from, so a client
+    # holding the latest version gets a 304 on its next ``?since=<latest>`` request
+    headers = {"ETag": f'"{dataset}-v{latest}"', "Cache-Control": "no-cache", "X-Catalog-Version": str(latest)}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    key = (dataset, since, latest)
+    cached = _feed_cache.get(key)
+    if cached is None:
+        cached = [json.dumps(feed.changes_since(since, versions), separators=(",", ":"))]
+        _feed_cache.put(key, cached)
+    metrics.counter("catalog_sync_total", dataset=dataset, kind="delta" if since else "full")
+    return Response(cached[0], media_type="application/json", headers=headers)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return metrics.render_prometheus()
+
+
+def main(argv=None):
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Serve the satellite catalog API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""Offline benchmarks for every pipeline stage on synthetic catalogs.
+
+For each catalog size the inputs are generated once by synthetic_catalog.py,
+then each benchmark is timed (best of ``--repeat``) and run once more under
+tracemalloc to record peak Python memory. Results are written as JSON to
+bench_results/<git-sha>.json so two commits can be compared with --compare.
+
+    python scripts/benchmark.py --sizes 1000 10000
+    python scripts/benchmark.py --compare bench_results/abc1234.json
+"""
+
+from __future__ import annotations
+import argparse, contextlib, csv, gc, io, json, platform, subprocess, tempfile, time, tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import synthetic_catalog
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "bench_results"
+DEFAULT_SIZES = [1000, 10000, 65000, 250000]
+REGRESSION_THRESHOLD = 1.10  # flag anything 10% slower than the baseline
+
+
+class Inputs:
+    """Synthetic inputs for one catalog size, rendered lazily and cached."""
+
+    def __init__(self, size: int, workdir: Path):
+        self.size = size
+        self.workdir = workdir
+        self.objects = synthetic_catalog.generate_objects(size)
+        self._cache = {}
+
+    def _get(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    @property
+    def gcat_html(self) -> str:
+        return self._get("gcat_html", lambda: synthetic_catalog.gcat_html(self.objects))
+
+    @property
+    def celestrak_csv(self) -> str:
+        return self._get("celestrak_csv", lambda: synthetic_catalog.celestrak_csv(self.objects))
+
+    @property
+    def tle_text(self) -> str:
+        return self._get("tle_text", lambda: synthetic_catalog.tle_text(self.objects))
+
+    @property
+    def n2yo_json(self) -> list[str]:
+        return self._get("n2yo_json", lambda: synthetic_catalog.n2yo_json(self.objects))
+
+    @property
+    def satcat_csv(self) -> Path:
+        def build():
+            path = self.workdir / "satcat_master.csv"
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(synthetic_catalog.GCAT_COLUMNS)
+                writer.writerows(synthetic_catalog.gcat_rows(self.objects))
+            return path
+        return self._get("satcat_csv", build)
+
+    @property
+    def active_csv(self) -> Path:
+        """Celestrak CSV for every 5th object, roughly the real active/catalog ratio."""
+        def build():
+            path = self.workdir / "active.csv"
+            path.write_text(synthetic_catalog.celestrak_csv(self.objects[::5]), encoding="utf-8")
+            return path
+        return self._get("active_csv", build)
+
+    @property
+    def master_csv(self) -> Path:
+        def build():
+            path = self.workdir / "satellite_master_list.csv"
+            rows = self.master_rows
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+            return path
+        return self._get("master_csv", build)
+
+    @property
+    def master_rows(self) -> list[dict]:
+        return self._get("master_rows", lambda: [
+            {**{k: str(v) for k, v in o.items()}, "STATUS": "ACTIVE"} for o in self.objects])
+
+
+# --- Benchmarks -------------------------------------------------------------
+# Each takes an Inputs and returns a zero-argument callable that does the work
+# being measured; building inputs happens outside the timed region.
+
+def bench_parse_satcat_table(inp: Inputs):
+    import scrape_satcat
+    html = inp.gcat_html
+    return lambda: scrape_satcat.parse_satcat_table(html)
+
+
+def bench_create_master_list(inp: Inputs):
+    import scrape_satcat
+    satcat, active, out = str(inp.satcat_csv), str(inp.active_csv), str(inp.workdir / "master.csv")
+    return lambda: scrape_satcat.create_master_list(satcat, active, out, decay_csv=None)
+
+
+def bench_parse_csv_transform(inp: Inputs):
+    import update_active_satellites as ua
+    text = inp.celestrak_csv
+    return lambda: ua.transform(ua.parse_csv(text))
+
+
+def bench_parse_tle_block(inp: Inputs):
+    import update_active_satellites as ua
+    text = inp.tle_text
+    # A malformed line is skipped silently, so check the IDs before timing the parse
+    parsed = [int(r["NORAD_CAT_ID"]) for r in ua.parse_tle_block(text)]
+    if parsed != [o["NORAD_CAT_ID"] for o in inp.objects]:
+        raise ValueError("parse_tle_block IDs don't match the synthetic catalog")
+    return lambda: ua.parse_tle_block(text)
+
+
+def bench_merge_data(inp: Inputs):
+    import fetch_tle_n2yo
+    rows, bodies = inp.master_rows, inp.n2yo_json
+
+    def run():
+        out = []
+        for row, body in zip(rows, bodies):
+            data = json.loads(body)
+            lines = data["tle"].strip().split("\n")
+            tle = {"TLE_LINE1": lines[0].strip(), "TLE_LINE2": lines[1].strip(),
+                   "SAT_NAME": data["info"]["satname"]}
+            out.append(fetch_tle_n2yo.merge_data(row, tle))
+        return out
+    return run
+
+
+def bench_read_active_satellites(inp: Inputs):
+    import fetch_tle_n2yo
+    path = inp.master_csv
+    return lambda: fetch_tle_n2yo.read_active_satellites(path, limit=None)
+
+
+def bench_merge_tle_columns(inp: Inputs):
+    import fetch_tle_n2yo
+    from satrecord import SatelliteTable
+    path, bodies = inp.master_csv, inp.n2yo_json
+
+    def run():
+        table = SatelliteTable.from_csv(path)
+        results = []
+        for body in bodies:
+            data = json.loads(body)
+            lines = data["tle"].strip().split("\n")
+            results.append({"TLE_LINE1": lines[0].strip(), "TLE_LINE2": lines[1].strip(),
+                            "SAT_NAME": data["info"]["satname"]})
+        return fetch_tle_n2yo.merge_tle_columns(table, results)
+    return run
+
+
+def bench_write_json(inp: Inputs):
+    import update_active_satellites as ua
+    records = ua.transform(ua.parse_csv(inp.celestrak_csv))
+    path = inp.workdir / "active.json"
+    return lambda: ua.write_json(records, ua.CELESTRAK_URL, path)
+
+
+def bench_save_merged_csv(inp: Inputs):
+    import fetch_tle_n2yo
+    rows = [fetch_tle_n2yo.merge_data(r, None) for r in inp.master_rows]
+    path = inp.workdir / "merged.csv"
+    return lambda: fetch_tle_n2yo.save_merged_csv(rows, path)
+
+
+def bench_validate_tles(inp: Inputs):
+    import update_active_satellites as ua
+    import validation
+    from satrecord import SatelliteTable
+    records = ua.transform(ua.parse_csv(inp.celestrak_csv))
+    # Paired by position: IDs repeat in catalogs over synthetic_catalog.MAX_NORAD_ID objects
+    tles = ua.parse_tle_block(inp.tle_text)
+    if [int(r["NORAD_CAT_ID"]) for r in records] != [int(t["NORAD_CAT_ID"]) for t in tles]:
+        raise ValueError("TLE text and Celestrak CSV IDs don't match")
+    columns = {k: [r.get(k) for r in records] for k in ua.SELECT_FIELDS}
+    columns["TLE_LINE1"] = [t["TLE_LINE1"] for t in tles]
+    columns["TLE_LINE2"] = [t["TLE_LINE2"] for t in tles]
+    table = SatelliteTable(columns)
+    return lambda: validation.validate_table(table)
+
+
+BENCHMARKS = {
+    "parse_satcat_table": bench_parse_satcat_table,
+    "create_master_list": bench_create_master_list,
+    "parse_csv_transform": bench_parse_csv_transform,
+    "parse_tle_block": bench_parse_tle_block,
+    "merge_data": bench_merge_data,
+    "read_active_satellites": bench_read_active_satellites,
+    "merge_tle_columns": bench_merge_tle_columns,
+    "write_json": bench_write_json,
+    "save_merged_csv": bench_save_merged_csv,
+    "validate_tles": bench_validate_tles,
+}
+
+
+# --- Harness ----------------------------------------------------------------
+
+def measure(fn, repeat: int) -> dict:
+    """Best-of-``repeat`` wall time, then one traced run for peak memory."""
+    sink = io.StringIO()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        with contextlib.redirect_stdout(sink):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(sink):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(times), "peak_mb": peak / 2**20}
+
+
+def run_benchmarks(sizes: list[int], names: list[str], repeat: int) -> list[dict]:
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            inp = Inputs(size, Path(tmp))
+            for name in names:
+                try:
+                    fn = BENCHMARKS[name](inp)
+                except ImportError as e:
+                    print(f"  ⚠ {name:<20} {size:>7}  skipped ({e})")
+                    results.append({"bench": name, "size": size, "skipped": str(e)})
+                    continue
+                r = measure(fn, repeat)
+                print(f"  {name:<22} {size:>7}  {r['seconds']:9.4f}s  {r['peak_mb']:9.1f} MB")
+                results.append({"bench": name, "size": size, **r})
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: list[dict], baseline_path: Path):
+    baseline = {(r["bench"], r["size"]): r for r in json.loads(baseline_path.read_text())["results"]
+                if "seconds" in r}
+    print(f"\nCompared with {baseline_path}:")
+    for r in current:
+        old = baseline.get((r["bench"], r["size"]))
+        if not old or "seconds" not in r:
+            continue
+        ratio = r["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        flag = "  ⚠ regression" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"  {r['bench']:<22} {r['size']:>7}  x{ratio:5.2f} time  "
+              f"{r['peak_mb'] - old['peak_mb']:+8.1f} MB{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (best is kept)")
+    parser.add_argument("--output", type=Path, help="Result file (default bench_results/<git-sha>.json)")
+    parser.add_argument("--compare", type=Path, help="Baseline result file to compare against")
+    args = parser.parse_args()
+
+    names = args.only or list(BENCHMARKS)
+    results = run_benchmarks(args.sizes, names, args.repeat)
+
+    revision = git_revision()
+    output = args.output or RESULTS_DIR / f"{revision}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "meta": {
+            "revision": revision,
+            "created_utc": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }, indent=2))
+    print(f"\n✓ Saved results to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
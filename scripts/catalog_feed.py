@@ -0,0 +1,255 @@
+"""Versioned catalog snapshots with a per-row change feed.
+
+Each run compares a catalog CSV with the last snapshot of that dataset and,
+if anything changed, writes the next version (1, 2, 3, ...) with one change
+record per affected row:
+
+    {"id": 25544, "op": "added",   "fields": {...every column...}}
+    {"id": 25544, "op": "removed"}
+    {"id": 25544, "op": "updated", "fields": {...changed columns only...}}
+    {"id": 25544, "op": "tle",     "fields": {...}}   # an update that includes a new TLE/epoch
+
+Rows are keyed by JCAT (master list) or NORAD_CAT_ID. Only rows whose
+content hash changed are compared field by field. LAST_UPDATED, which
+create_master_list stamps on every row of every run, is left out of the feed,
+or every row would change every night.
+
+Layout under data/catalog/<dataset>/:
+
+    versions.json           [{"version", "created", "rows", "added", "removed", "updated", "tle"}, ...]
+    snapshot.json.gz        latest rows, used for the next diff and for full syncs
+    changes/<version>.json.gz
+
+Change files older than KEEP_VERSIONS are pruned; a client further behind
+than that gets a full snapshot instead of a delta (see ``changes_since``).
+
+    python scripts/catalog_feed.py --dataset tle
+    python scripts/catalog_feed.py --dataset master --input data/satellite_master_list.csv
+"""
+
+from __future__ import annotations
+import argparse, csv, gzip, hashlib, json, threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import metrics
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+FEED_DIR = DATA_DIR / "catalog"
+DATASETS = {
+    "master": DATA_DIR / "satellite_master_list.csv",
+    "tle": DATA_DIR / "satellites_with_tle_n2yo.csv",
+}
+KEY_COLUMNS = ("JCAT", "NORAD_CAT_ID")
+VOLATILE_COLUMNS = {"LAST_UPDATED"}
+TLE_COLUMNS = {"TLE_LINE1", "TLE_LINE2", "EPOCH"}
+KEEP_VERSIONS = 60
+
+csv.field_size_limit(10000000)
+
+
+def _row_key(value: str) -> int | None:
+    value = value.strip().lstrip("S")
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def read_rows(path: Path) -> tuple[list[str], dict[int, list[str]]]:
+    """(columns, {id: values}) with headers and values stripped and volatile columns dropped."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        key_col = next((c for c in KEY_COLUMNS if c in header), None)
+        if key_col is None:
+            raise ValueError(f"{path} has no {' or '.join(KEY_COLUMNS)} column")
+        keep = [i for i, h in enumerate(header) if h and h not in VOLATILE_COLUMNS]
+        key_i = header.index(key_col)
+        rows = {}
+        for row in reader:
+            if not row:
+                continue
+            key = _row_key(row[key_i]) if key_i < len(row) else None
+            if key is None:
+                continue
+            rows[key] = [row[i].strip() if i < len(row) else "" for i in keep]
+    return [header[i] for i in keep], rows
+
+
+def _digest(values: list[str]) -> bytes:
+    return hashlib.blake2b("\x1f".join(values).encode(), digest_size=12).digest()
+
+
+def diff(old_columns: list[str], old_rows: dict[int, list[str]],
+         columns: list[str], rows: dict[int, list[str]]) -> list[dict]:
+    """Change records turning ``old_rows`` into ``rows``."""
+    changes = []
+    same_layout = old_columns == columns
+    old_pos = {c: i for i, c in enumerate(old_columns)}
+    for key, values in rows.items():
+        old = old_rows.get(key)
+        if old is None:
+            changes.append({"id": key, "op": "added", "fields": dict(zip(columns, values))})
+            continue
+        if same_layout and _digest(old) == _digest(values):
+            continue
+        changed = {c: v for c, v in zip(columns, values)
+                   if c not in old_pos or old[old_pos[c]] != v}
+        if changed:
+            op = "tle" if TLE_COLUMNS & changed.keys() else "updated"
+            changes.append({"id": key, "op": op, "fields": changed})
+    for key in old_rows.keys() - rows.keys():
+        changes.append({"id": key, "op": "removed"})
+    return changes
+
+
+def merge_changes(batches: list[list[dict]]) -> list[dict]:
+    """Collapse consecutive versions' changes into one record per row."""
+    merged: dict[int, dict] = {}
+    new_rows = set()   # rows the client can't have: first seen as "added"
+    for batch in batches:
+        for ch in batch:
+            key = ch["id"]
+            prev = merged.get(key)
+            if prev is None and ch["op"] == "added":
+                new_rows.add(key)
+            if ch["op"] == "removed" and key in new_rows:
+                merged.pop(key, None)  # came and went since the client's version
+                new_rows.discard(key)
+            elif prev is None or ch["op"] in ("added", "removed") or prev["op"] == "removed":
+                # A row removed and re-added comes back as a full "added" record
+                merged[key] = dict(ch, fields=dict(ch["fields"])) if "fields" in ch else dict(ch)
+            else:
+                prev["fields"].update(ch["fields"])
+                if prev["op"] == "updated" and ch["op"] == "tle":
+                    prev["op"] = "tle"
+    return list(merged.values())
+
+
+def _write_json_gz(path: Path, obj):
+    tmp = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(obj, f, separators=(",", ":"))
+    tmp.replace(path)
+
+
+def _read_json_gz(path: Path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Feed:
+    """One dataset's versions, snapshot and change files."""
+
+    def __init__(self, dataset: str, root: Path = FEED_DIR):
+        self.dataset = dataset
+        self.dir = root / dataset
+        self.versions_file = self.dir / "versions.json"
+        self.snapshot_file = self.dir / "snapshot.json.gz"
+        self.changes_dir = self.dir / "changes"
+
+    def versions(self) -> list[dict]:
+        if not self.versions_file.exists():
+            return []
+        return json.loads(self.versions_file.read_text())
+
+    def latest(self) -> int:
+        versions = self.versions()
+        return versions[-1]["version"] if versions else 0
+
+    def snapshot(self) -> tuple[list[str], dict[int, list[str]]]:
+        if not self.snapshot_file.exists():
+            return [], {}
+        snap = _read_json_gz(self.snapshot_file)
+        return snap["columns"], {int(k): v for k, v in snap["rows"].items()}
+
+    def update(self, path: Path) -> dict | None:
+        """Diff ``path`` against the snapshot and publish a new version; None when nothing changed."""
+        columns, rows = read_rows(path)
+        old_columns, old_rows = self.snapshot()
+        with metrics.stage("catalog_diff"):
+            changes = diff(old_columns, old_rows, columns, rows)
+        if not changes and old_columns == columns:
+            return None
+
+        versions = self.versions()
+        version = (versions[-1]["version"] if versions else 0) + 1
+        counts = {op: sum(c["op"] == op for c in changes) for op in ("added", "removed", "updated", "tle")}
+        entry = {"version": version, "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                 "rows": len(rows), "columns_changed": old_columns != columns, **counts}
+
+        self.changes_dir.mkdir(parents=True, exist_ok=True)
+        _write_json_gz(self.changes_dir / f"{version}.json.gz", {"version": version, "columns": columns,
+                                                                 "changes": changes})
+        _write_json_gz(self.snapshot_file, {"version": version, "columns": columns,
+                                            "rows": {str(k): v for k, v in rows.items()}})
+        versions.append(entry)
+        for old in versions[:-KEEP_VERSIONS]:
+            (self.changes_dir / f"{old['version']}.json.gz").unlink(missing_ok=True)
+        self.versions_file.write_text(json.dumps(versions[-KEEP_VERSIONS:], indent=2))
+        metrics.counter("catalog_changes_total", len(changes), dataset=self.dataset)
+        return entry
+
+    def changes_since(self, since: int | None, versions: list[dict] | None = None) -> dict:
+        """Delta from ``since`` to the latest version, or the full snapshot when a delta isn't possible.
+
+        A delta needs every change file after ``since``; a client with no
+        version, a pruned one, or a changed column layout gets ``full``.
+        Pass ``versions`` when the caller has already read them, so the
+        answer is for the same latest version the caller saw.
+        """
+        if versions is None:
+            versions = self.versions()
+        latest = versions[-1]["version"] if versions else 0
+        if since is not None and since == latest:
+            return {"dataset": self.dataset, "version": latest, "full": False, "since": since, "changes": []}
+        pending = [v for v in versions if since is not None and v["version"] > since]
+        retained = {v["version"] for v in versions}
+        usable = (since is not None and 0 < since < latest and since in retained
+                  and not any(v.get("columns_changed") for v in pending))
+        if usable:
+            batches = [_read_json_gz(self.changes_dir / f"{v['version']}.json.gz") for v in pending]
+            return {"dataset": self.dataset, "version": latest, "full": False, "since": since,
+                    "columns": batches[-1]["columns"], "changes": merge_changes([b["changes"] for b in batches])}
+        columns, rows = self.snapshot()
+        return {"dataset": self.dataset, "version": latest, "full": True, "columns": columns,
+                "rows": [[k] + v for k, v in rows.items()]}
+
+
+_feeds: dict[str, Feed] = {}
+_feeds_lock = threading.Lock()
+
+
+def get_feed(dataset: str) -> Feed:
+    if dataset not in DATASETS:
+        raise KeyError(dataset)
+    with _feeds_lock:
+        return _feeds.setdefault(dataset, Feed(dataset))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish a new catalog version with per-row changes")
+    parser.add_argument("--dataset", choices=sorted(DATASETS), default="tle")
+    parser.add_argument("--input", type=Path, help="Catalog CSV (default depends on --dataset)")
+    parser.add_argument("--root", type=Path, default=FEED_DIR)
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+
+    path = args.input or DATASETS[args.dataset]
+    if not path.exists():
+        print(f"✗ {path} not found")
+        return
+    feed = Feed(args.dataset, args.root)
+    entry = feed.update(path)
+    if entry is None:
+        print(f"✓ {args.dataset}: unchanged at version {feed.latest()}")
+    else:
+        print(f"✓ {args.dataset}: version {entry['version']} ({entry['rows']} rows) - "
+              f"{entry['added']} added, {entry['removed']} removed, {entry['updated']} updated, "
+              f"{entry['tle']} new TLEs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,437 @@
+"""Regional coverage and revisit times on a lat/lon raster.
+
+For a time window the whole catalog is propagated in one batch, and each
+sample becomes a footprint around the sub-satellite point. The footprint's
+Earth-central half-angle follows from altitude h and minimum elevation e:
+
+    lambda = arccos(R / (R + h) · cos e) - e
+
+Footprints are rasterized row by row onto a ``resolution``-degree grid.
+Each footprint row is a longitude interval, marked with a difference array
+and a cumulative sum, so no per-cell loop is needed. Two structures are kept:
+
+    cover    (time step × cell) bitset   some satellite sees the cell at that step
+    runs     (sat, row, first col, last col)  each satellite's footprint rows over
+                                              the window, merged; sparse, so it
+                                              grows with swath, not satellites × cells
+
+Per-cell coverage fraction, pass count and revisit gaps are derived from
+``cover``. Results are cached on disk under data/coverage/, keyed by
+catalog version, window, step, resolution and minimum elevation, and the
+least recently used files beyond CACHE_FILES are deleted. Callers that
+don't pick a start use the current hour, so a cached window answers every
+region for the rest of that hour; a polygon query only reads the cached
+arrays (see ``query_region``).
+
+A window is refused up front (``check_limits``) when its cover bitset or
+rasterization work would exceed MAX_CELL_STEPS / MAX_FOOTPRINT_ROWS, and
+only one window is computed at a time (``CoverageBusy`` otherwise).
+
+Revisit gaps touching the start or end of the window are truncated by it.
+"""
+
+from __future__ import annotations
+import argparse, hashlib, json, os, threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import metrics
+import propagation
+
+CACHE_DIR = propagation.DATA_DIR / "coverage"
+DEFAULT_RESOLUTION = 1.0        # degrees
+DEFAULT_MIN_ELEVATION = 10.0    # degrees
+DEFAULT_DURATION = 86400
+DEFAULT_STEP = 60
+DEFAULT_START_FLOOR = 3600      # s; the default start (now) is floored to the hour
+CHUNK_CELLS = 2_000_000         # step × cell entries rasterized per batch
+CHUNK_FOOTPRINT_ROWS = 500_000  # satellite × step × footprint rows rasterized per batch
+STATS_CELL_STEPS = 2_000_000    # cell × step entries unpacked at a time for the gap statistics
+FLUSH_INTERVALS = 1_000_000     # footprint intervals buffered before merging into the per-satellite runs
+MEMORY_ENTRIES = 4
+CACHE_FILES = 32                # .npz windows kept under CACHE_DIR
+CACHE_FORMAT = 2                # bump when the .npz layout changes
+MAX_CELL_STEPS = 1_000_000_000  # cells × steps: the cover bitset is this / 8 bytes
+MAX_FOOTPRINT_ROWS = 400_000_000  # satellites × steps × footprint rows rasterized
+
+
+class CoverageBusy(RuntimeError):
+    """Another window is being computed; try again shortly."""
+
+
+@dataclass
+class CoverageResult:
+    key: dict
+    norad_ids: np.ndarray
+    names: list[str]
+    cover_bits: np.ndarray      # uint8 (ceil(T/8), cells), packed along time
+    runs: np.ndarray            # int32 (k, 4) sat index, row, first col, last col; disjoint per (sat, row)
+    cell_coverage: np.ndarray   # float32 (cells,) fraction of steps covered
+    cell_passes: np.ndarray     # int32 (cells,)
+    cell_max_gap: np.ndarray    # int32 (cells,) steps
+    cell_mean_gap: np.ndarray   # float32 (cells,) steps
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        res = self.key["resolution"]
+        return int(round(180 / res)), int(round(360 / res))
+
+    @property
+    def n_steps(self) -> int:
+        return self.key["n_steps"]
+
+
+def footprint_half_angle(alt_km: np.ndarray, min_elevation_deg: float) -> np.ndarray:
+    """Earth-central half-angle (deg) of the area seeing the satellite above ``min_elevation_deg``."""
+    eps = np.radians(min_elevation_deg)
+    ratio = propagation.WGS84_A / (propagation.WGS84_A + np.maximum(alt_km, 0.0))
+    return np.degrees(np.arccos(np.clip(ratio * np.cos(eps), -1.0, 1.0)) - eps)
+
+
+def footprint_intervals(lat: np.ndarray, lon: np.ndarray, lam: np.ndarray, res: float):
+    """Row/column intervals covered by footprints centred on (lat, lon) with half-angle ``lam``.
+
+    Returns (footprint index, row, first col, last col); columns are unwrapped
+    and may run past either edge of the grid by up to one full turn.
+    """
+    n_rows = int(round(180 / res))
+    first_row = np.clip(np.floor((lat - lam + 90) / res - 0.5).astype(int), 0, n_rows - 1)
+    last_row = np.clip(np.ceil((lat + lam + 90) / res - 0.5).astype(int), 0, n_rows - 1)
+    counts = last_row - first_row + 1
+    idx = np.repeat(np.arange(len(lat)), counts)
+    row = first_row[idx] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    row_lat = np.radians(-90 + res * (row + 0.5))
+    phi, cos_lam = np.radians(lat[idx]), np.cos(np.radians(lam[idx]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_dlon = (cos_lam - np.sin(phi) * np.sin(row_lat)) / (np.cos(phi) * np.cos(row_lat))
+    ok = cos_dlon <= 1.0
+    idx, row = idx[ok], row[ok]
+    dlon = np.degrees(np.arccos(np.clip(cos_dlon[ok], -1.0, 1.0)))
+    centre = lon[idx]
+    full = dlon >= 180.0
+    a = np.ceil((centre - dlon + 180) / res - 0.5).astype(int)
+    b = np.floor((centre + dlon + 180) / res - 0.5).astype(int)
+    n_cols = int(round(360 / res))
+    a = np.where(full, 0, a)
+    b = np.where(full, n_cols - 1, b)
+    keep = b >= a
+    return idx[keep], row[keep], a[keep], b[keep]
+
+
+def _split_wrapped(keys: np.ndarray, a: np.ndarray, b: np.ndarray, n_cols: int):
+    """Intervals running past an edge split into an in-range part and a wrapped part."""
+    lo_wrap, hi_wrap = a < 0, b >= n_cols
+    keys = np.concatenate([keys, keys[lo_wrap], keys[hi_wrap]])
+    starts = np.concatenate([np.maximum(a, 0), a[lo_wrap] + n_cols, np.zeros(hi_wrap.sum(), dtype=a.dtype)])
+    ends = np.concatenate([np.minimum(b, n_cols - 1), np.full(lo_wrap.sum(), n_cols - 1, dtype=b.dtype),
+                           b[hi_wrap] - n_cols])
+    return keys, starts, ends
+
+
+def _mark(keys: np.ndarray, a: np.ndarray, b: np.ndarray, n_keys: int, n_cols: int) -> np.ndarray:
+    """Boolean (n_keys, n_cols) with columns a..b of each key row set, wrapping at the antimeridian."""
+    keys, starts, ends = _split_wrapped(keys, a, b, n_cols)
+    size = n_keys * (n_cols + 1)
+    width = n_cols + 1
+    diff = (np.bincount(keys * width + starts, minlength=size)
+            - np.bincount(keys * width + ends + 1, minlength=size)).reshape(n_keys, width)
+    return np.cumsum(diff[:, :n_cols], axis=1) > 0
+
+
+def merge_runs(keys: np.ndarray, a: np.ndarray, b: np.ndarray, n_cols: int):
+    """Union of in-range intervals a..b per key: (key, first col, last col), sorted, disjoint, non-adjacent."""
+    order = np.lexsort((a, keys))
+    keys, a, b = keys[order].astype(np.int64), a[order], b[order]
+    span = n_cols + 2   # keeps intervals of different keys from ever touching
+    lo, hi = keys * span + a, keys * span + b
+    reach = np.maximum.accumulate(hi)
+    first = np.ones(len(lo), dtype=bool)
+    first[1:] = lo[1:] > reach[:-1] + 1
+    starts = np.flatnonzero(first)
+    last = np.append(starts[1:] - 1, len(lo) - 1)
+    return keys[starts], a[starts], reach[last] - keys[starts] * span
+
+
+def _merge_pending(runs: np.ndarray, pending: list[tuple], n_rows: int, n_cols: int) -> np.ndarray:
+    """Fold buffered (sat, row, a, b) footprint intervals into the merged per-satellite runs."""
+    if not pending:
+        return runs
+    sat, row, a, b = (np.concatenate(parts) for parts in zip(*pending))
+    keys, a, b = _split_wrapped(sat.astype(np.int64) * n_rows + row, a, b, n_cols)
+    keys = np.concatenate([runs[:, 0].astype(np.int64) * n_rows + runs[:, 1], keys])
+    a = np.concatenate([runs[:, 2], a])
+    b = np.concatenate([runs[:, 3], b])
+    keys, a, b = merge_runs(keys, a, b, n_cols)
+    return np.stack([keys // n_rows, keys % n_rows, a, b], axis=1).astype(np.int32)
+
+
+def run_stats(covered: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per row of a (cells, T) bool: passes, longest and mean uncovered run (steps)."""
+    n = covered.shape[0]
+    passes = np.bincount(np.nonzero(np.diff(covered.astype(np.int8), axis=1, prepend=0) == 1)[0], minlength=n)
+    # Uncovered runs start where ~covered rises and end where it falls (padding closes runs at the edges)
+    edges = np.diff(np.pad((~covered).astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    rows, start = np.nonzero(edges == 1)
+    _, end = np.nonzero(edges == -1)
+    length = end - start
+    max_gap = np.zeros(n, dtype=np.int64)
+    np.maximum.at(max_gap, rows, length)
+    count = np.bincount(rows, minlength=n)
+    total = np.bincount(rows, weights=length, minlength=n)
+    mean_gap = np.divide(total, count, out=np.zeros(n), where=count > 0)
+    return passes, max_gap, mean_gap
+
+
+def _footprint_rows(res: float) -> int:
+    # A LEO footprint at the default elevation spans about 40° of latitude
+    return max(1, round(40 / res))
+
+
+def check_limits(n_sats: int, key: dict):
+    """ValueError when the window is too large to compute (see MAX_CELL_STEPS / MAX_FOOTPRINT_ROWS)."""
+    res = key["resolution"]
+    n_cells = int(round(180 / res)) * int(round(360 / res))
+    if n_cells * key["n_steps"] > MAX_CELL_STEPS:
+        raise ValueError(f"{key['n_steps']} steps × {n_cells} cells is over the limit of {MAX_CELL_STEPS}; "
+                         "use a coarser resolution, a longer step or a shorter window")
+    rows = n_sats * key["n_steps"] * _footprint_rows(res)
+    if rows > MAX_FOOTPRINT_ROWS:
+        raise ValueError(f"{n_sats} satellites × {key['n_steps']} steps at {res}° is over the rasterization "
+                         f"limit; use a coarser resolution, a longer step or a shorter window")
+
+
+def cache_key(catalog: propagation.Catalog, start: datetime, duration_s: int, step_s: int,
+              resolution: float, min_elevation: float) -> dict:
+    return {"format": CACHE_FORMAT, "catalog_version": catalog.version, "start": start.isoformat(),
+            "duration_s": duration_s,
+            "step_s": step_s, "resolution": resolution, "min_elevation": min_elevation,
+            "n_steps": int(duration_s // step_s) + 1}
+
+
+def _key_digest(key: dict) -> str:
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+@metrics.timed("coverage_compute")
+def compute(catalog: propagation.Catalog, key: dict) -> CoverageResult:
+    res = key["resolution"]
+    n_rows, n_cols = int(round(180 / res)), int(round(360 / res))
+    n_cells, n_sats = n_rows * n_cols, len(catalog)
+    start = datetime.fromisoformat(key["start"])
+    offsets, jd, fr = propagation.time_grid(start, key["duration_s"], key["step_s"])
+    n_steps = len(offsets)
+    sats = catalog.satrec_array(np.arange(n_sats))
+    # Steps per batch, bounded by _mark's n_t × cells difference array and by the footprint
+    # intervals of n_t × satellites; a multiple of 8 for packbits
+    time_chunk = min(CHUNK_CELLS // n_cells, CHUNK_FOOTPRINT_ROWS // max(1, n_sats * _footprint_rows(res)))
+    time_chunk = max(8, time_chunk // 8 * 8)
+
+    cover_chunks = []
+    runs = np.zeros((0, 4), dtype=np.int32)
+    pending, pending_size = [], 0   # footprint intervals not yet merged into runs
+    for lo in range(0, n_steps, time_chunk):
+        t = slice(lo, lo + time_chunk)
+        n_t = len(offsets[t])
+        with metrics.stage("coverage_propagate"):
+            err, r, _ = propagation.propagate(sats, jd[t], fr[t])
+            lat, lon, alt = propagation.ecef_to_geodetic(propagation.teme_to_ecef(r, jd[t], fr[t]))
+        ok = err == 0
+        sat_idx, t_idx = np.nonzero(ok)
+        lam = footprint_half_angle(alt[ok], key["min_elevation"])
+        with metrics.stage("coverage_rasterize"):
+            fp, row, a, b = footprint_intervals(lat[ok], lon[ok], lam, res)
+            step_cover = _mark(t_idx[fp] * n_rows + row, a, b, n_t * n_rows, n_cols)
+            cover_chunks.append(np.packbits(step_cover.reshape(n_t, n_cells), axis=0))
+            del step_cover
+            pending.append((sat_idx[fp].astype(np.int32), row.astype(np.int32), a.astype(np.int32),
+                            b.astype(np.int32)))
+            pending_size += len(fp)
+            if pending_size >= FLUSH_INTERVALS or lo + time_chunk >= n_steps:
+                runs = _merge_pending(runs, pending, n_rows, n_cols)
+                pending, pending_size = [], 0
+    cover_bits = np.concatenate(cover_chunks, axis=0) if cover_chunks else np.zeros((0, n_cells), np.uint8)
+
+    passes = np.zeros(n_cells, dtype=np.int32)
+    max_gap = np.zeros(n_cells, dtype=np.int32)
+    mean_gap = np.zeros(n_cells, dtype=np.float32)
+    coverage = np.zeros(n_cells, dtype=np.float32)
+    cell_chunk = max(8, STATS_CELL_STEPS // max(1, n_steps))
+    for c0 in range(0, n_cells, cell_chunk):
+        c = slice(c0, c0 + cell_chunk)
+        covered = np.unpackbits(cover_bits[:, c], axis=0, count=n_steps).T.astype(bool)
+        coverage[c] = covered.mean(axis=1)
+        passes[c], max_gap[c], mean_gap[c] = run_stats(covered)
+
+    return CoverageResult(key, catalog.norad_ids.copy(), list(catalog.names), cover_bits, runs,
+                          coverage, passes, max_gap, mean_gap)
+
+
+def save(result: CoverageResult, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez_compressed(tmp, key=json.dumps(result.key), names=json.dumps(result.names),
+                        norad_ids=result.norad_ids, cover_bits=result.cover_bits, runs=result.runs,
+                        cell_coverage=result.cell_coverage, cell_passes=result.cell_passes,
+                        cell_max_gap=result.cell_max_gap, cell_mean_gap=result.cell_mean_gap)
+    tmp.replace(path)
+
+
+def load(path: Path) -> CoverageResult:
+    with np.load(path) as z:
+        return CoverageResult(json.loads(str(z["key"])), z["norad_ids"], json.loads(str(z["names"])),
+                              z["cover_bits"], z["runs"], z["cell_coverage"], z["cell_passes"],
+                              z["cell_max_gap"], z["cell_mean_gap"])
+
+
+def prune_cache(keep: int = CACHE_FILES, cache_dir: Path = CACHE_DIR):
+    """Delete all but the ``keep`` most recently used cached windows."""
+    files = sorted(cache_dir.glob("*.npz"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in files[keep:]:
+        path.unlink(missing_ok=True)
+
+
+_memory: OrderedDict[str, CoverageResult] = OrderedDict()
+_lock = threading.Lock()
+_compute_lock = threading.Lock()
+
+
+def get_coverage(catalog: propagation.Catalog, start: datetime, duration_s: int = DEFAULT_DURATION,
+                 step_s: int = DEFAULT_STEP, resolution: float = DEFAULT_RESOLUTION,
+                 min_elevation: float = DEFAULT_MIN_ELEVATION) -> CoverageResult:
+    """Coverage for the window, from memory, then disk, computing it only on a miss.
+
+    Raises ValueError when the window is over the size limits and
+    CoverageBusy when a miss arrives while another window is being computed.
+    """
+    key = cache_key(catalog, start, duration_s, step_s, resolution, min_elevation)
+    digest = _key_digest(key)
+    with _lock:
+        if digest in _memory:
+            _memory.move_to_end(digest)
+            metrics.counter("coverage_cache_total", outcome="memory")
+            return _memory[digest]
+    path = CACHE_DIR / f"{digest}.npz"
+    if path.exists():
+        result = load(path)
+        os.utime(path)  # mtime is the LRU order for prune_cache
+        metrics.counter("coverage_cache_total", outcome="disk")
+    else:
+        check_limits(len(catalog), key)
+        if not _compute_lock.acquire(blocking=False):
+            metrics.counter("coverage_cache_total", outcome="busy")
+            raise CoverageBusy("another coverage window is being computed; retry shortly")
+        try:
+            result = load(path) if path.exists() else compute(catalog, key)  # may have landed meanwhile
+            save(result, path)
+        finally:
+            _compute_lock.release()
+        prune_cache()
+        metrics.counter("coverage_cache_total", outcome="miss")
+    with _lock:
+        _memory[digest] = result
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+    return result
+
+
+def default_start(value: str | None, step_s: int) -> datetime:
+    """Window start: ``value`` floored to the step, or the current hour when not given."""
+    if value:
+        return propagation.floor_time(propagation.parse_time(value), step_s)
+    return propagation.floor_time(propagation.parse_time(None), DEFAULT_START_FLOOR)
+
+
+def polygon_cells(polygon: list[tuple[float, float]], resolution: float) -> np.ndarray:
+    """Flat indices of grid cells whose centre lies inside ``polygon`` ([(lon, lat), ...], even-odd rule)."""
+    n_rows, n_cols = int(round(180 / resolution)), int(round(360 / resolution))
+    poly = np.asarray(polygon, dtype=float)
+    if len(poly) < 3:
+        raise ValueError("polygon needs at least three vertices")
+    lats = -90 + resolution * (np.arange(n_rows) + 0.5)
+    lons = -180 + resolution * (np.arange(n_cols) + 0.5)
+    r_sel = np.flatnonzero((lats >= poly[:, 1].min()) & (lats <= poly[:, 1].max()))
+    c_sel = np.flatnonzero((lons >= poly[:, 0].min()) & (lons <= poly[:, 0].max()))
+    y, x = np.meshgrid(lats[r_sel], lons[c_sel], indexing="ij")
+    inside = np.zeros(x.shape, dtype=bool)
+    for (x1, y1), (x2, y2) in zip(poly, np.roll(poly, -1, axis=0)):
+        if y1 == y2:
+            continue
+        crosses = (y1 > y) != (y2 > y)
+        x_at = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < x_at)
+    rr, cc = np.nonzero(inside)
+    return r_sel[rr] * n_cols + c_sel[cc]
+
+
+def query_region(result: CoverageResult, polygon: list[tuple[float, float]]) -> dict:
+    """Which satellites saw the region, how much of the window it was covered, and its revisit gaps."""
+    cells = polygon_cells(polygon, result.key["resolution"])
+    step = result.key["step_s"]
+    if not len(cells):
+        raise ValueError("polygon contains no grid cell centres; use a finer resolution")
+    # Region cells each run covers: runs lie within one row, cells are sorted flat indices
+    n_cols = result.shape[1]
+    sat, row, a, b = result.runs.T.astype(np.int64)
+    count = np.searchsorted(cells, row * n_cols + b, side="right") - np.searchsorted(cells, row * n_cols + a)
+    per_sat = np.bincount(sat, weights=count, minlength=len(result.norad_ids)).astype(np.int64)
+    order = np.argsort(-per_sat, kind="stable")
+    sats = [{"norad_id": int(result.norad_ids[i]), "name": result.names[i], "cells_seen": int(per_sat[i])}
+            for i in order if per_sat[i]]
+
+    region = np.unpackbits(result.cover_bits[:, cells], axis=0, count=result.n_steps).any(axis=1)
+    passes, max_gap, mean_gap = run_stats(region[None, :])
+    return {
+        "window": {k: result.key[k] for k in ("start", "duration_s", "step_s")},
+        "resolution": result.key["resolution"],
+        "min_elevation": result.key["min_elevation"],
+        "cells": int(len(cells)),
+        "satellites": sats,
+        "coverage_fraction": float(region.mean()),
+        "passes": int(passes[0]),
+        "max_gap_s": int(max_gap[0]) * step,
+        "mean_gap_s": round(float(mean_gap[0]) * step, 1),
+        "mean_cell_coverage": float(result.cell_coverage[cells].mean()),
+        "worst_cell_max_gap_s": int(result.cell_max_gap[cells].max()) * step,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coverage and revisit statistics for a region")
+    parser.add_argument("--polygon", required=True,
+                        help='Region as "lon,lat;lon,lat;..." (at least three vertices); '
+                             'write --polygon="..." when it starts with a negative number')
+    parser.add_argument("--start", help="ISO-8601 UTC window start (default the current hour; "
+                                        "an explicit start is floored to the step)")
+    parser.add_argument("--duration", type=int, default=DEFAULT_DURATION, help="Window length in seconds")
+    parser.add_argument("--step", type=int, default=DEFAULT_STEP, help="Seconds between samples")
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION, help="Grid cell size in degrees")
+    parser.add_argument("--min-elevation", type=float, default=DEFAULT_MIN_ELEVATION, help="Degrees above horizon")
+    parser.add_argument("--tle-csv", type=Path, default=propagation.DEFAULT_TLE_CSV)
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+
+    polygon = [tuple(float(v) for v in pt.split(",")) for pt in args.polygon.split(";") if pt.strip()]
+    catalog = propagation.get_catalog(args.tle_csv)
+    start = default_start(args.start, args.step)
+    try:
+        result = get_coverage(catalog, start, args.duration, args.step, args.resolution, args.min_elevation)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return
+    report = query_region(result, polygon)
+
+    print(f"✓ Region: {report['cells']} cells, window {report['window']['start']} + {args.duration} s")
+    print(f"  - Satellites with the region in view: {len(report['satellites'])}")
+    print(f"  - Covered {report['coverage_fraction']:.1%} of the window in {report['passes']} passes")
+    print(f"  - Revisit gap: max {report['max_gap_s']} s, mean {report['mean_gap_s']} s")
+    for sat in report["satellites"][:10]:
+        print(f"    {sat['norad_id']:>6}  {sat['name']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Build CZML documents with sampled positions for the Cesium trackers.
+
+Each satellite becomes one packet whose ``position`` holds Earth-fixed
+cartesian samples (metres) over the requested window, so Cesium interpolates
+between samples itself instead of running SGP4 per satellite per frame.
+Sunlit/eclipse state from ``illumination`` is attached as time intervals:
+the point is drawn dim while the satellite is in Earth's shadow, and a
+boolean ``sunlit`` property carries the same intervals for the page.
+
+Documents are produced as an iterator of JSON text chunks: the document
+packet, then one chunk per ``chunk_size`` satellites, so large catalogs can
+be streamed while later chunks are still being propagated.
+"""
+
+from __future__ import annotations
+import json
+from datetime import datetime, timedelta
+from typing import Iterator
+
+import numpy as np
+
+import illumination
+import metrics
+import propagation
+
+INTERPOLATION_DEGREE = 5
+DEFAULT_CHUNK_SIZE = 500
+SUNLIT_RGBA = [255, 165, 0, 230]
+ECLIPSED_RGBA = [90, 90, 120, 160]
+
+
+def _iso(t: datetime) -> str:
+    return t.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def document_packet(start: datetime, end: datetime, version: str) -> dict:
+    interval = f"{_iso(start)}/{_iso(end)}"
+    return {
+        "id": "document",
+        "name": f"satellites {version}",
+        "version": "1.0",
+        "clock": {"interval": interval, "currentTime": _iso(start), "multiplier": 60, "range": "LOOP_STOP"},
+    }
+
+
+def sunlit_intervals(start: datetime, end: datetime, offsets: np.ndarray, sunlit: np.ndarray) -> list[tuple]:
+    """Collapse per-sample sunlit flags into (interval, flag) runs; changes fall on the sample times."""
+    change = np.flatnonzero(sunlit[1:] != sunlit[:-1]) + 1
+    bounds = [start] + [start + timedelta(seconds=float(offsets[i])) for i in change] + [end]
+    flags = [bool(sunlit[0])] + [bool(sunlit[i]) for i in change]
+    return [(f"{_iso(t0)}/{_iso(t1)}", flag) for t0, t1, flag in zip(bounds[:-1], bounds[1:], flags)]
+
+
+def satellite_packet(norad_id: int, name: str, start: datetime, end: datetime,
+                     offsets: np.ndarray, positions_m: np.ndarray, sunlit: np.ndarray | None = None) -> dict:
+    """``positions_m`` is (n_samples, 3) ECEF metres aligned with ``offsets`` seconds."""
+    samples = np.column_stack([offsets, np.round(positions_m, 1)]).ravel().tolist()
+    packet = {
+        "id": f"sat-{norad_id}",
+        "name": name,
+        "availability": f"{_iso(start)}/{_iso(end)}",
+        "position": {
+            "epoch": _iso(start),
+            "referenceFrame": "FIXED",
+            "interpolationAlgorithm": "LAGRANGE",
+            "interpolationDegree": INTERPOLATION_DEGREE,
+            "cartesian": samples,
+        },
+        "point": {"pixelSize": 3, "color": {"rgba": SUNLIT_RGBA}},
+        "properties": {"noradId": norad_id},
+    }
+    if sunlit is not None:
+        runs = sunlit_intervals(start, end, offsets, sunlit)
+        packet["point"]["color"] = [{"interval": iv, "rgba": SUNLIT_RGBA if flag else ECLIPSED_RGBA}
+                                    for iv, flag in runs]
+        packet["properties"]["sunlit"] = [{"interval": iv, "boolean": flag} for iv, flag in runs]
+    return packet
+
+
+def iter_czml(catalog: propagation.Catalog, start: datetime, duration_s: int, step_s: int,
+              ids: list[int] | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Yield a CZML document as JSON text chunks that concatenate to one array."""
+    end = propagation.window_end(start, duration_s)
+    offsets, jd, fr = propagation.time_grid(start, duration_s, step_s)
+    sun = illumination.sun_position(jd, fr)
+    rows = catalog.select(ids)
+    yield "[" + json.dumps(document_packet(start, end, catalog.version))
+    for lo in range(0, len(rows), chunk_size):
+        batch = rows[lo:lo + chunk_size]
+        with metrics.stage("czml_propagate"):
+            err, r, _ = propagation.propagate(catalog.satrec_array(batch), jd, fr)
+            ecef_m = propagation.teme_to_ecef(r, jd, fr) * 1000.0
+            sunlit = illumination.shadow_fraction(r, sun) > 0.5
+        metrics.counter("czml_samples_total", int(err.size))
+        packets = []
+        for k, row in enumerate(batch):
+            ok = err[k] == 0
+            if ok.sum() < 2:
+                continue  # decayed or diverged over the whole window
+            packets.append(json.dumps(satellite_packet(
+                int(catalog.norad_ids[row]), catalog.names[row], start, end, offsets[ok], ecef_m[k, ok],
+                sunlit[k, ok])))
+        if packets:
+            yield "," + ",".join(packets)
+    yield "]"
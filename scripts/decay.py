@@ -0,0 +1,252 @@
+"""Forecast orbital lifetime and reentry windows for LEO objects.
+
+Works on the Celestrak GP columns (MEAN_MOTION, ECCENTRICITY, BSTAR,
+MEAN_MOTION_DOT, ...) for the whole catalog at once:
+
+1. Coarse pass (NumPy, every object with perigee below 2000 km). Orbit decay
+   under drag is da/dt = -B·rho(h)·sqrt(mu·a), so the time to fall from
+   perigee height h to 100 km is F(h)/B, where F is precomputed once from an
+   exponential atmosphere (Vallado, CIRA-72 table). B comes from the decay
+   actually observed in MEAN_MOTION_DOT when it is positive, otherwise from
+   BSTAR. Using perigee height makes eccentric-orbit lifetimes a lower bound.
+2. Refinement: objects forecast to reenter within ``--refine-days`` are
+   propagated with SGP4 in 10-minute steps; the first step below 100 km (or
+   where SGP4 reports decay) replaces the coarse estimate.
+
+The reentry window is the nominal date ± 20% of the remaining lifetime.
+Results go to data/decay_forecast.csv; on the next run any object whose
+EPOCH and ELEMENT_SET_NO are unchanged keeps its previous row, so only
+updated element sets are recomputed. create_master_list joins the file into
+the master list and the API serves it at /decay.
+"""
+
+from __future__ import annotations
+import argparse, csv
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+from sgp4.api import Satrec, SatrecArray
+
+import metrics
+import propagation
+from satrecord import MISSING_INT, SatelliteTable
+
+DATA_DIR = propagation.DATA_DIR
+DEFAULT_INPUT = DATA_DIR / "active-latest.csv"
+DEFAULT_OUTPUT = DATA_DIR / "decay_forecast.csv"
+
+OUTPUT_FIELDS = ["NORAD_CAT_ID", "OBJECT_NAME", "EPOCH", "ELEMENT_SET_NO", "PERIGEE_KM", "APOGEE_KM",
+                 "LIFETIME_DAYS", "REENTRY_EARLIEST", "REENTRY_NOMINAL", "REENTRY_LATEST", "DECAY_METHOD"]
+
+MU = 398600.4418            # km^3/s^2
+EARTH_RADIUS = 6378.137     # km
+REENTRY_ALT = 100.0         # km
+LEO_MAX_PERIGEE = 2000.0    # km
+MAX_LIFETIME_DAYS = 365.25 * 100
+UNCERTAINTY = 0.2           # reentry window = nominal ± 20% of remaining lifetime
+BSTAR_RHO0 = 0.15696615     # kg/m^2/ER: B = 2·B*/rho0 gives Cd·A/m in m^2/kg
+REFINE_DAYS = 30.0
+REFINE_STEP_S = 600
+REFINE_CHUNK = 200
+
+# Exponential atmosphere: base altitude (km), density (kg/m^3), scale height (km)
+ATMOSPHERE = np.array([
+    (100, 5.297e-7, 5.877), (110, 9.661e-8, 7.263), (120, 2.438e-8, 9.473), (130, 8.484e-9, 12.636),
+    (140, 3.845e-9, 16.149), (150, 2.070e-9, 22.523), (180, 5.464e-10, 29.740), (200, 2.789e-10, 37.105),
+    (250, 7.248e-11, 45.546), (300, 2.418e-11, 53.628), (350, 9.518e-12, 53.298), (400, 3.725e-12, 58.515),
+    (450, 1.585e-12, 60.828), (500, 6.967e-13, 63.822), (600, 1.454e-13, 71.835), (700, 3.614e-14, 88.667),
+    (800, 1.170e-14, 124.64), (900, 5.245e-15, 181.05), (1000, 3.019e-15, 268.00),
+])
+
+
+def density(h_km: np.ndarray) -> np.ndarray:
+    h = np.maximum(h_km, ATMOSPHERE[0, 0])
+    i = np.searchsorted(ATMOSPHERE[:, 0], h, side="right") - 1
+    base, rho0, scale = ATMOSPHERE[i].T
+    return rho0 * np.exp(-(h - base) / scale)
+
+
+def _drag_rate(h_km: np.ndarray) -> np.ndarray:
+    """rho·sqrt(mu·a) in kg/m^2/s: da/dt (m/s) per unit ballistic coefficient (m^2/kg)."""
+    return density(h_km) * np.sqrt(MU * 1e9 * (EARTH_RADIUS + h_km) * 1e3)
+
+
+_GRID = np.arange(REENTRY_ALT, LEO_MAX_PERIGEE + 1.0, 1.0)
+_INV = 1e3 / _drag_rate(_GRID)   # s per km of altitude for B = 1
+# F(h): seconds to decay from h to REENTRY_ALT with B = 1 m^2/kg (trapezoid on the 1 km grid)
+_F = np.concatenate([[0.0], np.cumsum((_INV[1:] + _INV[:-1]) / 2)])
+
+
+def lifetime_seconds(h_km: np.ndarray, ballistic: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.interp(h_km, _GRID, _F) / ballistic
+    return np.where(ballistic > 0, t, np.inf)
+
+
+def _column(table: SatelliteTable, name: str) -> np.ndarray:
+    if name not in table.columns:
+        return np.full(len(table), np.nan)
+    return np.array([np.nan if v is None else v for v in table.column(name)], dtype=float)
+
+
+def parse_epoch(value: str) -> datetime:
+    t = datetime.fromisoformat(value.strip().replace("Z", ""))
+    return t.replace(tzinfo=timezone.utc)
+
+
+@metrics.timed("decay_coarse")
+def coarse_forecast(n_rev_day: np.ndarray, ecc: np.ndarray, bstar: np.ndarray,
+                    ndot: np.ndarray) -> dict[str, np.ndarray]:
+    """Vectorized lifetime estimate. ``ndot`` is the TLE/OMM MEAN_MOTION_DOT (half the rate, rev/day^2)."""
+    n_rad_s = n_rev_day * 2 * np.pi / 86400.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = np.cbrt(MU / n_rad_s ** 2)
+        perigee = a * (1 - ecc) - EARTH_RADIUS
+        apogee = a * (1 + ecc) - EARTH_RADIUS
+        # Observed decay: da/dt = -(2/3)·a·(dn/dt)/n with dn/dt = 2·MEAN_MOTION_DOT, in m/s
+        dadt_obs = (2.0 / 3.0) * (a * 1e3) * (2 * ndot) / n_rev_day / 86400.0
+        b_obs = dadt_obs / _drag_rate(np.clip(perigee, REENTRY_ALT, LEO_MAX_PERIGEE))
+    b_bstar = 2 * bstar / BSTAR_RHO0
+    use_ndot = np.nan_to_num(ndot) > 0
+    ballistic = np.where(use_ndot, b_obs, b_bstar)
+    method = np.where(use_ndot, "ndot", np.where(np.nan_to_num(bstar) > 0, "bstar", "none"))
+    seconds = lifetime_seconds(np.clip(perigee, REENTRY_ALT, LEO_MAX_PERIGEE), np.nan_to_num(ballistic))
+    days = np.minimum(seconds / 86400.0, MAX_LIFETIME_DAYS)
+    days = np.where(perigee <= REENTRY_ALT, 0.0, days)
+    return {"perigee": perigee, "apogee": apogee, "days": days, "method": method}
+
+
+@metrics.timed("decay_refine")
+def refine(satrecs: list[Satrec], epochs: list[datetime], days: np.ndarray) -> np.ndarray:
+    """SGP4 reentry time in days after epoch for each satellite; NaN where no decay is seen."""
+    out = np.full(len(satrecs), np.nan)
+    for lo in range(0, len(satrecs), REFINE_CHUNK):
+        sl = slice(lo, lo + REFINE_CHUNK)
+        start = min(epochs[sl])
+        horizon = max(e + timedelta(days=2 * d) for e, d in zip(epochs[sl], days[sl])) - start
+        offsets, jd, fr = propagation.time_grid(start, horizon.total_seconds(), REFINE_STEP_S)
+        err, r, _ = propagation.propagate(SatrecArray(satrecs[sl]), jd, fr)
+        _, _, alt = propagation.ecef_to_geodetic(propagation.teme_to_ecef(r, jd, fr))
+        for k, epoch in enumerate(epochs[sl]):
+            after = offsets >= (epoch - start).total_seconds()
+            down = after & ((err[k] != 0) | (alt[k] < REENTRY_ALT))
+            if down.any():
+                first = int(np.argmax(down))
+                out[lo + k] = (offsets[first] - (epoch - start).total_seconds()) / 86400.0
+    return out
+
+
+def load_forecast(path: Path = DEFAULT_OUTPUT) -> dict[int, dict]:
+    if not path.exists():
+        return {}
+    with open(path, newline="") as f:
+        return {int(row["NORAD_CAT_ID"]): row for row in csv.DictReader(f)}
+
+
+def _text(value) -> str:
+    """A table value as it reads back from the output CSV (missing -> "", 0 -> "0")."""
+    return "" if value is None or value == MISSING_INT else str(value)
+
+
+def _iso(t: datetime) -> str:
+    return t.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def forecast(table: SatelliteTable, previous: dict[int, dict] | None = None,
+             refine_days: float = REFINE_DAYS) -> tuple[list[dict], dict]:
+    """Forecast rows for every LEO object in ``table``, reusing ``previous`` rows for unchanged element sets."""
+    previous = previous or {}
+    # One entry per row so ids[i] lines up with the other columns; rows without an ID are skipped
+    id_col = table.columns.get("NORAD_CAT_ID") or table.columns.get("JCAT") or [MISSING_INT] * len(table)
+    ids = [None if v == MISSING_INT else v for v in id_col]
+    known = np.array([n is not None for n in ids], dtype=bool)
+    epochs_raw = table.column("EPOCH")
+    elsets = table.column("ELEMENT_SET_NO") if "ELEMENT_SET_NO" in table.columns else [None] * len(table)
+    stale = np.array([
+        n is not None and (not (p := previous.get(n)) or _text(p.get("EPOCH")) != _text(e)
+                           or _text(p.get("ELEMENT_SET_NO")) != _text(s))
+        for n, e, s in zip(ids, epochs_raw, elsets)
+    ], dtype=bool)
+    summary = {"objects": len(table), "reused": int((known & ~stale).sum()), "computed": 0, "refined": 0,
+               "skipped": int((~known).sum())}
+
+    rows = {n: previous[n] for n, k, s in zip(ids, known, stale) if k and not s}
+    idx = np.flatnonzero(stale)
+    est = coarse_forecast(_column(table, "MEAN_MOTION")[idx], _column(table, "ECCENTRICITY")[idx],
+                          _column(table, "BSTAR")[idx], _column(table, "MEAN_MOTION_DOT")[idx])
+    leo = np.nan_to_num(est["perigee"], nan=np.inf) < LEO_MAX_PERIGEE
+    epochs = [parse_epoch(epochs_raw[i]) for i in idx]
+
+    near = np.flatnonzero(leo & (est["days"] <= refine_days))
+    satrecs, keep = [], []
+    for j in near:
+        s = propagation.satrec_from_record(table[int(idx[j])])
+        if s is not None:
+            satrecs.append(s)
+            keep.append(j)
+    if satrecs:
+        keep = np.array(keep)
+        refined = refine(satrecs, [epochs[j] for j in keep], est["days"][keep])
+        hit = ~np.isnan(refined)
+        est["days"][keep[hit]] = refined[hit]
+        est["method"][keep[hit]] = "sgp4"
+        summary["refined"] = int(hit.sum())
+
+    for j in np.flatnonzero(leo):
+        i, days = int(idx[j]), float(est["days"][j])
+        epoch, finite = epochs[j], days < MAX_LIFETIME_DAYS
+        rows[ids[i]] = {
+            "NORAD_CAT_ID": ids[i],
+            "OBJECT_NAME": table.value("OBJECT_NAME", i) if "OBJECT_NAME" in table.columns else "",
+            "EPOCH": epochs_raw[i],
+            "ELEMENT_SET_NO": _text(elsets[i]),
+            "PERIGEE_KM": f"{est['perigee'][j]:.1f}",
+            "APOGEE_KM": f"{est['apogee'][j]:.1f}",
+            "LIFETIME_DAYS": f"{days:.1f}" if finite else "",
+            "REENTRY_EARLIEST": _iso(epoch + timedelta(days=days * (1 - UNCERTAINTY))) if finite else "",
+            "REENTRY_NOMINAL": _iso(epoch + timedelta(days=days)) if finite else "",
+            "REENTRY_LATEST": _iso(epoch + timedelta(days=days * (1 + UNCERTAINTY))) if finite else "",
+            "DECAY_METHOD": str(est["method"][j]),
+        }
+        summary["computed"] += 1
+    return list(rows.values()), summary
+
+
+def write_forecast(rows: list[dict], path: Path = DEFAULT_OUTPUT):
+    rows = sorted(rows, key=lambda r: (r["REENTRY_NOMINAL"] == "", r["REENTRY_NOMINAL"]))
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast reentry windows for LEO objects")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="Celestrak GP CSV or master list")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--refine-days", type=float, default=REFINE_DAYS,
+                        help="Propagate objects forecast to reenter within this many days")
+    parser.add_argument("--full", action="store_true", help="Recompute every object, ignoring the previous output")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+
+    with metrics.stage("load"):
+        table = SatelliteTable.from_csv(args.input, where=lambda get: get("STATUS") in ("ACTIVE", ""))
+        previous = {} if args.full else load_forecast(args.output)
+    with metrics.stage("forecast"):
+        rows, summary = forecast(table, previous, args.refine_days)
+    write_forecast(rows, args.output)
+
+    soon = sum(1 for r in rows if r["LIFETIME_DAYS"] and float(r["LIFETIME_DAYS"]) <= 365)
+    print(f"✓ Wrote {len(rows)} LEO forecasts to {args.output}")
+    print(f"  - Recomputed: {summary['computed']} (SGP4-refined: {summary['refined']})")
+    print(f"  - Unchanged element sets reused: {summary['reused']}")
+    if summary["skipped"]:
+        print(f"  ⚠ Skipped {summary['skipped']} rows without a NORAD ID")
+    print(f"  - Forecast to reenter within a year of epoch: {soon}")
+
+
+if __name__ == "__main__":
+    main()
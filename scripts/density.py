@@ -0,0 +1,247 @@
+"""Population density by altitude shell × inclination band over time.
+
+Every daily archive snapshot (data/active-YYYYMMDD.csv, written by
+update_active_satellites.maybe_archive) is binned into a grid of
+
+    altitude shell × inclination band × RAAN sector (1 sector by default)
+
+Two ways of placing an object in altitude shells:
+
+    elements   (default) the fraction of each orbit spent in every shell,
+               from the Kepler time-vs-radius relation. Perigee/apogee come
+               from PERIAPSIS/APOAPSIS when the CSV has them, otherwise from
+               MEAN_MOTION and ECCENTRICITY.
+    positions  SGP4 positions at ``--samples`` times across the snapshot day.
+
+Cells hold (fractional) object counts. Output, in data/density/:
+
+    grids.npy     float32 (snapshots, shells, bands, sectors)
+    index.json    bin edges, binning settings and one entry per snapshot
+    summary.json  per-date totals by shell and by band, for the dashboard
+
+Snapshots already in the index with the same content hash are not
+reprocessed; changing the binning settings recomputes everything.
+"""
+
+from __future__ import annotations
+import argparse, json, re
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from sgp4.api import SatrecArray
+
+import metrics
+import propagation
+from satrecord import SatelliteTable
+
+DATA_DIR = propagation.DATA_DIR
+OUT_DIR = DATA_DIR / "density"
+GRIDS_FILE = OUT_DIR / "grids.npy"
+INDEX_FILE = OUT_DIR / "index.json"
+SUMMARY_FILE = OUT_DIR / "summary.json"
+SNAPSHOT_RE = re.compile(r"active-(\d{8})\.csv$")
+
+MU = 398600.4418            # km^3/s^2
+EARTH_RADIUS = propagation.WGS84_A
+# 50 km shells through LEO, coarser above; GEO gets its own ±200 km shell
+ALT_EDGES = np.concatenate([np.arange(100, 2000, 50),
+                            [2000, 5000, 10000, 15000, 20000, 25000, 30000, 35586, 35986, 40000, 400000]])
+DEFAULT_INC_STEP = 5.0      # degrees
+DEFAULT_SAMPLES = 24
+BATCH_SNAPSHOTS = 30
+
+COLUMNS = ("NORAD_CAT_ID", "EPOCH", "MEAN_MOTION", "ECCENTRICITY", "INCLINATION", "RA_OF_ASC_NODE",
+           "ARG_OF_PERICENTER", "MEAN_ANOMALY", "BSTAR", "MEAN_MOTION_DOT", "MEAN_MOTION_DDOT",
+           "PERIAPSIS", "APOAPSIS", "TLE_LINE1", "TLE_LINE2")
+
+
+def find_snapshots(data_dir: Path = DATA_DIR) -> list[tuple[str, Path]]:
+    """(YYYY-MM-DD, path) for every archive snapshot, oldest first."""
+    out = []
+    for path in data_dir.glob("active-*.csv"):
+        m = SNAPSHOT_RE.search(path.name)
+        if m:
+            d = m.group(1)
+            out.append((f"{d[:4]}-{d[4:6]}-{d[6:]}", path))
+    return sorted(out)
+
+
+def _column(table: SatelliteTable, name: str) -> np.ndarray:
+    if name not in table.columns:
+        return np.full(len(table), np.nan)
+    return np.array([np.nan if v is None else v for v in table.column(name)], dtype=float)
+
+
+def orbit_shape(table: SatelliteTable) -> tuple[np.ndarray, np.ndarray]:
+    """Semi-major axis (km) and eccentricity, preferring PERIAPSIS/APOAPSIS altitudes."""
+    rp = _column(table, "PERIAPSIS") + EARTH_RADIUS
+    ra = _column(table, "APOAPSIS") + EARTH_RADIUS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a_mm = np.cbrt(MU / (_column(table, "MEAN_MOTION") * 2 * np.pi / 86400.0) ** 2)
+    a = np.where(np.isnan(rp) | np.isnan(ra), a_mm, (rp + ra) / 2)
+    e = np.where(np.isnan(rp) | np.isnan(ra), _column(table, "ECCENTRICITY"), (ra - rp) / (ra + rp))
+    return a, np.clip(np.nan_to_num(e), 0.0, 0.999)
+
+
+def shell_fractions(a: np.ndarray, e: np.ndarray, alt_edges: np.ndarray = ALT_EDGES) -> np.ndarray:
+    """(n, shells) fraction of each orbit spent between consecutive altitude edges.
+
+    With r = a(1 - e·cos E) and M = E - e·sin E, the time fraction with
+    r < R is (E_R - e·sin E_R)/π where cos E_R = (1 - R/a)/e.
+    """
+    r = EARTH_RADIUS + alt_edges[None, :]
+    a, e = a[:, None], e[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_e = np.clip((1 - r / a) / e, -1.0, 1.0)
+        ecc_anom = np.arccos(cos_e)
+        below = (ecc_anom - e * np.sin(ecc_anom)) / np.pi
+    below = np.where(e < 1e-9, (r >= a).astype(float), below)
+    below = np.nan_to_num(below)
+    return np.diff(below, axis=1)
+
+
+def position_fractions(table: SatelliteTable, date: str, samples: int,
+                       alt_edges: np.ndarray = ALT_EDGES) -> np.ndarray:
+    """(n, shells) share of ``samples`` SGP4 positions over the day in each shell."""
+    out = np.zeros((len(table), len(alt_edges) - 1))
+    satrecs, rows = [], []
+    for i, rec in enumerate(table):
+        s = propagation.satrec_from_record(rec)
+        if s is not None:
+            satrecs.append(s)
+            rows.append(i)
+    if not satrecs:
+        return out
+    start = datetime.fromisoformat(date).replace(tzinfo=timezone.utc)
+    step = 86400.0 / samples
+    _, jd, fr = propagation.time_grid(start, 86400.0 - step, step)
+    err, r, _ = propagation.propagate(SatrecArray(satrecs), jd, fr)
+    _, _, alt = propagation.ecef_to_geodetic(propagation.teme_to_ecef(r, jd, fr))
+    shell = np.searchsorted(alt_edges, alt, side="right") - 1
+    valid = (err == 0) & (shell >= 0) & (shell < len(alt_edges) - 1)
+    rows = np.array(rows)
+    k, t = np.nonzero(valid)
+    np.add.at(out, (rows[k], shell[k, t]), 1.0 / samples)
+    return out
+
+
+def band_index(values: np.ndarray, step: float, count: int) -> np.ndarray:
+    return np.clip(np.nan_to_num(values // step).astype(int), 0, count - 1)
+
+
+@metrics.timed("density_grids")
+def compute_grids(snapshots: list[tuple[str, Path]], inc_step: float, raan_sectors: int,
+                  mode: str, samples: int) -> tuple[np.ndarray, list[int]]:
+    """Grids for ``snapshots`` in one vectorized accumulation per batch."""
+    n_shells, n_bands = len(ALT_EDGES) - 1, int(np.ceil(180 / inc_step))
+    grids = np.zeros((len(snapshots), n_shells, n_bands, raan_sectors), dtype=np.float64)
+    counts = []
+    for lo in range(0, len(snapshots), BATCH_SNAPSHOTS):
+        fracs, snap, inc, raan = [], [], [], []
+        for k, (date, path) in enumerate(snapshots[lo:lo + BATCH_SNAPSHOTS], start=lo):
+            table = SatelliteTable.from_csv(path, usecols=COLUMNS)
+            counts.append(len(table))
+            if mode == "positions":
+                fracs.append(position_fractions(table, date, samples))
+            else:
+                fracs.append(shell_fractions(*orbit_shape(table)))
+            snap.append(np.full(len(table), k))
+            inc.append(band_index(_column(table, "INCLINATION"), inc_step, n_bands))
+            raan.append(band_index(_column(table, "RA_OF_ASC_NODE"), 360.0 / raan_sectors, raan_sectors))
+        if fracs:
+            np.add.at(grids, (np.concatenate(snap), slice(None), np.concatenate(inc), np.concatenate(raan)),
+                      np.concatenate(fracs))
+    return grids.astype(np.float32), counts
+
+
+def shell_volumes(alt_edges: np.ndarray = ALT_EDGES) -> np.ndarray:
+    r = EARTH_RADIUS + alt_edges
+    return 4.0 / 3.0 * np.pi * np.diff(r ** 3)
+
+
+def load_index() -> dict:
+    if INDEX_FILE.exists():
+        return json.loads(INDEX_FILE.read_text())
+    return {}
+
+
+def load_grids() -> tuple[dict, np.ndarray]:
+    return load_index(), np.load(GRIDS_FILE, mmap_mode="r")
+
+
+def write_summary(index: dict, grids: np.ndarray):
+    summary = {
+        "dates": [s["date"] for s in index["snapshots"]],
+        "alt_edges_km": index["alt_edges_km"],
+        "inc_edges_deg": index["inc_edges_deg"],
+        "shell_volume_km3": shell_volumes(np.array(index["alt_edges_km"])).round(0).tolist(),
+        "by_shell": grids.sum(axis=(2, 3)).round(1).tolist(),
+        "by_inclination": grids.sum(axis=(1, 3)).round(1).tolist(),
+    }
+    SUMMARY_FILE.write_text(json.dumps(summary, separators=(",", ":")))
+
+
+def update(data_dir: Path = DATA_DIR, inc_step: float = DEFAULT_INC_STEP, raan_sectors: int = 1,
+           mode: str = "elements", samples: int = DEFAULT_SAMPLES, force: bool = False) -> dict:
+    """Bring grids.npy up to date with the snapshots in ``data_dir``; returns counts."""
+    settings = {"alt_edges_km": ALT_EDGES.tolist(), "inc_edges_deg": np.arange(0, 180 + inc_step / 2, inc_step).tolist(),
+                "raan_sectors": raan_sectors, "mode": mode, "samples": samples if mode == "positions" else None}
+    old = load_index()
+    reuse = not force and GRIDS_FILE.exists() and all(old.get(k) == v for k, v in settings.items())
+    old_grids = np.load(GRIDS_FILE) if reuse else None
+    known = {s["date"]: (i, s) for i, s in enumerate(old.get("snapshots", []))} if reuse else {}
+
+    snapshots = find_snapshots(data_dir)
+    versions = [propagation.file_version(p) for _, p in snapshots]
+    todo = [k for k, ((date, _), v) in enumerate(zip(snapshots, versions))
+            if date not in known or known[date][1]["version"] != v]
+    new_grids, counts = compute_grids([snapshots[k] for k in todo], inc_step, raan_sectors, mode, samples)
+
+    n_shells, n_bands = len(ALT_EDGES) - 1, len(settings["inc_edges_deg"]) - 1
+    grids = np.zeros((len(snapshots), n_shells, n_bands, raan_sectors), dtype=np.float32)
+    entries = []
+    fresh = dict(zip(todo, range(len(todo))))
+    for k, ((date, path), version) in enumerate(zip(snapshots, versions)):
+        if k in fresh:
+            grids[k] = new_grids[fresh[k]]
+            objects = counts[fresh[k]]
+        else:
+            i, entry = known[date]
+            grids[k] = old_grids[i]
+            objects = entry["objects"]
+        entries.append({"date": date, "file": path.name, "version": version, "objects": objects})
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    np.save(GRIDS_FILE, grids)
+    index = {**settings, "snapshots": entries}
+    INDEX_FILE.write_text(json.dumps(index, indent=1))
+    write_summary(index, grids)
+    return {"snapshots": len(snapshots), "computed": len(todo)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bin archive snapshots by altitude shell and inclination band")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="Directory holding active-YYYYMMDD.csv")
+    parser.add_argument("--inc-step", type=float, default=DEFAULT_INC_STEP, help="Inclination band width (deg)")
+    parser.add_argument("--raan-sectors", type=int, default=1, help="Split bands into this many RAAN sectors")
+    parser.add_argument("--mode", choices=("elements", "positions"), default="elements")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES,
+                        help="Positions per snapshot day in --mode positions")
+    parser.add_argument("--force", action="store_true", help="Recompute every snapshot")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+
+    with metrics.stage("density"):
+        stats = update(args.data_dir, args.inc_step, args.raan_sectors, args.mode, args.samples, args.force)
+    if not stats["snapshots"]:
+        print(f"⚠ No active-YYYYMMDD.csv snapshots in {args.data_dir}")
+        return
+    print(f"✓ Density grids for {stats['snapshots']} snapshots in {OUT_DIR}")
+    print(f"  - Recomputed: {stats['computed']}")
+    print(f"  - Unchanged, reused: {stats['snapshots'] - stats['computed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""Match Celestrak and N2YO records to GCAT objects when IDs alone don't line up.
+
+Each source record is compared with the GCAT catalog on three kinds of
+evidence:
+
+    id           NORAD_CAT_ID equals GCAT JCAT
+    designator   Celestrak OBJECT_ID equals GCAT Piece (e.g. 1964-063C)
+    name         trigram similarity between the record's name and GCAT
+                 Name / PLName / AltNames (parenthesised aliases such as
+                 "COSMOS 1989 (ETALON 1)" are compared separately)
+
+Candidates come from the ID and designator lookups plus a trigram index over
+every GCAT alias. Only the rarest trigrams of a query are used to look up
+candidates, so the cost doesn't grow with common stems like STARLINK. The
+name search only runs for records whose ID and designator both miss: once
+either hits, a name-only candidate elsewhere is capped below it. Each
+candidate's confidence is a noisy-OR of its supporting evidence, halved once
+for every piece of evidence that points at a different GCAT object. A record
+is resolved when its best candidate reaches MIN_CONFIDENCE and leads the
+runner-up by MARGIN; everything else goes into the conflict report.
+Two source records resolved to the same GCAT object are reported as well.
+
+    python scripts/entity_resolution.py --gcat data/satcat_master.csv
+    python scripts/entity_resolution.py --n2yo data/satellites_with_tle_n2yo.csv
+
+Writes data/entity_matches.csv and data/entity_conflicts.csv.
+"""
+
+from __future__ import annotations
+import argparse, csv, re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+import metrics
+from satrecord import SatelliteTable
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+MATCHES_CSV = DATA_DIR / "entity_matches.csv"
+CONFLICTS_CSV = DATA_DIR / "entity_conflicts.csv"
+
+W_ID = 0.9
+W_DESIGNATOR = 0.9
+W_NAME = 0.8
+NAME_MIN = 0.5          # similarity below this is not counted as evidence
+MIN_CONFIDENCE = 0.5
+MARGIN = 0.1
+NAME_CANDIDATES = 5
+RARE_TRIGRAMS = 6       # trigrams per query used to look up candidates
+SHORTLIST = 25          # aliases per query scored exactly
+
+# Transliterations GCAT and Celestrak spell differently
+SYNONYMS = {"KOSMOS": "COSMOS", "MOLNIJA": "MOLNIYA"}
+DESIGNATOR_RE = re.compile(r"^\d{4}-\d{3}[A-Z]{0,3}$")
+
+MATCH_FIELDS = ["SOURCE", "SOURCE_ID", "SOURCE_NAME", "OBJECT_ID", "JCAT", "GCAT_NAME", "CONFIDENCE", "METHOD"]
+CONFLICT_FIELDS = ["SOURCE", "SOURCE_ID", "SOURCE_NAME", "OBJECT_ID", "REASON", "CANDIDATES"]
+
+
+def normalize_name(name: str | None) -> str:
+    """Upper-case, punctuation to spaces, synonyms applied: 'Kosmos-2400' -> 'COSMOS 2400'."""
+    if not name or name == "-":
+        return ""
+    words = re.sub(r"[^0-9A-Z]+", " ", name.upper()).split()
+    return " ".join(SYNONYMS.get(w, w) for w in words)
+
+
+def name_aliases(name: str | None) -> list[str]:
+    """The full name plus each parenthesised part and what remains outside them."""
+    if not name or name == "-":
+        return []
+    parts = [name] + re.findall(r"\(([^)]*)\)", name) + [re.sub(r"\([^)]*\)", " ", name)]
+    out = []
+    for p in parts:
+        n = normalize_name(p)
+        if n and n not in out:
+            out.append(n)
+    return out
+
+
+def normalize_designator(value: str | None) -> str | None:
+    if not value or value == "-":
+        return None
+    return value.strip().upper().replace(" ", "")
+
+
+def trigrams(name: str) -> frozenset[str]:
+    padded = f"  {name} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+_DIGITS_RE = re.compile(r"\d+")
+
+
+@lru_cache(maxsize=None)
+def _digits(name: str) -> tuple[str, ...]:
+    return tuple(_DIGITS_RE.findall(name))
+
+
+def similarity(a: str, grams_a: frozenset, b: str, grams_b: frozenset) -> float:
+    """Dice coefficient of trigram sets, discounted when the numbers in the names differ.
+
+    "TDRS 7" must not match "TDRS 5" (halved) or a bare programme name
+    "TDRS" (× 0.7) as well as it matches itself.
+    """
+    if a == b:
+        return 1.0
+    score = 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+    da, db = _digits(a), _digits(b)
+    if da != db:
+        score *= 0.5 if da and db else 0.7
+    return score
+
+
+class NameIndex:
+    """Trigram postings over normalized aliases; each alias points back to an entity key."""
+
+    def __init__(self):
+        self.aliases: list[str] = []
+        self.grams: list[frozenset] = []
+        self.keys: list[int] = []
+        self.by_key: dict[int, list[int]] = defaultdict(list)
+        self.postings: dict[str, list[int]] = defaultdict(list)
+        self._arrays: dict[str, np.ndarray] | None = None
+        self._arrays_size = 0
+
+    def add(self, key: int, names: Iterable[str]):
+        for alias in names:
+            idx = len(self.aliases)
+            g = trigrams(alias)
+            self.aliases.append(alias)
+            self.grams.append(g)
+            self.keys.append(key)
+            self.by_key[key].append(idx)
+            for t in g:
+                self.postings[t].append(idx)
+
+    def _frozen(self) -> dict[str, np.ndarray]:
+        if self._arrays is None or self._arrays_size != len(self.aliases):
+            self._arrays = {t: np.array(p, dtype=np.int32) for t, p in self.postings.items()}
+            self._arrays_size = len(self.aliases)
+        return self._arrays
+
+    def search(self, names: list[str], limit: int = NAME_CANDIDATES) -> list[tuple[int, float]]:
+        """Best (key, similarity) pairs for any of ``names``, highest first.
+
+        Aliases sharing the most of the query's rarest trigrams are shortlisted
+        with one ``np.unique`` over their postings; only the shortlist is scored.
+        """
+        postings = self._frozen()
+        best: dict[int, float] = {}
+        for name in names:
+            g = trigrams(name)
+            rare = sorted((postings[t] for t in g if t in postings), key=len)[:RARE_TRIGRAMS]
+            if not rare:
+                continue
+            ids, counts = np.unique(np.concatenate(rare), return_counts=True)
+            if len(ids) > SHORTLIST:
+                ids = ids[np.argpartition(-counts, SHORTLIST)[:SHORTLIST]]
+            for idx in ids.tolist():
+                s = similarity(name, g, self.aliases[idx], self.grams[idx])
+                key = self.keys[idx]
+                if s > best.get(key, 0.0):
+                    best[key] = s
+        return sorted(best.items(), key=lambda kv: -kv[1])[:limit]
+
+    def similarity_to(self, key: int, names: list[str]) -> float:
+        """Best similarity between any of ``names`` and the aliases of one entity."""
+        return max((similarity(n, trigrams(n), self.aliases[i], self.grams[i])
+                    for n in names for i in self.by_key.get(key, ())), default=0.0)
+
+
+@dataclass
+class Match:
+    source: str
+    source_id: int | None
+    source_name: str
+    object_id: str | None
+    jcat: int | None = None
+    confidence: float = 0.0
+    method: str = ""
+    reason: str | None = None        # set when unresolved
+    candidates: list[tuple[int, float]] = field(default_factory=list)
+
+
+def _gcat_field(rec, columns: list[str], name: str) -> str | None:
+    """``rec[name]``, or its part of a merged column.
+
+    The scraper splits the GCAT header on runs of two spaces, so headers GCAT
+    separates with one space come out merged: "SatcatLaunch_Tag Piece" holds
+    "00900 1964-063   1964-063C" and "OpOrbitOQU AltNames" holds
+    "LEO/I  -   Strela-3". The wanted field is the last part of the value.
+    """
+    if name in columns:
+        return rec.get(name)
+    merged = next((c for c in columns if c.endswith(" " + name)), None)
+    if merged is None:
+        return None
+    value = rec.get(merged)
+    value = value.strip() if isinstance(value, str) else ""
+    if name == "Piece":
+        last = value.split()[-1] if value else ""
+        return last if DESIGNATOR_RE.match(last) else None
+    parts = re.split(r"\s{2,}", value)
+    return "  ".join(parts[2:]) or None
+
+
+class GcatIndex:
+    """GCAT objects keyed by JCAT, with designator and name lookups."""
+
+    def __init__(self):
+        self.names: dict[int, str] = {}
+        self.pieces: dict[int, str | None] = {}
+        self.by_piece: dict[str, int] = {}
+        self.name_index = NameIndex()
+
+    def add(self, jcat: int, piece: str | None, names: Iterable[str | None]):
+        piece = normalize_designator(piece)
+        names = [n for n in names if isinstance(n, str) and n and n != "-"]
+        self.names[jcat] = names[0] if names else ""
+        self.pieces[jcat] = piece
+        if piece:
+            self.by_piece.setdefault(piece, jcat)
+        aliases = []
+        for n in names:
+            aliases.extend(a for a in name_aliases(n) if a not in aliases)
+        self.name_index.add(jcat, aliases)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_records(cls, records: Iterable, columns: list[str]) -> "GcatIndex":
+        """Build from mapping-like rows with GCAT columns (csv rows, SatelliteRecords, DataFrame dicts)."""
+        index = cls()
+        for rec in records:
+            jcat = rec.get("JCAT")
+            if isinstance(jcat, str):
+                jcat = int(float(jcat.strip().lstrip("S"))) if jcat.strip().lstrip("S") else None
+            if jcat is None:
+                continue
+            alt = _gcat_field(rec, columns, "AltNames")
+            alt = alt if isinstance(alt, str) else ""
+            index.add(int(jcat), _gcat_field(rec, columns, "Piece"),
+                      [rec.get("Name"), rec.get("PLName")] + [a.strip() for a in re.split(r"[;,]", alt)])
+        return index
+
+    def resolve(self, source: str, norad: int | None, designator: str | None, name: str | None) -> Match:
+        designator = normalize_designator(designator)
+        match = Match(source, norad, name or "", designator)
+        aliases = name_aliases(name)
+        by_id = norad if norad in self.names else None
+        by_des = self.by_piece.get(designator) if designator else None
+        name_hits = dict(self.name_index.search(aliases)) if aliases and by_id is None and by_des is None else {}
+
+        scored = []
+        for jcat in {by_id, by_des, *name_hits} - {None}:
+            miss, used, contra = 1.0, [], 0
+            if by_id is not None:
+                if jcat == by_id:
+                    miss *= 1 - W_ID
+                    used.append("id")
+                else:
+                    contra += 1
+            if designator and self.pieces.get(jcat):
+                if self.pieces[jcat] == designator:
+                    miss *= 1 - W_DESIGNATOR
+                    used.append("designator")
+                else:
+                    contra += 1  # designators are unique, so a different one is a different object
+            sim = name_hits.get(jcat)
+            if sim is None:
+                sim = self.name_index.similarity_to(jcat, aliases)
+            if sim >= NAME_MIN:
+                miss *= 1 - W_NAME * sim
+                used.append("name")
+            if used:
+                scored.append((jcat, round((1 - miss) * 0.5 ** contra, 4), "+".join(used)))
+        scored.sort(key=lambda s: -s[1])
+        match.candidates = [(j, c) for j, c, _ in scored[:3]]
+
+        if not scored:
+            match.reason = "no candidate"
+            return match
+        jcat, conf, method = scored[0]
+        match.jcat, match.confidence, match.method = jcat, conf, method
+        if conf < MIN_CONFIDENCE:
+            match.reason = "low confidence"
+        elif len(scored) > 1 and conf - scored[1][1] < MARGIN:
+            match.reason = "ambiguous"
+        elif by_id is not None and by_des is not None and by_id != by_des:
+            # Resolved, but the IDs disagree; kept in the report for review
+            match.reason = f"id {by_id} and designator {by_des} disagree"
+        return match
+
+
+def resolve_all(index: GcatIndex, source: str, records: Iterable[tuple]) -> list[Match]:
+    """Resolve (norad, designator, name) tuples.
+
+    When several records resolve to one GCAT object, the most confident keeps
+    it if it leads the next by MARGIN; the others become conflicts.
+    """
+    matches = [index.resolve(source, *r) for r in records]
+    claims = defaultdict(list)
+    for m in matches:
+        if is_resolved(m):
+            claims[m.jcat].append(m)
+    for jcat, group in claims.items():
+        if len(group) < 2:
+            continue
+        group.sort(key=lambda m: -m.confidence)
+        keep = group[0] if group[0].confidence - group[1].confidence >= MARGIN else None
+        for m in group:
+            if m is not keep:
+                m.reason = (f"duplicate: JCAT {jcat} also claimed by {source} {keep.source_id}" if keep
+                            else f"duplicate: {len(group)} {source} records resolve to JCAT {jcat}")
+    return matches
+
+
+def is_resolved(m: Match) -> bool:
+    return m.jcat is not None and (m.reason is None or m.reason.startswith("id "))
+
+
+def load_gcat(path: Path) -> GcatIndex:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        wanted = [h for h in header if h in ("JCAT", "Name", "PLName")
+                  or h.split(" ")[-1] in ("Piece", "AltNames")]
+        table = SatelliteTable.from_rows(header, reader, usecols=wanted)
+    return GcatIndex.from_records(table, header)
+
+
+def celestrak_records(path: Path) -> list[tuple]:
+    table = SatelliteTable.from_csv(path, usecols=("NORAD_CAT_ID", "OBJECT_ID", "OBJECT_NAME"))
+    return [(r.get("NORAD_CAT_ID"), r.get("OBJECT_ID"), r.get("OBJECT_NAME")) for r in table]
+
+
+def n2yo_records(path: Path) -> list[tuple]:
+    """N2YO names with the NORAD ID they were fetched for (no designator)."""
+    table = SatelliteTable.from_csv(path, usecols=("NORAD_CAT_ID", "JCAT", "N2YO_SAT_NAME"))
+    return [(r.get("NORAD_CAT_ID") or r.get("JCAT"), None, r.get("N2YO_SAT_NAME"))
+            for r in table if r.get("N2YO_SAT_NAME")]
+
+
+def write_reports(index: GcatIndex, matches: list[Match], matches_csv: Path = MATCHES_CSV,
+                  conflicts_csv: Path = CONFLICTS_CSV):
+    with open(matches_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(MATCH_FIELDS)
+        for m in matches:
+            if is_resolved(m):
+                writer.writerow([m.source, m.source_id, m.source_name, m.object_id or "", m.jcat,
+                                 index.names.get(m.jcat, ""), m.confidence, m.method])
+    with open(conflicts_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CONFLICT_FIELDS)
+        for m in matches:
+            if m.reason is not None:
+                writer.writerow([m.source, m.source_id, m.source_name, m.object_id or "", m.reason,
+                                 ";".join(f"{j}:{c}" for j, c in m.candidates)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve Celestrak/N2YO records against the GCAT catalog")
+    parser.add_argument("--gcat", type=Path, default=DATA_DIR / "satcat_master.csv",
+                        help="GCAT satcat CSV (scrape_satcat.py output)")
+    parser.add_argument("--celestrak", type=Path, default=DATA_DIR / "active-20251004.csv")
+    parser.add_argument("--n2yo", type=Path, default=None,
+                        help="CSV with N2YO_SAT_NAME (e.g. data/satellites_with_tle_n2yo.csv)")
+    parser.add_argument("--matches", type=Path, default=MATCHES_CSV)
+    parser.add_argument("--conflicts", type=Path, default=CONFLICTS_CSV)
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+
+    with metrics.stage("index"):
+        index = load_gcat(args.gcat)
+    print(f"✓ Indexed {len(index)} GCAT objects ({len(index.name_index.aliases)} names)")
+
+    matches = []
+    sources = [("celestrak", args.celestrak, celestrak_records)]
+    if args.n2yo:
+        sources.append(("n2yo", args.n2yo, n2yo_records))
+    for source, path, reader in sources:
+        if not path.exists():
+            print(f"⚠ {path} not found; skipping {source}")
+            continue
+        with metrics.stage(f"resolve_{source}"):
+            found = resolve_all(index, source, reader(path))
+        matches.extend(found)
+        resolved = [m for m in found if is_resolved(m)]
+        methods = Counter(m.method for m in resolved)
+        metrics.counter("entity_records_total", len(found), source=source)
+        metrics.counter("entity_conflicts_total", sum(m.reason is not None for m in found), source=source)
+        summary = ", ".join(f"{k or 'none'} {v}" for k, v in methods.most_common())
+        print(f"✓ {source}: {len(resolved)}/{len(found)} resolved ({summary})")
+        reasons = Counter(m.reason.split(":")[0] if not m.reason.startswith("id ") else "id/designator disagree"
+                          for m in found if m.reason is not None)
+        for reason, n in reasons.most_common():
+            print(f"  ⚠ {reason}: {n}")
+
+    write_reports(index, matches, args.matches, args.conflicts)
+    print(f"✓ Matches: {args.matches}\n✓ Conflicts: {args.conflicts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Helpers shared by the TLE fetch scripts (fetch_tle_n2yo.py, fetch_tle_batch.py, test.py):
+.env loading, merging fetched TLE fields into satellite rows, CSV output and
+the PostgreSQL schema printed alongside it.
+"""
+
+import csv
+import os
+from pathlib import Path
+
+import metrics
+from satrecord import SatelliteTable
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+def load_env():
+    """Load environment variables from .env (repo root first, then scripts/)"""
+    env_path = SCRIPTS_DIR.parent / '.env'
+    if not env_path.exists():
+        env_path = SCRIPTS_DIR / '.env'
+
+    if env_path.exists():
+        with open(env_path) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    os.environ[key.strip()] = value.strip()
+    else:
+        metrics.log("env_missing", f"⚠ .env file not found at {env_path}", path=str(env_path))
+
+def merge_data(active_sat, tle_data, columns, fetched_column=None):
+    """
+    Merge one satellite row (dict) with the TLE data fetched for it.
+
+    columns is a list of (output column, field in tle_data) pairs; every
+    column is added, empty when the fetch failed. fetched_column, if given,
+    is set to YES/NO.
+
+    Returns:
+        dict with combined data
+    """
+    merged = active_sat.copy()
+    for column, field in columns:
+        merged[column] = tle_data.get(field, '') if tle_data else ''
+    if fetched_column:
+        merged[fetched_column] = 'YES' if tle_data else 'NO'
+    return merged
+
+def merge_tle_columns(satellites, tle_results, columns, fetched_column=None):
+    """
+    Attach fetched TLE data to a SatelliteTable as new columns.
+
+    tle_results holds one fetch result (or None) per row, in table order.
+    Same fields as merge_data, without copying any row.
+    """
+    for column, field in columns:
+        satellites.add_column(column, [t.get(field, '') if t else '' for t in tle_results])
+    if fetched_column:
+        satellites.add_column(fetched_column, ['YES' if t else 'NO' for t in tle_results])
+    return satellites
+
+@metrics.timed("save_merged_csv")
+def save_merged_csv(data, output_path):
+    """
+    Save merged data (a SatelliteTable or a list of dicts) to CSV.
+    """
+    if not data:
+        metrics.log("nothing_to_save", "⚠ No data to save")
+        return
+
+    if isinstance(data, SatelliteTable):
+        data.to_csv(output_path)
+    else:
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=data[0].keys())
+            writer.writeheader()
+            writer.writerows(data)
+
+    metrics.log("merged_saved", f"✓ Saved merged data to {output_path}", rows=len(data), path=str(output_path))
+
+def generate_postgres_schema(sample_data, table_name='satellites'):
+    """
+    Generate PostgreSQL CREATE TABLE statement based on sample data.
+    """
+    schema = f"CREATE TABLE IF NOT EXISTS {table_name} (\n"
+    schema += "    id SERIAL PRIMARY KEY,\n"
+
+    for key in sample_data.keys():
+        # Determine column type based on field name
+        col_name = key.lower()
+
+        if 'norad' in col_name or 'id' in col_name or 'cat' in col_name:
+            col_type = "VARCHAR(50)"
+        elif 'epoch' in col_name or 'date' in col_name:
+            col_type = "TIMESTAMP"
+        elif 'name' in col_name or 'type' in col_name or 'class' in col_name:
+            col_type = "VARCHAR(255)"
+        elif 'line' in col_name:
+            col_type = "TEXT"
+        elif any(x in col_name for x in ['motion', 'eccentric', 'inclin', 'anomaly', 'node', 'pericenter', 'bstar']):
+            col_type = "DOUBLE PRECISION"
+        else:
+            col_type = "VARCHAR(255)"
+
+        schema += f"    {col_name} {col_type},\n"
+
+    schema += "    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP\n"
+    schema += ");\n"
+
+    # Add index on NORAD_CAT_ID for faster lookups
+    schema += f"\nCREATE INDEX IF NOT EXISTS idx_{table_name}_norad ON {table_name}(norad_cat_id);\n"
+
+    return schema
@@ -4,50 +4,28 @@ and combine with their orbital data into a merged CSV for PostgreSQL import.
 """
 
 import csv
-import time
-import requests
 import os
+import argparse
 from pathlib import Path
-from datetime import datetime
 
-class SpaceTrackError(Exception):
-    pass
-
-def load_env():
-    """Load environment variables from .env file"""
-    env_path = Path(__file__).parent / '.env'
-    if env_path.exists():
-        with open(env_path) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+import http_client
+import metrics
+from fetch_common import load_env, save_merged_csv, generate_postgres_schema
+import fetch_common
+from satrecord import SatelliteTable
 
 def create_spacetrack_session(username, password):
     """
     Create an authenticated Space-Track session.
     
+    A login cookie saved by an earlier run is reused while it is still valid.
+    
     Returns:
-        requests.Session object with authentication cookie
+        http_client.SpaceTrackSession (its .get() re-authenticates on 401)
     """
-    base = "https://www.space-track.org"
-    login_url = base + "/ajaxauth/login"
-    
-    session = requests.Session()
-    
-    login_data = {
-        'identity': username,
-        'password': password
-    }
-    
-    resp = session.post(login_url, data=login_data, timeout=10)
-    if not resp.ok:
-        raise SpaceTrackError(f"Login failed - HTTP {resp.status_code}: {resp.text}")
-    
-    print("✓ Authenticated with Space-Track")
-    return session
+    return http_client.SpaceTrackSession(username, password)
 
+@metrics.timed("fetch_tle_spacetrack")
 def fetch_tle_for_norad(session, norad_id):
     """
     Fetch the latest TLE data for a single NORAD ID.
@@ -59,15 +37,19 @@ def fetch_tle_for_norad(session, norad_id):
     query_url = base + f"/basicspacedata/query/class/tle_latest/NORAD_CAT_ID/{norad_id}/orderby/EPOCH%20desc/limit/1/format/csv"
     
     try:
-        resp = session.get(query_url, timeout=10)
+        resp = session.get(query_url)
         if not resp.ok:
-            print(f"  ⚠ Failed to fetch TLE for {norad_id}: HTTP {resp.status_code}")
+            metrics.counter("tle_fetch_total", source="spacetrack", outcome="http_error")
+            metrics.log("tle_fetch_failed", f"  ⚠ Failed to fetch TLE for {norad_id}: HTTP {resp.status_code}",
+                        source="spacetrack", norad_id=norad_id, status=resp.status_code)
             return None
         
         # Parse CSV response
         lines = resp.text.strip().split('\n')
         if len(lines) < 2:
-            print(f"  ⚠ No TLE data found for {norad_id}")
+            metrics.counter("tle_fetch_total", source="spacetrack", outcome="missing")
+            metrics.log("tle_missing", f"  ⚠ No TLE data found for {norad_id}",
+                        source="spacetrack", norad_id=norad_id)
             return None
         
         # Parse header and data
@@ -75,32 +57,87 @@ def fetch_tle_for_norad(session, norad_id):
         tle_data = next(reader, None)
         
         if tle_data:
-            print(f"  ✓ Fetched TLE for {norad_id}: {tle_data.get('OBJECT_NAME', 'Unknown')}")
+            metrics.counter("tle_fetch_total", source="spacetrack", outcome="ok")
+            metrics.log("tle_fetched", f"  ✓ Fetched TLE for {norad_id}: {tle_data.get('OBJECT_NAME', 'Unknown')}",
+                        source="spacetrack", norad_id=norad_id, name=tle_data.get('OBJECT_NAME'))
         
         return tle_data
     
     except Exception as e:
-        print(f"  ⚠ Error fetching TLE for {norad_id}: {e}")
+        metrics.counter("tle_fetch_total", source="spacetrack", outcome="error")
+        metrics.log("tle_fetch_failed", f"  ⚠ Error fetching TLE for {norad_id}: {e}",
+                    source="spacetrack", norad_id=norad_id, error=str(e))
         return None
 
+@metrics.timed("fetch_tles_spacetrack")
+def fetch_tles_for_norads(session, norad_ids):
+    """
+    Fetch the latest TLE data for several NORAD IDs in one query.
+    
+    Space-Track takes a comma-separated NORAD_CAT_ID list; ORDINAL/1 keeps
+    only the newest element set of each object. Keep the list to a few
+    hundred IDs so the URL stays short.
+    
+    Returns:
+        dict of NORAD ID (int) -> TLE data; IDs with no TLE are left out
+    """
+    base = "https://www.space-track.org"
+    ids = ",".join(str(n) for n in norad_ids)
+    query_url = base + f"/basicspacedata/query/class/tle_latest/ORDINAL/1/NORAD_CAT_ID/{ids}/format/csv"
+    
+    try:
+        resp = session.get(query_url)
+        if not resp.ok:
+            metrics.counter("tle_fetch_total", len(norad_ids), source="spacetrack", outcome="http_error")
+            metrics.log("tle_fetch_failed", f"  ⚠ Failed to fetch TLEs for {len(norad_ids)} IDs: HTTP {resp.status_code}",
+                        source="spacetrack", count=len(norad_ids), status=resp.status_code)
+            return {}
+        
+        found = {}
+        for row in csv.DictReader(resp.text.strip().splitlines()):
+            try:
+                found[int(row['NORAD_CAT_ID'])] = row
+            except (KeyError, ValueError):
+                continue
+        metrics.counter("tle_fetch_total", len(found), source="spacetrack", outcome="ok")
+        metrics.counter("tle_fetch_total", len(norad_ids) - len(found), source="spacetrack", outcome="missing")
+        metrics.log("tle_fetched", f"  ✓ Fetched {len(found)}/{len(norad_ids)} TLEs from Space-Track",
+                    source="spacetrack", count=len(found), requested=len(norad_ids))
+        return found
+    
+    except Exception as e:
+        metrics.counter("tle_fetch_total", len(norad_ids), source="spacetrack", outcome="error")
+        metrics.log("tle_fetch_failed", f"  ⚠ Error fetching TLEs for {len(norad_ids)} IDs: {e}",
+                    source="spacetrack", count=len(norad_ids), error=str(e))
+        return {}
+
+@metrics.timed("read_active_satellites")
 def read_active_satellites(csv_path, limit=50):
     """
     Read first N satellites from active CSV.
     
     Returns:
-        list of dicts with satellite data
+        SatelliteTable with one typed row per satellite
     """
-    satellites = []
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for i, row in enumerate(reader):
-            if i >= limit:
-                break
-            satellites.append(row)
+    satellites = SatelliteTable.from_csv(csv_path, limit=limit)
     
-    print(f"✓ Loaded {len(satellites)} satellites from {csv_path}")
+    metrics.log("satellites_loaded", f"✓ Loaded {len(satellites)} satellites from {csv_path}",
+                count=len(satellites), path=str(csv_path))
     return satellites
 
+# Space-Track field copied into each TLE_* column by merge_data
+TLE_COLUMNS = [
+    ('TLE_LINE1', 'TLE_LINE1'),
+    ('TLE_LINE2', 'TLE_LINE2'),
+    ('TLE_EPOCH', 'EPOCH'),
+    ('TLE_MEAN_MOTION', 'MEAN_MOTION'),
+    ('TLE_ECCENTRICITY', 'ECCENTRICITY'),
+    ('TLE_INCLINATION', 'INCLINATION'),
+    ('TLE_RA_OF_ASC_NODE', 'RA_OF_ASC_NODE'),
+    ('TLE_ARG_OF_PERICENTER', 'ARG_OF_PERICENTER'),
+    ('TLE_MEAN_ANOMALY', 'MEAN_ANOMALY'),
+]
+
 def merge_data(active_sat, tle_data):
     """
     Merge active satellite data with TLE data.
@@ -108,83 +145,23 @@ def merge_data(active_sat, tle_data):
     Returns:
         dict with combined data
     """
-    merged = active_sat.copy()
-    
-    if tle_data:
-        # Add TLE-specific fields with prefix to avoid collision
-        merged['TLE_LINE1'] = tle_data.get('TLE_LINE1', '')
-        merged['TLE_LINE2'] = tle_data.get('TLE_LINE2', '')
-        merged['TLE_EPOCH'] = tle_data.get('EPOCH', '')
-        merged['TLE_MEAN_MOTION'] = tle_data.get('MEAN_MOTION', '')
-        merged['TLE_ECCENTRICITY'] = tle_data.get('ECCENTRICITY', '')
-        merged['TLE_INCLINATION'] = tle_data.get('INCLINATION', '')
-        merged['TLE_RA_OF_ASC_NODE'] = tle_data.get('RA_OF_ASC_NODE', '')
-        merged['TLE_ARG_OF_PERICENTER'] = tle_data.get('ARG_OF_PERICENTER', '')
-        merged['TLE_MEAN_ANOMALY'] = tle_data.get('MEAN_ANOMALY', '')
-    else:
-        # Add empty TLE fields if fetch failed
-        merged['TLE_LINE1'] = ''
-        merged['TLE_LINE2'] = ''
-        merged['TLE_EPOCH'] = ''
-        merged['TLE_MEAN_MOTION'] = ''
-        merged['TLE_ECCENTRICITY'] = ''
-        merged['TLE_INCLINATION'] = ''
-        merged['TLE_RA_OF_ASC_NODE'] = ''
-        merged['TLE_ARG_OF_PERICENTER'] = ''
-        merged['TLE_MEAN_ANOMALY'] = ''
-    
-    return merged
+    return fetch_common.merge_data(active_sat, tle_data, TLE_COLUMNS)
 
-def save_merged_csv(data, output_path):
-    """
-    Save merged data to CSV.
+def merge_tle_columns(satellites, tle_results):
     """
-    if not data:
-        print("⚠ No data to save")
-        return
-    
-    with open(output_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
+    Attach Space-Track TLE data to a SatelliteTable as new columns.
     
-    print(f"✓ Saved merged data to {output_path}")
-
-def generate_postgres_schema(sample_data, table_name='satellites'):
-    """
-    Generate PostgreSQL CREATE TABLE statement based on sample data.
+    tle_results holds one fetch_tle_for_norad() result (or None) per row,
+    in table order. Same fields as merge_data, without copying any row.
     """
-    schema = f"CREATE TABLE IF NOT EXISTS {table_name} (\n"
-    schema += "    id SERIAL PRIMARY KEY,\n"
-    
-    for key in sample_data.keys():
-        # Determine column type based on field name
-        col_name = key.lower()
-        
-        if 'norad' in col_name or 'id' in col_name or 'cat' in col_name:
-            col_type = "VARCHAR(50)"
-        elif 'epoch' in col_name or 'date' in col_name:
-            col_type = "TIMESTAMP"
-        elif 'name' in col_name or 'type' in col_name or 'class' in col_name:
-            col_type = "VARCHAR(255)"
-        elif 'line' in col_name:
-            col_type = "TEXT"
-        elif any(x in col_name for x in ['motion', 'eccentric', 'inclin', 'anomaly', 'node', 'pericenter', 'bstar']):
-            col_type = "DOUBLE PRECISION"
-        else:
-            col_type = "VARCHAR(255)"
-        
-        schema += f"    {col_name} {col_type},\n"
-    
-    schema += "    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP\n"
-    schema += ");\n"
-    
-    # Add index on NORAD_CAT_ID for faster lookups
-    schema += f"\nCREATE INDEX IF NOT EXISTS idx_{table_name}_norad ON {table_name}(norad_cat_id);\n"
-    
-    return schema
+    return fetch_common.merge_tle_columns(satellites, tle_results, TLE_COLUMNS)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch Space-Track TLEs for the first active satellites")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
 
-def main():
     print("=" * 60)
     print("Satellite TLE Batch Fetcher")
     print("=" * 60)
@@ -210,36 +187,40 @@ def main():
     
     # Step 1: Read active satellites
     print(f"\n[1/5] Reading first {limit} satellites...")
-    satellites = read_active_satellites(input_csv, limit=limit)
+    with metrics.stage("read_active"):
+        satellites = read_active_satellites(input_csv, limit=limit)
     
     # Step 2: Authenticate with Space-Track
     print("\n[2/5] Authenticating with Space-Track...")
-    session = create_spacetrack_session(username, password)
+    with metrics.stage("login"):
+        session = create_spacetrack_session(username, password)
     
     # Step 3: Fetch TLE data for each satellite
     print(f"\n[3/5] Fetching TLE data for {len(satellites)} satellites...")
     print("(This may take a minute - Space-Track rate limits apply)\n")
     
-    merged_data = []
-    for i, sat in enumerate(satellites, 1):
-        norad_id = sat.get('NORAD_CAT_ID')
-        print(f"[{i}/{len(satellites)}] Processing {norad_id}...")
-        
-        tle_data = fetch_tle_for_norad(session, norad_id)
-        merged = merge_data(sat, tle_data)
-        merged_data.append(merged)
-        
-        # Be nice to the API - add delay between requests
-        if i < len(satellites):
-            time.sleep(0.5)  # 500ms delay
+    tle_results = []
+    with metrics.stage("fetch_tle"):
+        for i, sat in enumerate(satellites, 1):
+            norad_id = sat.get('NORAD_CAT_ID')
+            metrics.log("processing", f"[{i}/{len(satellites)}] Processing {norad_id}...",
+                        index=i, total=len(satellites), norad_id=norad_id)
+            
+            tle_results.append(fetch_tle_for_norad(session, norad_id))
+            
+            # Be nice to the API - add delay between requests
+            if i < len(satellites):
+                http_client.throttle(0.5)  # 500ms delay
     
     # Step 4: Save merged CSV
     print(f"\n[4/5] Saving merged data...")
-    save_merged_csv(merged_data, output_csv)
+    with metrics.stage("save_csv"):
+        merged_data = merge_tle_columns(satellites, tle_results)
+        save_merged_csv(merged_data, output_csv)
     
     # Step 5: Generate PostgreSQL schema
     print(f"\n[5/5] Generating PostgreSQL schema...")
-    if merged_data:
+    if len(merged_data):
         schema = generate_postgres_schema(merged_data[0])
         with open(schema_file, 'w', encoding='utf-8') as f:
             f.write(schema)
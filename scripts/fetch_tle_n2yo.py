@@ -4,11 +4,14 @@ using the N2YO API and combine with their orbital data into a merged CSV.
 """
 
 import csv
-import time
-import requests
 import os
+import argparse
 from pathlib import Path
-from datetime import datetime
+
+import metrics
+from fetch_common import load_env, save_merged_csv, generate_postgres_schema
+import fetch_common
+from satrecord import SatelliteTable
 
 # Increase CSV field size limit for large fields
 csv.field_size_limit(10000000)  # 10MB limit
@@ -16,23 +19,7 @@ csv.field_size_limit(10000000)  # 10MB limit
 class N2YOError(Exception):
     pass
 
-def load_env():
-    """Load environment variables from .env file"""
-    # Check parent directory first
-    env_path = Path(__file__).parent.parent / '.env'
-    if not env_path.exists():
-        env_path = Path(__file__).parent / '.env'
-    
-    if env_path.exists():
-        with open(env_path) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
-    else:
-        print(f"⚠ .env file not found at {env_path}")
-
+@metrics.timed("fetch_tle_n2yo")
 def fetch_tle_n2yo(norad_id, api_key):
     """
     Fetch TLE data from N2YO API for a single NORAD ID.
@@ -40,14 +27,18 @@ def fetch_tle_n2yo(norad_id, api_key):
     Returns:
         dict with TLE data or None if not found
     """
+    import requests
+    import http_client
     url = f"https://api.n2yo.com/rest/v1/satellite/tle/{norad_id}"
     params = {'apiKey': api_key}
     
     try:
-        resp = requests.get(url, params=params, timeout=10)
+        resp = http_client.get(url, params=params)
         
         if not resp.ok:
-            print(f"  ⚠ Failed to fetch TLE for {norad_id}: HTTP {resp.status_code}")
+            metrics.counter("tle_fetch_total", source="n2yo", outcome="http_error")
+            metrics.log("tle_fetch_failed", f"  ⚠ Failed to fetch TLE for {norad_id}: HTTP {resp.status_code}",
+                        source="n2yo", norad_id=norad_id, status=resp.status_code)
             return None
         
         data = resp.json()
@@ -63,65 +54,73 @@ def fetch_tle_n2yo(norad_id, api_key):
         # }
         
         if 'tle' not in data:
-            print(f"  ⚠ No TLE data in response for {norad_id}")
+            metrics.counter("tle_fetch_total", source="n2yo", outcome="missing")
+            metrics.log("tle_missing", f"  ⚠ No TLE data in response for {norad_id}",
+                        source="n2yo", norad_id=norad_id)
             return None
         
-        tle_string = data['tle']
-        tle_lines = tle_string.strip().split('\n')
+        # N2YO separates the lines with \r\n; take them by line number rather than position
+        tle_lines = [l.strip() for l in (data['tle'] or '').splitlines() if l.strip()]
+        line1 = next((l for l in tle_lines if l.startswith('1 ')), '')
+        line2 = next((l for l in tle_lines if l.startswith('2 ')), '')
         
-        if len(tle_lines) < 2:
-            print(f"  ⚠ Invalid TLE format for {norad_id}")
+        if not line1 or not line2:
+            metrics.counter("tle_fetch_total", source="n2yo", outcome="invalid")
+            metrics.log("tle_invalid", f"  ⚠ Invalid TLE format for {norad_id}", source="n2yo", norad_id=norad_id)
             return None
         
         info = data.get('info', {})
         sat_name = info.get('satname', 'Unknown')
         
-        print(f"  ✓ Fetched TLE for {norad_id}: {sat_name}")
+        metrics.counter("tle_fetch_total", source="n2yo", outcome="ok")
+        metrics.log("tle_fetched", f"  ✓ Fetched TLE for {norad_id}: {sat_name}",
+                    source="n2yo", norad_id=norad_id, name=sat_name)
         
         return {
             'NORAD_CAT_ID': str(norad_id),
             'OBJECT_NAME': sat_name,
-            'TLE_LINE1': tle_lines[0].strip(),
-            'TLE_LINE2': tle_lines[1].strip() if len(tle_lines) > 1 else '',
+            'TLE_LINE1': line1,
+            'TLE_LINE2': line2,
             'SAT_ID': info.get('satid', ''),
             'SAT_NAME': sat_name
         }
     
     except requests.exceptions.RequestException as e:
-        print(f"  ⚠ Network error fetching TLE for {norad_id}: {e}")
+        metrics.counter("tle_fetch_total", source="n2yo", outcome="network_error")
+        metrics.log("tle_fetch_failed", f"  ⚠ Network error fetching TLE for {norad_id}: {e}",
+                    source="n2yo", norad_id=norad_id, error=str(e))
         return None
     except Exception as e:
-        print(f"  ⚠ Error parsing TLE for {norad_id}: {e}")
+        metrics.counter("tle_fetch_total", source="n2yo", outcome="parse_error")
+        metrics.log("tle_fetch_failed", f"  ⚠ Error parsing TLE for {norad_id}: {e}",
+                    source="n2yo", norad_id=norad_id, error=str(e))
         return None
 
+@metrics.timed("read_active_satellites")
 def read_active_satellites(csv_path, limit=500):
     """
     Read first N ACTIVE satellites from master list CSV.
     
+    Headers and values are stripped and typed once by SatelliteTable
+    (the master list pads both); rows that aren't ACTIVE are dropped
+    before they are stored.
+    
     Returns:
-        list of dicts with satellite data
+        SatelliteTable with one row per satellite
     """
-    satellites = []
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Strip whitespace from keys and values, handle None
-            cleaned_row = {}
-            for k, v in row.items():
-                if k is not None:
-                    key = k.strip()
-                    value = v.strip() if v else ''
-                    cleaned_row[key] = value
-            
-            # Only include satellites with STATUS = 'ACTIVE'
-            if cleaned_row.get('STATUS') == 'ACTIVE':
-                satellites.append(cleaned_row)
-                if len(satellites) >= limit:
-                    break
+    satellites = SatelliteTable.from_csv(csv_path, where=lambda get: get('STATUS') == 'ACTIVE', limit=limit)
     
-    print(f"✓ Loaded {len(satellites)} ACTIVE satellites from {csv_path}")
+    metrics.log("satellites_loaded", f"✓ Loaded {len(satellites)} ACTIVE satellites from {csv_path}",
+                count=len(satellites), path=str(csv_path))
     return satellites
 
+# N2YO field copied into each column by merge_data; TLE_FETCHED records success
+TLE_COLUMNS = [
+    ('TLE_LINE1', 'TLE_LINE1'),
+    ('TLE_LINE2', 'TLE_LINE2'),
+    ('N2YO_SAT_NAME', 'SAT_NAME'),
+]
+
 def merge_data(active_sat, tle_data):
     """
     Merge active satellite data with TLE data from N2YO.
@@ -129,73 +128,26 @@ def merge_data(active_sat, tle_data):
     Returns:
         dict with combined data
     """
-    merged = active_sat.copy()
-    
-    if tle_data:
-        # Add TLE lines from N2YO
-        merged['TLE_LINE1'] = tle_data.get('TLE_LINE1', '')
-        merged['TLE_LINE2'] = tle_data.get('TLE_LINE2', '')
-        merged['N2YO_SAT_NAME'] = tle_data.get('SAT_NAME', '')
-        merged['TLE_FETCHED'] = 'YES'
-    else:
-        # Add empty TLE fields if fetch failed
-        merged['TLE_LINE1'] = ''
-        merged['TLE_LINE2'] = ''
-        merged['N2YO_SAT_NAME'] = ''
-        merged['TLE_FETCHED'] = 'NO'
-    
-    return merged
+    return fetch_common.merge_data(active_sat, tle_data, TLE_COLUMNS, fetched_column='TLE_FETCHED')
 
-def save_merged_csv(data, output_path):
-    """
-    Save merged data to CSV.
+def merge_tle_columns(satellites, tle_results):
     """
-    if not data:
-        print("⚠ No data to save")
-        return
-    
-    with open(output_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
+    Attach N2YO TLE data to a SatelliteTable as new columns.
     
-    print(f"✓ Saved merged data to {output_path}")
-
-def generate_postgres_schema(sample_data, table_name='satellites_n2yo'):
-    """
-    Generate PostgreSQL CREATE TABLE statement based on sample data.
+    tle_results holds one fetch_tle_n2yo() result (or None) per row, in
+    table order. Same fields as merge_data, without copying any row.
     """
-    schema = f"CREATE TABLE IF NOT EXISTS {table_name} (\n"
-    schema += "    id SERIAL PRIMARY KEY,\n"
-    
-    for key in sample_data.keys():
-        # Determine column type based on field name
-        col_name = key.lower()
-        
-        if 'norad' in col_name or 'id' in col_name or 'cat' in col_name:
-            col_type = "VARCHAR(50)"
-        elif 'epoch' in col_name or 'date' in col_name:
-            col_type = "TIMESTAMP"
-        elif 'name' in col_name or 'type' in col_name or 'class' in col_name:
-            col_type = "VARCHAR(255)"
-        elif 'line' in col_name:
-            col_type = "TEXT"
-        elif any(x in col_name for x in ['motion', 'eccentric', 'inclin', 'anomaly', 'node', 'pericenter', 'bstar']):
-            col_type = "DOUBLE PRECISION"
-        else:
-            col_type = "VARCHAR(255)"
-        
-        schema += f"    {col_name} {col_type},\n"
-    
-    schema += "    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP\n"
-    schema += ");\n"
-    
-    # Add index on NORAD_CAT_ID for faster lookups
-    schema += f"\nCREATE INDEX IF NOT EXISTS idx_{table_name}_norad ON {table_name}(norad_cat_id);\n"
-    
-    return schema
+    return fetch_common.merge_tle_columns(satellites, tle_results, TLE_COLUMNS, fetched_column='TLE_FETCHED')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch TLEs from N2YO for ACTIVE master-list satellites")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+    # Imported here rather than at the top so --help doesn't pay for requests and numpy
+    import http_client
+    import validation
 
-def main():
     print("=" * 60)
     print("Satellite TLE Batch Fetcher (N2YO API)")
     print("=" * 60)
@@ -205,8 +157,7 @@ def main():
     api_key = os.getenv('NY2_API_KEY')
     
     if not api_key:
-        print("❌ Error: NY2_API_KEY must be set in .env file")
-        return
+        raise RuntimeError("NY2_API_KEY must be set in .env file")
     
     print(f"✓ Loaded N2YO API key: {api_key[:8]}...")
     
@@ -217,55 +168,64 @@ def main():
     limit = 500
     
     if not input_csv.exists():
-        print(f"❌ Error: Input file not found: {input_csv}")
-        return
+        raise RuntimeError(f"Input file not found: {input_csv}")
     
     # Step 1: Read active satellites
     print(f"\n[1/4] Reading first {limit} satellites...")
-    satellites = read_active_satellites(input_csv, limit=limit)
+    with metrics.stage("read_master"):
+        satellites = read_active_satellites(input_csv, limit=limit)
     
     # Step 2: Fetch TLE data for each satellite
     print(f"\n[2/4] Fetching TLE data from N2YO for {len(satellites)} satellites...")
     print("(This may take a minute - N2YO rate limits apply)\n")
     
-    merged_data = []
+    tle_results = []
     success_count = 0
     fail_count = 0
     
-    for i, sat in enumerate(satellites, 1):
-        # Try to get NORAD ID from different possible column names
-        norad_id = sat.get('NORAD_CAT_ID') or sat.get('JCAT') or sat.get('norad_cat_id')
-        
-        if not norad_id:
-            print(f"[{i}/{len(satellites)}] ⚠ No NORAD ID found, skipping...")
-            merged = merge_data(sat, None)
-            merged_data.append(merged)
-            fail_count += 1
-            continue
-        
-        print(f"[{i}/{len(satellites)}] Processing {norad_id}...")
-        
-        tle_data = fetch_tle_n2yo(norad_id, api_key)
-        merged = merge_data(sat, tle_data)
-        merged_data.append(merged)
-        
-        if tle_data:
-            success_count += 1
-        else:
-            fail_count += 1
-        
-        # Be nice to the API - add delay between requests
-        if i < len(satellites):
-            time.sleep(1)  # 1 second delay for N2YO
-    
-    # Step 3: Save merged CSV
-    print(f"\n[3/4] Saving merged data...")
-    save_merged_csv(merged_data, output_csv)
+    with metrics.stage("fetch_tle"):
+        for i, sat in enumerate(satellites, 1):
+            # Try to get NORAD ID from different possible column names
+            norad_id = sat.get('NORAD_CAT_ID') or sat.get('JCAT') or sat.get('norad_cat_id')
+        
+            if not norad_id:
+                metrics.log("no_norad_id", f"[{i}/{len(satellites)}] ⚠ No NORAD ID found, skipping...",
+                            index=i, total=len(satellites))
+                tle_results.append(None)
+                fail_count += 1
+                continue
+        
+            metrics.log("processing", f"[{i}/{len(satellites)}] Processing {norad_id}...",
+                        index=i, total=len(satellites), norad_id=norad_id)
+        
+            tle_data = fetch_tle_n2yo(norad_id, api_key)
+            tle_results.append(tle_data)
+        
+            if tle_data:
+                success_count += 1
+            else:
+                fail_count += 1
+        
+            # Be nice to the API - add delay between requests
+            if i < len(satellites):
+                http_client.throttle(1)  # 1 second delay for N2YO
+    
+    # Step 3: Validate and save merged CSV; failing rows go to data/quarantine/ instead
+    print(f"\n[3/4] Validating and saving merged data...")
+    merged_data = merge_tle_columns(satellites, tle_results)
+    with metrics.stage("validate"):
+        report = validation.validate_table(merged_data)
+    validation.record_metrics(report, output_csv.stem)
+    quarantine_csv = validation.quarantine_path(output_csv)
+    merged_data = validation.quarantine(merged_data, report, quarantine_csv)
+    print(f"✓ Validated TLEs: {validation.summary(report)}")
+    with metrics.stage("save_csv"):
+        save_merged_csv(merged_data, output_csv)
     
     # Step 4: Generate PostgreSQL schema
     print(f"\n[4/4] Generating PostgreSQL schema...")
-    if merged_data:
-        schema = generate_postgres_schema(merged_data[0])
+    if len(merged_data):
+        schema = generate_postgres_schema(merged_data[0], table_name='satellites_n2yo')
         with open(schema_file, 'w', encoding='utf-8') as f:
             f.write(schema)
         print(f"✓ Saved PostgreSQL schema to {schema_file}")
@@ -281,9 +241,11 @@ def main():
     print(f"  - Total processed: {len(satellites)}")
     print(f"  - Successful: {success_count}")
     print(f"  - Failed: {fail_count}")
+    print(f"  - Quarantined: {int((~report.valid).sum())}")
     print(f"\nOutput files:")
     print(f"  - CSV data: {output_csv}")
     print(f"  - SQL schema: {schema_file}")
+    print(f"  - Quarantined rows: {quarantine_csv}")
     print(f"\nNext steps:")
     print(f"  1. Create PostgreSQL database")
     print(f"  2. Run: psql -d your_db -f {schema_file}")
@@ -0,0 +1,360 @@
+"""GEO belt longitude index and station-keeping monitor over the archive snapshots.
+
+Objects are taken as geosynchronous from their mean elements: mean motion
+within GEO_MEAN_MOTION of one rev per sidereal day, eccentricity below
+GEO_MAX_ECC and inclination below GEO_MAX_INC (the daily Celestrak
+snapshots carry no OpOrbit column). Each object in a snapshot is
+propagated with SGP4 over the two sidereal days from the snapshot date:
+
+    longitude   mean sub-satellite longitude over the first sidereal day (deg, -180..180)
+    drift       change of that mean from the first day to the second (deg/day, + = eastward)
+
+Averaging over a sidereal day removes the daily figure-eight that
+eccentricity and inclination add to the longitude.
+
+Station keeping: an object whose drift is within ``--kept-drift`` gets a
+nominal longitude and a box of ±``--box``. Every later snapshot places it
+
+    station_kept   inside its box
+    out_of_box     outside its box
+    drifting       never held a longitude (graveyard, transfer, dead)
+
+and records an event when it leaves the box (``left_box``), comes back
+(``returned``), or holds still within a box-width of a new longitude for
+``--settle`` snapshots, which becomes its new nominal (``relocated``).
+
+The state, one column per field, lives in data/geo/state.json together with
+the snapshots already applied; events are appended to data/geo/events.json.
+A run only applies snapshots newer than the last one; changed settings or
+a rewritten or back-filled snapshot replay the whole archive.
+
+    python scripts/geo.py
+    python scripts/geo.py --box 0.05 --force
+"""
+
+from __future__ import annotations
+import argparse, json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+from sgp4.api import SatrecArray
+
+import density
+import metrics
+import propagation
+from satrecord import SatelliteTable
+
+DATA_DIR = propagation.DATA_DIR
+OUT_DIR = DATA_DIR / "geo"
+STATE_FILE = OUT_DIR / "state.json"
+EVENTS_FILE = OUT_DIR / "events.json"
+
+SIDEREAL_DAY = 86164.0905           # s
+GEO_MEAN_MOTION = (0.98, 1.03)      # rev/day; ±7°/day of drift around 1.0027
+GEO_MAX_ECC = 0.05
+GEO_MAX_INC = 20.0                  # deg; old GEO objects librate up to ~15°
+SAMPLES_PER_DAY = 24
+DEFAULT_BOX = 0.1                   # deg, half-width of the station-keeping box
+DEFAULT_KEPT_DRIFT = 0.02           # deg/day
+DEFAULT_SETTLE = 5                  # snapshots at a new longitude before it becomes nominal
+DEFAULT_SLOT_WIDTH = 0.5            # deg
+
+COLUMNS = ("NORAD_CAT_ID", "OBJECT_NAME", "EPOCH", "MEAN_MOTION", "ECCENTRICITY", "INCLINATION", "RA_OF_ASC_NODE",
+           "ARG_OF_PERICENTER", "MEAN_ANOMALY", "BSTAR", "MEAN_MOTION_DOT", "MEAN_MOTION_DDOT")
+STATUSES = ("station_kept", "out_of_box", "drifting")
+KEPT, OUT_OF_BOX, DRIFTING = range(3)
+STATE_COLUMNS = ("norad", "name", "lon", "drift", "inc", "nominal_lon", "status", "candidate_lon", "settle",
+                 "first_seen", "last_seen")
+
+
+def wrap180(deg: np.ndarray) -> np.ndarray:
+    return (np.asarray(deg) + 180.0) % 360.0 - 180.0
+
+
+def geo_rows(table: SatelliteTable) -> np.ndarray:
+    """Rows of a Celestrak GP table whose mean elements put them in the GEO belt."""
+    n = density._column(table, "MEAN_MOTION")
+    ecc = density._column(table, "ECCENTRICITY")
+    inc = density._column(table, "INCLINATION")
+    return np.flatnonzero((n > GEO_MEAN_MOTION[0]) & (n < GEO_MEAN_MOTION[1]) & (ecc < GEO_MAX_ECC) & (inc < GEO_MAX_INC))
+
+
+@metrics.timed("geo_longitudes")
+def longitudes(table: SatelliteTable, rows: np.ndarray, start: datetime) -> dict[str, np.ndarray]:
+    """Mean longitude, drift and inclination of ``rows`` over the two sidereal days from ``start``."""
+    satrecs, kept = [], []
+    for i in rows:
+        s = propagation.satrec_from_record(table[i])
+        if s is not None:
+            satrecs.append(s)
+            kept.append(i)
+    kept = np.array(kept, dtype=np.intp)
+    if not satrecs:
+        return {"norad": np.zeros(0, dtype=np.int64), "name": [], "lon": np.zeros(0), "drift": np.zeros(0),
+                "inc": np.zeros(0)}
+    step = SIDEREAL_DAY / SAMPLES_PER_DAY
+    _, jd, fr = propagation.time_grid(start, 2 * SIDEREAL_DAY - step, step)
+    err, r, _ = propagation.propagate(SatrecArray(satrecs), jd, fr)
+    _, lon, _ = propagation.ecef_to_geodetic(propagation.teme_to_ecef(r, jd, fr))
+    lon = np.degrees(np.unwrap(np.radians(lon), axis=1))
+    day1 = lon[:, :SAMPLES_PER_DAY].mean(axis=1)
+    day2 = lon[:, SAMPLES_PER_DAY:].mean(axis=1)
+    ok = (err == 0).all(axis=1)
+    ids = np.array([table.value("NORAD_CAT_ID", i) for i in kept], dtype=np.int64)
+    names = [table.value("OBJECT_NAME", i) or "" for i in kept]
+    inc = density._column(table, "INCLINATION")[kept]
+    return {"norad": ids[ok], "name": [n for n, good in zip(names, ok) if good], "lon": wrap180(day1[ok]),
+            "drift": ((day2 - day1) * 86400.0 / SIDEREAL_DAY)[ok], "inc": inc[ok]}
+
+
+def empty_state() -> dict[str, np.ndarray | list]:
+    return {"norad": np.zeros(0, dtype=np.int64), "name": [], "lon": np.zeros(0), "drift": np.zeros(0),
+            "inc": np.zeros(0), "nominal_lon": np.zeros(0), "status": np.zeros(0, dtype=np.int8),
+            "candidate_lon": np.zeros(0), "settle": np.zeros(0, dtype=np.int32), "first_seen": [], "last_seen": []}
+
+
+def _add_objects(objects: dict, ids: np.ndarray, names: list[str], date: str) -> dict:
+    """``objects`` with rows for the IDs it hasn't seen, kept sorted by NORAD ID."""
+    new = np.setdiff1d(ids, objects["norad"])
+    if not len(new):
+        return objects
+    name_of = dict(zip(ids.tolist(), names))
+    n = len(new)
+    grown = {
+        "norad": np.concatenate([objects["norad"], new]),
+        "name": objects["name"] + [name_of[i] for i in new.tolist()],
+        "lon": np.concatenate([objects["lon"], np.full(n, np.nan)]),
+        "drift": np.concatenate([objects["drift"], np.full(n, np.nan)]),
+        "inc": np.concatenate([objects["inc"], np.full(n, np.nan)]),
+        "nominal_lon": np.concatenate([objects["nominal_lon"], np.full(n, np.nan)]),
+        "status": np.concatenate([objects["status"], np.full(n, DRIFTING, dtype=np.int8)]),
+        "candidate_lon": np.concatenate([objects["candidate_lon"], np.full(n, np.nan)]),
+        "settle": np.concatenate([objects["settle"], np.zeros(n, dtype=np.int32)]),
+        "first_seen": objects["first_seen"] + [date] * n,
+        "last_seen": objects["last_seen"] + [""] * n,
+    }
+    order = np.argsort(grown["norad"], kind="stable")
+    return {k: v[order] if isinstance(v, np.ndarray) else [v[i] for i in order] for k, v in grown.items()}
+
+
+def apply_snapshot(objects: dict, obs: dict, date: str, box: float, kept_drift: float,
+                   settle: int) -> tuple[dict, list[dict]]:
+    """Fold one snapshot's longitudes into the state; returns (state, events)."""
+    objects = _add_objects(objects, obs["norad"], obs["name"], date)
+    rows = np.searchsorted(objects["norad"], obs["norad"])
+    lon, drift = obs["lon"], obs["drift"]
+
+    nominal = objects["nominal_lon"][rows]
+    was = objects["status"][rows]
+    has_nominal = ~np.isnan(nominal)
+    kept = np.abs(drift) <= kept_drift
+    offset = wrap180(lon - nominal)
+    inside = has_nominal & (np.abs(offset) <= box)
+    # Out of the box but holding still: count snapshots within the box of where it first stopped
+    candidate = objects["candidate_lon"][rows]
+    holding = has_nominal & ~inside & kept
+    same_spot = np.abs(wrap180(lon - candidate)) <= box
+    settling = np.where(holding, np.where(same_spot, objects["settle"][rows] + 1, 1), 0)
+    candidate = np.where(holding & ~same_spot, lon, np.where(holding, candidate, np.nan))
+
+    relocated = settling >= settle
+    acquired = ~has_nominal & kept
+    left = has_nominal & ~inside & (was == KEPT)
+    returned = inside & (was == OUT_OF_BOX)
+    nominal = np.where(relocated | acquired, lon, nominal)
+    status = np.where(inside | relocated | acquired, KEPT, np.where(np.isnan(nominal), DRIFTING, OUT_OF_BOX))
+
+    objects["lon"][rows] = lon
+    objects["drift"][rows] = drift
+    objects["inc"][rows] = obs["inc"]
+    objects["nominal_lon"][rows] = nominal
+    objects["status"][rows] = status.astype(np.int8)
+    objects["candidate_lon"][rows] = np.where(relocated, np.nan, candidate)
+    objects["settle"][rows] = np.where(relocated, 0, settling)
+    for r in rows.tolist():
+        objects["last_seen"][r] = date
+
+    events = []
+    for kind, mask in (("left_box", left), ("returned", returned), ("relocated", relocated)):
+        for k in np.flatnonzero(mask):
+            r = rows[k]
+            events.append({"date": date, "norad": int(objects["norad"][r]), "name": objects["name"][r],
+                           "event": kind, "lon": round(float(lon[k]), 3),
+                           "offset": None if kind == "relocated" else round(float(offset[k]), 3),
+                           "drift": round(float(drift[k]), 4)})
+    return objects, events
+
+
+# --- Persistence ------------------------------------------------------------
+
+def _json_column(values) -> list:
+    if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+        return [None if np.isnan(v) else round(float(v), 5) for v in values]
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+
+def save_state(state: dict, path: Path = STATE_FILE):
+    out = dict(state, objects={k: _json_column(v) for k, v in state["objects"].items()})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(out, separators=(",", ":")))
+    tmp.replace(path)
+
+
+def load_state(path: Path = STATE_FILE) -> dict:
+    state = json.loads(path.read_text()) if path.exists() else {}
+    if set(STATE_COLUMNS) - state.get("objects", {}).keys():
+        return {"settings": None, "snapshots": [], "objects": empty_state()}  # none yet, or an older layout
+    cols, template = state["objects"], empty_state()
+    state["objects"] = {k: np.array([np.nan if v is None else v for v in cols[k]], dtype=template[k].dtype)
+                        if isinstance(template[k], np.ndarray) else cols[k] for k in STATE_COLUMNS}
+    return state
+
+
+def load_events(path: Path = EVENTS_FILE) -> list[dict]:
+    return json.loads(path.read_text()) if path.exists() else []
+
+
+def update(data_dir: Path = DATA_DIR, box: float = DEFAULT_BOX, kept_drift: float = DEFAULT_KEPT_DRIFT,
+           settle: int = DEFAULT_SETTLE, force: bool = False) -> dict:
+    """Apply the snapshots in ``data_dir`` not yet in the state; returns counts."""
+    settings = {"box_deg": box, "kept_drift_deg_day": kept_drift, "settle": settle}
+    state = load_state()
+    events = load_events()
+    snapshots = density.find_snapshots(data_dir)
+    versions = {path.name: propagation.file_version(path) for _, path in snapshots}
+    applied = state["snapshots"]
+    last = applied[-1]["date"] if applied else ""
+    replay = bool(applied) and (force or state["settings"] != settings
+                                or any(versions.get(s["file"]) != s["version"] for s in applied)
+                                or any(date <= last and date not in {s["date"] for s in applied}
+                                       for date, _ in snapshots))
+    if replay or not applied:
+        state = {"settings": settings, "snapshots": [], "objects": empty_state()}
+        events, last = [], ""
+
+    todo = [(date, path) for date, path in snapshots if date > last]
+    objects, new_events = state["objects"], []
+    for date, path in todo:
+        table = SatelliteTable.from_csv(path, usecols=COLUMNS)
+        start = datetime.fromisoformat(date).replace(tzinfo=timezone.utc)
+        obs = longitudes(table, geo_rows(table), start)
+        objects, found = apply_snapshot(objects, obs, date, box, kept_drift, settle)
+        new_events += found
+        state["snapshots"].append({"date": date, "file": path.name, "version": versions[path.name],
+                                   "objects": len(obs["norad"])})
+        metrics.counter("geo_events_total", len(found), date=date)
+    state["objects"] = objects
+
+    if todo or replay:
+        save_state(state)
+        EVENTS_FILE.write_text(json.dumps(events + new_events, indent=1))
+    return {"snapshots": len(snapshots), "applied": len(todo), "replayed": replay, "objects": len(objects["norad"]),
+            "events": new_events}
+
+
+# --- Queries ----------------------------------------------------------------
+
+class GeoIndex:
+    """Latest longitudes of every GEO object, sorted for slot and range queries."""
+
+    def __init__(self, objects: dict, reference: datetime):
+        order = np.argsort(objects["lon"], kind="stable")
+        seen = ~np.isnan(objects["lon"][order])
+        self.rows = order[seen]
+        self.objects = objects
+        self.reference = reference
+        self.lon = objects["lon"][self.rows]
+
+    @classmethod
+    def from_state(cls, state: dict) -> "GeoIndex":
+        date = state["snapshots"][-1]["date"] if state["snapshots"] else "1970-01-01"
+        return cls(state["objects"], datetime.fromisoformat(date).replace(tzinfo=timezone.utc))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def longitudes_at(self, when: datetime | None) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, longitudes) sorted by longitude, moved along each object's drift to ``when``."""
+        if when is None:
+            return self.rows, self.lon
+        days = (when - self.reference) / timedelta(days=1)
+        lon = wrap180(self.lon + self.objects["drift"][self.rows] * days)
+        order = np.argsort(lon, kind="stable")
+        return self.rows[order], lon[order]
+
+    def within(self, lon: float, half_width: float, when: datetime | None = None) -> list[dict]:
+        """Objects within ±``half_width`` of ``lon``, across the ±180° seam, nearest first."""
+        rows, lons = self.longitudes_at(when)
+        lo, hi = wrap180(lon - half_width), wrap180(lon + half_width)
+        if half_width >= 180:
+            hits = np.arange(len(lons))
+        elif lo <= hi:
+            hits = np.arange(np.searchsorted(lons, lo, "left"), np.searchsorted(lons, hi, "right"))
+        else:
+            hits = np.r_[np.arange(np.searchsorted(lons, lo, "left"), len(lons)),
+                         np.arange(0, np.searchsorted(lons, hi, "right"))]
+        offsets = wrap180(lons[hits] - lon)
+        hits = hits[np.argsort(np.abs(offsets), kind="stable")]
+        return [self.record(rows[k], lons[k], lon) for k in hits]
+
+    def slots(self, width: float = DEFAULT_SLOT_WIDTH, when: datetime | None = None) -> list[dict]:
+        """Occupied longitude slots of ``width`` degrees starting at -180, with their objects."""
+        rows, lons = self.longitudes_at(when)
+        slot = np.floor((lons + 180.0) / width).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, slot[1:] != slot[:-1]]) if len(slot) else np.zeros(0, dtype=np.intp)
+        out = []
+        for a, b in zip(starts, np.r_[starts[1:], len(slot)]):
+            members = rows[a:b]
+            status = self.objects["status"][members]
+            out.append({"lon_start": round(float(-180.0 + slot[a] * width), 6),
+                        "lon_end": round(float(-180.0 + (slot[a] + 1) * width), 6),
+                        "count": int(b - a), "station_kept": int((status == KEPT).sum()),
+                        "norad_ids": self.objects["norad"][members].tolist()})
+        return out
+
+    def record(self, row: int, lon: float, center: float | None = None) -> dict:
+        o = self.objects
+        nominal = o["nominal_lon"][row]
+        rec = {"norad": int(o["norad"][row]), "name": o["name"][row], "lon": round(float(lon), 4),
+               "drift_deg_day": round(float(o["drift"][row]), 5), "inclination": round(float(o["inc"][row]), 4),
+               "nominal_lon": None if np.isnan(nominal) else round(float(nominal), 4),
+               "status": STATUSES[o["status"][row]], "last_seen": o["last_seen"][row]}
+        if center is not None:
+            rec["offset"] = round(float(wrap180(lon - center)), 4)
+        return rec
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track GEO longitudes and station keeping across archive snapshots")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="Directory holding active-YYYYMMDD.csv")
+    parser.add_argument("--box", type=float, default=DEFAULT_BOX, help="Station-keeping box half-width (deg)")
+    parser.add_argument("--kept-drift", type=float, default=DEFAULT_KEPT_DRIFT,
+                        help="Largest drift (deg/day) still counted as station-kept")
+    parser.add_argument("--settle", type=int, default=DEFAULT_SETTLE,
+                        help="Snapshots at a new longitude before it becomes the nominal")
+    parser.add_argument("--force", action="store_true", help="Replay every snapshot")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+
+    with metrics.stage("geo"):
+        stats = update(args.data_dir, args.box, args.kept_drift, args.settle, args.force)
+    if not stats["snapshots"]:
+        print(f"⚠ No active-YYYYMMDD.csv snapshots in {args.data_dir}")
+        return
+    state = load_state()
+    status = state["objects"]["status"]
+    print(f"✓ GEO belt: {stats['objects']} objects from {stats['snapshots']} snapshots in {OUT_DIR}")
+    print(f"  - Applied: {stats['applied']}" + (" (replayed from the first snapshot)" if stats["replayed"] else ""))
+    for code, name in enumerate(STATUSES):
+        print(f"  - {name}: {int((status == code).sum())}")
+    for event in stats["events"]:
+        offset = f", {event['offset']:+.3f}° from nominal" if event["offset"] is not None else ""
+        print(f"  ⚠ {event['date']} {event['norad']} {event['name']}: {event['event']} at {event['lon']:.3f}°"
+              f"{offset}, drift {event['drift']:+.4f}°/day")
+
+
+if __name__ == "__main__":
+    main()
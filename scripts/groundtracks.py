@@ -0,0 +1,238 @@
+"""Precompute simplified one-orbit ground tracks and orbit rings.
+
+For every TLE one orbital period is sampled starting at the TLE epoch, with
+the period taken from the element set's mean motion. Each satellite yields:
+
+    ground track  lat/lon polyline, split at the antimeridian
+    orbit ring    TEME (inertial) xyz polyline, closed over one revolution
+
+Both are simplified with Douglas-Peucker (``--track-tolerance`` degrees,
+``--ring-tolerance`` km) and quantized to int16 in a small binary record:
+
+    header   <4sBIdfHHHf  magic "GTRK", version, norad, epoch (unix s),
+                          period (s), segments, track points, ring points,
+                          ring scale (km per 32767)
+    uint16   points per ground-track segment
+    int16×2  lat*32767/90, lon*32767/180 per track point
+    int16×3  x, y, z * 32767/scale per ring point
+
+All records live in data/tracks/tracks.bin with an index in
+data/tracks/index.json (offset, length and TLE epoch per NORAD ID). A rebuild
+reuses the stored record of any satellite whose TLE epoch is unchanged.
+"""
+
+from __future__ import annotations
+import argparse, json, struct
+from pathlib import Path
+
+import numpy as np
+
+import metrics
+import propagation
+
+TRACKS_DIR = propagation.DATA_DIR / "tracks"
+PACK_FILE = TRACKS_DIR / "tracks.bin"
+INDEX_FILE = TRACKS_DIR / "index.json"
+
+MAGIC = b"GTRK"
+VERSION = 1
+HEADER = struct.Struct("<4sBIdfHHHf")
+SAMPLES_PER_ORBIT = 360
+DEFAULT_TRACK_TOLERANCE = 0.1   # degrees
+DEFAULT_RING_TOLERANCE = 10.0   # km
+Q = 32767
+
+
+def simplify(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker on an (n, d) polyline; returns the kept points."""
+    n = len(points)
+    if n < 3:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2:
+            continue
+        a, b = points[lo], points[hi]
+        seg = b - a
+        inner = points[lo + 1:hi]
+        seg_len2 = float(seg @ seg)
+        if seg_len2 == 0.0:
+            dist = np.linalg.norm(inner - a, axis=1)
+        else:
+            t = np.clip((inner - a) @ seg / seg_len2, 0.0, 1.0)
+            dist = np.linalg.norm(inner - (a + t[:, None] * seg), axis=1)
+        k = int(np.argmax(dist))
+        if dist[k] > tolerance:
+            mid = lo + 1 + k
+            keep[mid] = True
+            stack.append((lo, mid))
+            stack.append((mid, hi))
+    return points[keep]
+
+
+def split_antimeridian(lat: np.ndarray, lon: np.ndarray) -> list[np.ndarray]:
+    """Split a lat/lon track wherever it wraps across ±180°, adding the crossing point to both sides."""
+    segments = []
+    start = 0
+    current = []
+    for i in range(1, len(lon)):
+        dlon = lon[i] - lon[i - 1]
+        if abs(dlon) <= 180:
+            continue
+        # Unwrap the next point, interpolate latitude at the ±180 boundary
+        edge = 180.0 if dlon < 0 else -180.0
+        next_lon = lon[i] + (360.0 if dlon < 0 else -360.0)
+        frac = (edge - lon[i - 1]) / (next_lon - lon[i - 1])
+        cross_lat = lat[i - 1] + frac * (lat[i] - lat[i - 1])
+        current.append(np.column_stack([lat[start:i], lon[start:i]]))
+        current.append(np.array([[cross_lat, edge]]))
+        segments.append(np.vstack(current))
+        current = [np.array([[cross_lat, -edge]])]
+        start = i
+    current.append(np.column_stack([lat[start:], lon[start:]]))
+    segments.append(np.vstack(current))
+    return segments
+
+
+def orbit_samples(satrec, samples: int = SAMPLES_PER_ORBIT) -> tuple[float, np.ndarray, np.ndarray, np.ndarray]:
+    """Propagate one period from epoch. Returns (period_s, jd, fr, r_teme km) for valid samples."""
+    period_s = 2 * np.pi / satrec.no_kozai * 60.0  # no_kozai is rad/min
+    offsets_days = np.linspace(0.0, period_s / 86400.0, samples + 1)
+    jd = np.full(samples + 1, satrec.jdsatepoch)
+    fr = satrec.jdsatepochF + offsets_days
+    err, r, _ = satrec.sgp4_array(jd, fr)
+    ok = err == 0
+    return period_s, jd[ok], fr[ok], r[ok]
+
+
+def encode_track(norad: int, epoch_unix: float, period_s: float, segments: list[np.ndarray],
+                 ring: np.ndarray) -> bytes:
+    scale = float(np.abs(ring).max()) if len(ring) else 1.0
+    track = np.vstack(segments) if segments else np.empty((0, 2))
+    q_track = np.round(track / [90.0, 180.0] * Q).astype("<i2")
+    q_ring = np.round(ring / scale * Q).astype("<i2")
+    return b"".join([
+        HEADER.pack(MAGIC, VERSION, norad, epoch_unix, period_s, len(segments), len(track), len(ring), scale),
+        np.array([len(s) for s in segments], dtype="<u2").tobytes(),
+        q_track.tobytes(),
+        q_ring.tobytes(),
+    ])
+
+
+def decode_track(blob: bytes) -> dict:
+    magic, version, norad, epoch, period, n_seg, n_track, n_ring, scale = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a ground-track record")
+    pos = HEADER.size
+    seg_lens = np.frombuffer(blob, dtype="<u2", count=n_seg, offset=pos)
+    pos += 2 * n_seg
+    track = np.frombuffer(blob, dtype="<i2", count=2 * n_track, offset=pos).reshape(-1, 2) / Q * [90.0, 180.0]
+    pos += 4 * n_track
+    ring = np.frombuffer(blob, dtype="<i2", count=3 * n_ring, offset=pos).reshape(-1, 3) / Q * scale
+    bounds = np.cumsum(seg_lens)[:-1]
+    return {
+        "norad_id": norad,
+        "epoch_unix": epoch,
+        "period_s": period,
+        "ground_track": [s.round(4).tolist() for s in np.split(track, bounds)],
+        "orbit_ring_km": ring.round(2).tolist(),
+    }
+
+
+def build_track(satrec, track_tol: float, ring_tol: float) -> bytes | None:
+    period_s, jd, fr, r = orbit_samples(satrec)
+    if len(r) < 2:
+        return None
+    lat, lon, _ = propagation.ecef_to_geodetic(propagation.teme_to_ecef(r, jd, fr))
+    segments = [simplify(s, track_tol) for s in split_antimeridian(lat, lon)]
+    ring = simplify(r, ring_tol)
+    epoch_unix = (satrec.jdsatepoch - propagation.JD_UNIX_EPOCH + satrec.jdsatepochF) * 86400.0
+    return encode_track(satrec.satnum, epoch_unix, period_s, segments, ring)
+
+
+def load_index() -> dict:
+    if INDEX_FILE.exists():
+        return json.loads(INDEX_FILE.read_text())
+    return {"tracks": {}}
+
+
+def read_records(norad_ids: list[int], index: dict | None = None) -> list[bytes]:
+    """Stored records for ``norad_ids`` in order; IDs without a track are skipped."""
+    entries = (index or load_index())["tracks"]
+    blobs = []
+    with open(PACK_FILE, "rb") as f:
+        for norad in norad_ids:
+            entry = entries.get(str(norad))
+            if entry is None:
+                continue
+            f.seek(entry["offset"])
+            blobs.append(f.read(entry["length"]))
+    return blobs
+
+
+def read_record(norad: int, index: dict | None = None) -> bytes | None:
+    blobs = read_records([norad], index)
+    return blobs[0] if blobs else None
+
+
+@metrics.timed("build_tracks")
+def build_all(catalog: propagation.Catalog, track_tol: float, ring_tol: float,
+              force: bool = False) -> dict:
+    """Rebuild the pack, recomputing only satellites whose TLE epoch changed."""
+    old_index = load_index()
+    old_pack = PACK_FILE.read_bytes() if PACK_FILE.exists() and not force else b""
+    reusable = old_index["tracks"] if old_pack and old_index.get("tolerances") == [track_tol, ring_tol] else {}
+
+    TRACKS_DIR.mkdir(parents=True, exist_ok=True)
+    index = {"catalog_version": catalog.version, "tolerances": [track_tol, ring_tol], "tracks": {}}
+    stats = {"reused": 0, "built": 0, "failed": 0}
+    tmp = PACK_FILE.with_suffix(".tmp")
+    with open(tmp, "wb") as out:
+        for satrec in catalog.satrecs:
+            key = str(satrec.satnum)
+            epoch = satrec.jdsatepoch + satrec.jdsatepochF
+            prev = reusable.get(key)
+            if prev and prev["epoch_jd"] == epoch:
+                blob = old_pack[prev["offset"]:prev["offset"] + prev["length"]]
+                stats["reused"] += 1
+            else:
+                blob = build_track(satrec, track_tol, ring_tol)
+                if blob is None:
+                    stats["failed"] += 1
+                    continue
+                stats["built"] += 1
+            index["tracks"][key] = {"offset": out.tell(), "length": len(blob), "epoch_jd": epoch}
+            out.write(blob)
+    tmp.replace(PACK_FILE)
+    INDEX_FILE.write_text(json.dumps(index))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute simplified ground tracks and orbit rings")
+    parser.add_argument("--tle-csv", type=Path, default=propagation.DEFAULT_TLE_CSV)
+    parser.add_argument("--track-tolerance", type=float, default=DEFAULT_TRACK_TOLERANCE,
+                        help="Ground-track simplification tolerance in degrees")
+    parser.add_argument("--ring-tolerance", type=float, default=DEFAULT_RING_TOLERANCE,
+                        help="Orbit-ring simplification tolerance in km")
+    parser.add_argument("--force", action="store_true", help="Recompute every track")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    with metrics.stage("load_catalog"):
+        catalog = propagation.load_catalog(args.tle_csv)
+    with metrics.stage("build_tracks"):
+        stats = build_all(catalog, args.track_tolerance, args.ring_tolerance, force=args.force)
+    size = PACK_FILE.stat().st_size
+    print(f"✓ Wrote {stats['built'] + stats['reused']} tracks to {PACK_FILE} ({size / 1024:.0f} KiB)")
+    print(f"  - Recomputed: {stats['built']}")
+    print(f"  - Unchanged epoch, reused: {stats['reused']}")
+    print(f"  - Failed to propagate: {stats['failed']}")
+
+
+if __name__ == "__main__":
+    main()
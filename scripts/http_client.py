@@ -0,0 +1,243 @@
+"""Shared HTTP client for the fetch scripts.
+
+Every script goes through a pooled ``requests.Session``, one per thread
+(pipeline stages run on a thread pool, and a Session isn't documented as
+thread-safe): keep-alive connections are reused across calls, every
+request gets the same timeouts,
+and idempotent requests are retried with backoff on connection errors and
+429/5xx responses (honouring ``Retry-After``). Request timing, status and
+response size are recorded with ``metrics`` per host.
+
+Space-Track logins are cached: the session cookie is written to
+.spacetrack_cookies.json (repo root, created with mode 600) and reused by later
+runs until Space-Track rejects it, at which point the client logs in again.
+Each SpaceTrackSession has a session of its own, so the login cookie is never
+sent to other hosts' requests.
+
+Record/replay, for benchmarking and testing the fetch pipelines offline:
+
+    SATREG_HTTP_MODE=record python scripts/pipeline.py   # hit the network, save responses
+    SATREG_HTTP_MODE=replay python scripts/pipeline.py   # serve saved responses, no network
+
+Responses are stored under data/http_cassette/ (SATREG_HTTP_CASSETTE to
+override), keyed by method, URL and body with credentials stripped, so no
+API keys or passwords are written to disk. In replay mode a request with no
+recording raises ``ReplayMissError`` (a ``requests.ConnectionError``) and
+rate-limit delays from ``throttle`` are skipped.
+"""
+
+from __future__ import annotations
+import hashlib, json, os, threading, time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+import metrics
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CASSETTE = ROOT / "data" / "http_cassette"
+COOKIE_FILE = Path(os.getenv("SATREG_COOKIE_FILE", ROOT / ".spacetrack_cookies.json"))
+
+TIMEOUT = (10, 60)          # (connect, read) seconds
+RETRIES = 3
+BACKOFF = 1.0               # 1 s, 2 s, 4 s between retries
+POOL_SIZE = 16
+USER_AGENT = "Nasa-Space-Apps-satellite-registry/1.0"
+
+SPACETRACK_BASE = "https://www.space-track.org"
+# Query/form fields never written to the cassette or used in its keys
+SECRET_FIELDS = {"apikey", "api_key", "password", "identity"}
+KEPT_HEADERS = ("Content-Type", "Content-Encoding", "Last-Modified", "ETag")
+
+
+class ReplayMissError(requests.exceptions.ConnectionError):
+    pass
+
+
+class SpaceTrackError(Exception):
+    pass
+
+
+_mode = os.getenv("SATREG_HTTP_MODE", "live").lower()
+_cassette = Path(os.getenv("SATREG_HTTP_CASSETTE", DEFAULT_CASSETTE))
+_local = threading.local()
+
+
+def configure(mode: str | None = None, cassette: Path | str | None = None):
+    """Override SATREG_HTTP_MODE (live/record/replay) and SATREG_HTTP_CASSETTE."""
+    global _mode, _cassette
+    if mode is not None:
+        if mode not in ("live", "record", "replay"):
+            raise ValueError(f"unknown HTTP mode {mode!r}")
+        _mode = mode
+    if cassette is not None:
+        _cassette = Path(cassette)
+
+
+def replaying() -> bool:
+    return _mode == "replay"
+
+
+def new_session() -> requests.Session:
+    """A Session with the shared retry policy, connection pool size and User-Agent."""
+    retry = Retry(total=RETRIES, backoff_factor=BACKOFF, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=("GET", "HEAD"), respect_retry_after_header=True,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def get_session() -> requests.Session:
+    """The calling thread's Session, created on first use."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = new_session()
+    return session
+
+
+def throttle(seconds: float):
+    """Rate-limit delay between API calls; skipped when replaying."""
+    if not replaying():
+        time.sleep(seconds)
+
+
+# --- Record / replay ----------------------------------------------------------
+
+def _redact(pairs) -> list[tuple[str, str]]:
+    return sorted((k, "" if k.lower() in SECRET_FIELDS else str(v)) for k, v in pairs)
+
+
+def _cassette_key(method: str, url: str, params=None, data=None) -> str:
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query) + list((params or {}).items())
+    clean_url = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(_redact(query)), ""))
+    body = urlencode(_redact(data.items())) if isinstance(data, dict) else ""
+    digest = hashlib.sha1(f"{method} {clean_url} {body}".encode()).hexdigest()
+    return f"{parts.netloc.replace(':', '_')}/{digest}"
+
+
+def _record(key: str, resp: requests.Response):
+    meta_path = _cassette / f"{key}.json"
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+    meta_path.with_suffix(".body").write_bytes(resp.content)
+    meta = {
+        "status": resp.status_code,
+        "reason": resp.reason,
+        "headers": {h: resp.headers[h] for h in KEPT_HEADERS if h in resp.headers},
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    meta_path.write_text(json.dumps(meta, indent=2))
+
+
+def _replay(key: str, url: str) -> requests.Response:
+    meta_path = _cassette / f"{key}.json"
+    if not meta_path.exists():
+        raise ReplayMissError(f"no recorded response for {url} in {_cassette}")
+    meta = json.loads(meta_path.read_text())
+    resp = requests.Response()
+    resp.status_code = meta["status"]
+    resp.reason = meta.get("reason", "")
+    resp.headers = CaseInsensitiveDict(meta["headers"])
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    resp.url = url
+    resp._content = meta_path.with_suffix(".body").read_bytes()
+    return resp
+
+
+# --- Requests -----------------------------------------------------------------
+
+def request(method: str, url: str, session: requests.Session | None = None, **kwargs) -> requests.Response:
+    """``session.request`` with the shared timeout, metrics and record/replay."""
+    host = urlsplit(url).netloc
+    key = _cassette_key(method, url, kwargs.get("params"), kwargs.get("data"))
+    if replaying():
+        resp = _replay(key, url)
+    else:
+        kwargs.setdefault("timeout", TIMEOUT)
+        t0 = time.perf_counter()
+        resp = (session or get_session()).request(method, url, **kwargs)
+        metrics.observe("http_request_seconds", time.perf_counter() - t0, host=host)
+        if _mode == "record":
+            _record(key, resp)
+    metrics.counter("http_requests_total", host=host, status=resp.status_code)
+    metrics.counter("http_response_bytes_total", len(resp.content), host=host)
+    return resp
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+# --- Space-Track ---------------------------------------------------------------
+
+class SpaceTrackSession:
+    """Authenticated Space-Track access that survives across runs.
+
+    The login cookie is loaded from COOKIE_FILE when present; a 401 on any
+    query triggers one fresh login and a retry. Use one instance per thread.
+    """
+
+    def __init__(self, username: str, password: str):
+        self.username = username
+        self.password = password
+        self.session = new_session()
+        if not replaying() and not self._load_cookies():
+            self.login()
+
+    def _load_cookies(self) -> bool:
+        if not COOKIE_FILE.exists():
+            return False
+        try:
+            saved = json.loads(COOKIE_FILE.read_text())
+        except ValueError:
+            return False
+        if saved.get("identity") != self.username or saved.get("expires", 0) < time.time():
+            return False
+        for name, value in saved["cookies"].items():
+            self.session.cookies.set(name, value, domain="www.space-track.org")
+        metrics.log("spacetrack_cookie_reused", "✓ Reusing saved Space-Track login")
+        return True
+
+    def _save_cookies(self):
+        cookies = {c.name: c.value for c in self.session.cookies if c.domain.endswith("space-track.org")}
+        expires = [c.expires for c in self.session.cookies if c.domain.endswith("space-track.org") and c.expires]
+        # Created 0600 rather than chmod-ed afterwards, so the cookie is never readable by others;
+        # a leftover temp file is removed first because O_CREAT keeps an existing file's mode
+        tmp = COOKIE_FILE.with_name(COOKIE_FILE.name + ".tmp")
+        tmp.unlink(missing_ok=True)
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w") as f:
+            json.dump({
+                "identity": self.username,
+                "cookies": cookies,
+                "expires": min(expires) if expires else time.time() + 3600,
+            }, f)
+        tmp.replace(COOKIE_FILE)
+
+    @metrics.timed("spacetrack_login")
+    def login(self):
+        resp = post(SPACETRACK_BASE + "/ajaxauth/login",
+                    data={"identity": self.username, "password": self.password}, session=self.session)
+        if not resp.ok:
+            raise SpaceTrackError(f"Login failed - HTTP {resp.status_code}: {resp.text}")
+        if not replaying():
+            self._save_cookies()
+        metrics.log("spacetrack_login", "✓ Authenticated with Space-Track")
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        resp = get(url, session=self.session, **kwargs)
+        if resp.status_code == 401 and not replaying():
+            self.login()
+            resp = get(url, session=self.session, **kwargs)
+        return resp
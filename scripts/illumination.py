@@ -0,0 +1,156 @@
+"""Sun position, Earth-shadow state and visual magnitude for batch-propagated orbits.
+
+Everything works on the arrays ``propagation.propagate`` returns: positions
+are (n_sats, n_times, 3) TEME km and the sun vector is computed once per
+timestep, so shadow and brightness add a few NumPy passes over arrays that
+already exist.
+
+Sun: the Astronomical Almanac low-precision series (about 0.01° over
+1950-2050), in the mean equator and equinox of date. The difference from
+TEME is well under an arcminute, which no shadow model here can resolve.
+
+Shadow models (``shadow_fraction``):
+
+    cylindrical  Earth's shadow as a cylinder along the sun line; 0 or 1
+    conical      umbra and penumbra from the apparent solar and Earth discs
+                 seen from the satellite; the lit fraction of the solar disc
+
+Visual magnitude treats the object as a diffuse (Lambertian) sphere with the
+mean cross-section of a cylinder (GCAT Length × Diamete) plus flat panels out
+to Span. The standard magnitude is referred to 1000 km range at 90° phase
+angle, the convention of the visual satellite observing lists.
+"""
+
+from __future__ import annotations
+import numpy as np
+
+import propagation
+
+AU_KM = 149597870.7
+SUN_RADIUS_KM = 696000.0
+EARTH_RADIUS_KM = propagation.WGS84_A
+SUN_MAGNITUDE = -26.74
+DEFAULT_ALBEDO = 0.175
+STANDARD_RANGE_KM = 1000.0
+SHADOW_MODELS = ("cylindrical", "conical")
+
+
+def sun_position(jd: np.ndarray, fr: np.ndarray) -> np.ndarray:
+    """Geocentric sun vector (n_times, 3) in km, equator and equinox of date."""
+    n = (jd - 2451545.0) + fr
+    g = np.radians(357.528 + 0.9856003 * n)
+    lam = np.radians(280.460 + 0.9856474 * n + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+    eps = np.radians(23.439 - 4e-7 * n)
+    dist = AU_KM * (1.00014 - 0.01671 * np.cos(g) - 0.00014 * np.cos(2 * g))
+    return np.stack([dist * np.cos(lam), dist * np.cos(eps) * np.sin(lam), dist * np.sin(eps) * np.sin(lam)], axis=-1)
+
+
+def shadow_fraction(r: np.ndarray, sun: np.ndarray, model: str = "conical") -> np.ndarray:
+    """Lit fraction of the solar disc for (n_sats, n_times, 3) positions: 1 sunlit, 0 umbra.
+
+    ``sun`` is (n_times, 3) from ``sun_position``. Positions SGP4 flagged as
+    errors come back as NaN; callers should mask them with the error codes.
+    """
+    if model not in SHADOW_MODELS:
+        raise ValueError(f"unknown shadow model {model!r}; expected one of {SHADOW_MODELS}")
+    r_norm = np.linalg.norm(r, axis=-1)
+    if model == "cylindrical":
+        u = sun / np.linalg.norm(sun, axis=-1, keepdims=True)
+        s = np.einsum("...k,...k->...", r, u)
+        perp2 = r_norm ** 2 - s ** 2
+        lit = np.where((s < 0) & (perp2 < EARTH_RADIUS_KM ** 2), 0.0, 1.0)
+        return np.where(np.isnan(r_norm), np.nan, lit)
+
+    to_sun = sun - r
+    d_sun = np.linalg.norm(to_sun, axis=-1)
+    a = np.arcsin(SUN_RADIUS_KM / d_sun)                          # apparent solar radius
+    with np.errstate(invalid="ignore", divide="ignore"):
+        b = np.arcsin(np.minimum(EARTH_RADIUS_KM / r_norm, 1.0))  # apparent Earth radius
+        cos_c = -np.einsum("...k,...k->...", r, to_sun) / (r_norm * d_sun)
+        c = np.arccos(np.clip(cos_c, -1.0, 1.0))                  # separation of the disc centres
+
+        # Partial overlap of two discs (Montenbruck & Gill, 3.4.2)
+        x = (c ** 2 + a ** 2 - b ** 2) / (2 * c)
+        y = np.sqrt(np.maximum(a ** 2 - x ** 2, 0.0))
+        overlap = (a ** 2 * np.arccos(np.clip(x / a, -1, 1)) + b ** 2 * np.arccos(np.clip((c - x) / b, -1, 1))
+                   - c * y)
+        lit = 1.0 - overlap / (np.pi * a ** 2)
+    lit = np.where(c >= a + b, 1.0, lit)
+    lit = np.where(c <= b - a, 0.0, lit)                          # umbra
+    lit = np.where(c <= a - b, 1.0 - (b / a) ** 2, lit)           # antumbra, far beyond Earth
+    return np.where(np.isnan(r_norm), np.nan, np.clip(lit, 0.0, 1.0))
+
+
+def cross_section(length: np.ndarray, diameter: np.ndarray, span: np.ndarray) -> np.ndarray:
+    """Mean projected area (m²) from GCAT sizes in metres; NaN when neither length nor diameter is known.
+
+    A missing length or diameter is taken to equal the other. The body is a
+    cylinder (mean projection = surface area / 4); whatever Span exceeds the
+    body's largest dimension is counted as a two-sided panel as wide as the body is thick.
+    """
+    length, diameter, span = (np.asarray(v, dtype=float) for v in (length, diameter, span))
+    length = np.where(np.isnan(length) | (length <= 0), diameter, length)
+    diameter = np.where(np.isnan(diameter) | (diameter <= 0), length, diameter)
+    body = np.pi * diameter * length / 4 + np.pi * diameter ** 2 / 8
+    panels = np.maximum(np.nan_to_num(span) - np.maximum(diameter, length), 0.0) * np.minimum(diameter, length) / 2
+    area = body + panels
+    return np.where(area > 0, area, np.nan)
+
+
+def _phase_function(phase: np.ndarray) -> np.ndarray:
+    """Diffuse-sphere phase function; 2/(3π²) at 90°."""
+    return 2 / (3 * np.pi ** 2) * ((np.pi - phase) * np.cos(phase) + np.sin(phase))
+
+
+def standard_magnitude(length: np.ndarray, diameter: np.ndarray, span: np.ndarray,
+                       albedo: float = DEFAULT_ALBEDO) -> np.ndarray:
+    """Magnitude at 1000 km range and 90° phase angle; NaN where GCAT has no size."""
+    area = cross_section(length, diameter, span)
+    flux = albedo * area * _phase_function(np.pi / 2) / (STANDARD_RANGE_KM * 1000.0) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return SUN_MAGNITUDE - 2.5 * np.log10(flux)
+
+
+def visual_magnitude(std_mag: np.ndarray, r: np.ndarray, sun: np.ndarray, observer: np.ndarray,
+                     lit: np.ndarray | None = None) -> np.ndarray:
+    """Apparent magnitude of (n_sats, n_times, 3) positions seen from ``observer``.
+
+    ``observer`` is (3,) or (n_times, 3) in the same frame as ``r`` and
+    ``sun``; ``std_mag`` is per satellite. Pass ``lit`` from
+    ``shadow_fraction`` to dim objects in penumbra; fully eclipsed samples
+    come back as NaN.
+    """
+    to_obs = observer - r
+    to_sun = sun - r
+    rng = np.linalg.norm(to_obs, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cos_phase = np.einsum("...k,...k->...", to_obs, to_sun) / (rng * np.linalg.norm(to_sun, axis=-1))
+        phase = np.arccos(np.clip(cos_phase, -1.0, 1.0))
+        mag = (np.asarray(std_mag, dtype=float)[:, None]
+               - 2.5 * np.log10(_phase_function(phase) / _phase_function(np.pi / 2))
+               + 5 * np.log10(rng / STANDARD_RANGE_KM))
+        if lit is not None:
+            mag = np.where(lit > 0, mag - 2.5 * np.log10(lit), np.nan)
+    return mag
+
+
+def geodetic_to_ecef(lat_deg: float, lon_deg: float, alt_km: float = 0.0) -> np.ndarray:
+    lat, lon = np.radians(lat_deg), np.radians(lon_deg)
+    n = propagation.WGS84_A / np.sqrt(1 - propagation.WGS84_E2 * np.sin(lat) ** 2)
+    return np.array([(n + alt_km) * np.cos(lat) * np.cos(lon),
+                     (n + alt_km) * np.cos(lat) * np.sin(lon),
+                     (n * (1 - propagation.WGS84_E2) + alt_km) * np.sin(lat)])
+
+
+def look_angles(r_ecef: np.ndarray, lat_deg: float, lon_deg: float, alt_km: float = 0.0
+                ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Elevation and azimuth (deg) and range (km) of ECEF positions from a ground site."""
+    site = geodetic_to_ecef(lat_deg, lon_deg, alt_km)
+    lat, lon = np.radians(lat_deg), np.radians(lon_deg)
+    d = r_ecef - site
+    east = -np.sin(lon) * d[..., 0] + np.cos(lon) * d[..., 1]
+    north = (-np.sin(lat) * np.cos(lon) * d[..., 0] - np.sin(lat) * np.sin(lon) * d[..., 1]
+             + np.cos(lat) * d[..., 2])
+    up = np.cos(lat) * np.cos(lon) * d[..., 0] + np.cos(lat) * np.sin(lon) * d[..., 1] + np.sin(lat) * d[..., 2]
+    rng = np.linalg.norm(d, axis=-1)
+    return np.degrees(np.arcsin(up / rng)), np.mod(np.degrees(np.arctan2(east, north)), 360.0), rng
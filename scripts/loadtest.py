@@ -0,0 +1,415 @@
+"""Load test the API with simulated dashboard, registry and tracker clients.
+
+Starts uvicorn on a free local port (or targets a running server with
+--url), runs the clients for --duration seconds and reports latency
+percentiles and throughput per request kind, plus the server's CPU and RSS.
+Results are written next to benchmark.py's, as
+bench_results/load-<git-sha>.json, and --compare flags request kinds whose
+p95 or throughput regressed against an earlier run.
+
+Each client keeps one HTTP/1.1 connection open and picks requests by weight,
+pausing an exponentially distributed think time (mean ``think`` × --think)
+between them:
+
+    dashboard  think 5 s   aggregate stats, decay list, density summary, GEO slots
+    registry   think 2 s   name/designator search, paging, one object's forecast
+    tracker    think 1 s   position subscription: CZML for its own 10 satellites,
+                           revalidated with If-None-Match; sometimes /sky
+
+--think 0 makes every client a closed loop, i.e. a throughput test. --steps
+repeats the run with the client counts multiplied, to find where latency
+leaves the budget:
+
+    python scripts/loadtest.py --tracker 20 --steps 1 2 4 8
+    python scripts/loadtest.py --url http://localhost:8000 --server-pid 1234
+    python scripts/loadtest.py --compare bench_results/load-abc1234.json
+
+Request kinds whose artifacts aren't built (decay, density, geo) answer 503
+and are reported as errors; run the pipeline first for a full mix.
+"""
+
+from __future__ import annotations
+import argparse, http.client, json, os, platform, random, socket, subprocess, sys, threading, time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+import benchmark
+
+try:
+    import psutil
+except ImportError:  # /proc is used instead on Linux
+    psutil = None
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+SAMPLE_INTERVAL = 0.5       # s between server CPU/RSS samples
+SUBSCRIPTION_SIZE = 10      # satellites per tracker client
+STARTUP_TIMEOUT = 60.0
+
+# p95 latency each request kind should stay under, in ms
+LATENCY_BUDGET_MS = {
+    "stats": 50, "decay_list": 100, "density_summary": 50, "geo_slots": 100,
+    "search": 100, "page": 100, "decay_one": 50,
+    "czml_subscription": 250, "sky": 500,
+}
+
+
+@dataclass
+class Profile:
+    think: float                       # mean seconds between requests
+    mix: dict[str, float]              # request kind -> weight
+
+
+PROFILES = {
+    "dashboard": Profile(5.0, {"stats": 4, "decay_list": 2, "density_summary": 2, "geo_slots": 2}),
+    "registry": Profile(2.0, {"search": 5, "page": 4, "decay_one": 1}),
+    "tracker": Profile(1.0, {"czml_subscription": 8, "sky": 2}),
+}
+
+
+class Client(threading.Thread):
+    """One simulated page: a keep-alive connection and a weighted request mix."""
+
+    def __init__(self, kind: str, host: str, port: int, catalog: dict, deadline: float, think_scale: float,
+                 seed: int):
+        super().__init__(daemon=True)
+        self.kind = kind
+        self.profile = PROFILES[kind]
+        self.host, self.port = host, port
+        self.catalog = catalog
+        self.deadline = deadline
+        self.think = self.profile.think * think_scale
+        self.rng = random.Random(seed)
+        self.samples: list[tuple[str, int, float]] = []   # (request kind, status, seconds)
+        self.conn: http.client.HTTPConnection | None = None
+        self.etag: str | None = None
+        ids = catalog["ids"]
+        self.subscription = self.rng.sample(ids, min(SUBSCRIPTION_SIZE, len(ids))) if ids else []
+
+    def path(self, kind: str) -> str:
+        rng, cat = self.rng, self.catalog
+        if kind == "stats":
+            return "/stats"
+        if kind == "decay_list":
+            return "/decay?" + urlencode({"within_days": 30, "limit": 100})
+        if kind == "density_summary":
+            return "/density/summary"
+        if kind == "geo_slots":
+            return "/geo/slots?width=1"
+        if kind == "search":
+            return "/satellites?" + urlencode({"q": rng.choice(cat["terms"]) if cat["terms"] else "", "limit": 25})
+        if kind == "page":
+            pages = max(1, cat["total"] // 50)
+            return "/satellites?" + urlencode({"offset": rng.randrange(pages) * 50, "limit": 50})
+        if kind == "decay_one":
+            return f"/decay/{rng.choice(cat['ids'])}" if cat["ids"] else "/decay/25544"
+        if kind == "czml_subscription":
+            return "/czml?" + urlencode({"ids": ",".join(map(str, self.subscription)), "duration": 600, "step": 60})
+        if kind == "sky":
+            return "/sky?" + urlencode({"lat": round(rng.uniform(-60, 60), 2), "lon": round(rng.uniform(-180, 180), 2),
+                                        "min_elevation": 10})
+        raise ValueError(kind)
+
+    def request(self, kind: str) -> tuple[int, float]:
+        headers = {"Accept-Encoding": "gzip"}
+        if kind == "czml_subscription" and self.etag:
+            headers["If-None-Match"] = self.etag
+        t0 = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self.conn.request("GET", self.path(kind), headers=headers)
+            resp = self.conn.getresponse()
+            resp.read()
+            status = resp.status
+            if kind == "czml_subscription" and status == 200:
+                self.etag = resp.getheader("ETag")
+        except (OSError, http.client.HTTPException):
+            status = 0
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+        return status, time.perf_counter() - t0
+
+    def run(self):
+        kinds, weights = zip(*self.profile.mix.items())
+        if self.think:
+            time.sleep(self.rng.uniform(0, self.think))   # don't start every client in the same instant
+        while time.perf_counter() < self.deadline:
+            kind = self.rng.choices(kinds, weights)[0]
+            status, seconds = self.request(kind)
+            self.samples.append((kind, status, seconds))
+            if self.think:
+                time.sleep(min(self.rng.expovariate(1 / self.think), max(0.0, self.deadline - time.perf_counter())))
+        if self.conn is not None:
+            self.conn.close()
+
+
+# --- Server process -----------------------------------------------------------
+
+def _children(pid: int) -> list[int]:
+    out = []
+    try:
+        for task in Path(f"/proc/{pid}/task").iterdir():
+            text = (task / "children").read_text().split()
+            out += [int(c) for c in text]
+    except OSError:
+        pass
+    return out + [g for c in out for g in _children(c)]
+
+
+def process_usage(pid: int) -> tuple[float, int] | None:
+    """(CPU seconds, RSS bytes) of ``pid`` and its children (uvicorn --workers); None if unavailable."""
+    if psutil is not None:
+        try:
+            procs = [psutil.Process(pid)]
+            procs += procs[0].children(recursive=True)
+            cpu = sum(sum(p.cpu_times()[:2]) for p in procs)
+            return cpu, sum(p.memory_info().rss for p in procs)
+        except psutil.Error:
+            return None
+    if not Path("/proc").is_dir():
+        return None
+    tick, page = os.sysconf("SC_CLK_TCK"), os.sysconf("SC_PAGE_SIZE")
+    cpu = rss = 0
+    for p in [pid] + _children(pid):
+        try:
+            fields = Path(f"/proc/{p}/stat").read_text().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / tick
+            rss += int(Path(f"/proc/{p}/statm").read_text().split()[1]) * page
+        except (OSError, IndexError, ValueError):
+            continue
+    return cpu, rss
+
+
+class ServerSampler(threading.Thread):
+    """CPU (% of one core) and RSS of the server every SAMPLE_INTERVAL seconds."""
+
+    def __init__(self, pid: int | None):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.cpu_pct: list[float] = []
+        self.rss: list[int] = []
+        self._done = threading.Event()
+
+    def run(self):
+        if self.pid is None:
+            return
+        last = process_usage(self.pid)
+        t_last = time.perf_counter()
+        while last is not None and not self._done.wait(SAMPLE_INTERVAL):
+            now, t = process_usage(self.pid), time.perf_counter()
+            if now is None:
+                break
+            self.cpu_pct.append(100.0 * (now[0] - last[0]) / (t - t_last))
+            self.rss.append(now[1])
+            last, t_last = now, t
+
+    def stop(self) -> dict | None:
+        self._done.set()
+        self.join()
+        if not self.cpu_pct:
+            return None
+        return {"cpu_avg_pct": round(float(np.mean(self.cpu_pct)), 1), "cpu_max_pct": round(max(self.cpu_pct), 1),
+                "rss_max_mb": round(max(self.rss) / 2**20, 1), "rss_end_mb": round(self.rss[-1] / 2**20, 1)}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get_json(host: str, port: int, path: str):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        body = resp.read()
+        return resp.status, json.loads(body) if resp.status == 200 else None
+    finally:
+        conn.close()
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", "api:app", "--app-dir", str(SCRIPTS_DIR), "--host", "127.0.0.1",
+           "--port", str(port), "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    proc = subprocess.Popen(cmd, cwd=SCRIPTS_DIR.parent)
+    t0 = time.perf_counter()
+    try:
+        while time.perf_counter() - t0 < STARTUP_TIMEOUT:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+            try:
+                get_json("127.0.0.1", port, "/stats")
+                return proc
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f"uvicorn did not answer within {STARTUP_TIMEOUT:.0f}s")
+    except BaseException:
+        proc.terminate()
+        raise
+
+
+def load_catalog_sample(host: str, port: int) -> dict:
+    """NORAD IDs and search terms for the clients, from the server's own catalog."""
+    status, page = get_json(host, port, "/satellites?limit=1000")
+    if status != 200:
+        raise RuntimeError(f"/satellites answered HTTP {status}")
+    names = [s["OBJECT_NAME"] for s in page["satellites"] if s["OBJECT_NAME"]]
+    words = sorted({w for n in names for w in n.replace("(", " ").replace(")", " ").split() if len(w) >= 3})
+    return {"ids": [s["NORAD_CAT_ID"] for s in page["satellites"] if s["NORAD_CAT_ID"] is not None],
+            "terms": words, "total": page["total"]}
+
+
+# --- Run and report -------------------------------------------------------------
+
+def summarize(samples: list[tuple[str, int, float]], seconds: float) -> dict:
+    lat = np.array([s[2] for s in samples]) * 1000.0
+    status = np.array([s[1] for s in samples])
+    if not len(lat):
+        return {"requests": 0}
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+    return {"requests": len(lat), "errors": int(((status == 0) | (status >= 500)).sum()),
+            "not_modified": int((status == 304).sum()), "rps": round(len(lat) / seconds, 1),
+            "p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2), "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(lat.max()), 2)}
+
+
+def run_step(host: str, port: int, catalog: dict, clients: dict[str, int], duration: float, think: float,
+             pid: int | None, seed: int) -> dict:
+    """Run one set of clients for ``duration`` seconds; per-kind and overall stats plus server usage."""
+    sampler = ServerSampler(pid)
+    deadline = time.perf_counter() + duration
+    threads = [Client(kind, host, port, catalog, deadline, think, seed + i)
+               for i, (kind, n) in enumerate((k, n) for k, n in clients.items() for _ in range(n))]
+    sampler.start()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    server = sampler.stop()
+
+    samples = [s for t in threads for s in t.samples]
+    by_kind = {}
+    for kind in sorted({s[0] for s in samples}):
+        stats = summarize([s for s in samples if s[0] == kind], elapsed)
+        stats["budget_p95_ms"] = LATENCY_BUDGET_MS.get(kind)
+        by_kind[kind] = stats
+    return {"clients": clients, "seconds": round(elapsed, 2), "overall": summarize(samples, elapsed),
+            "requests": by_kind, "server": server}
+
+
+def print_step(step: dict):
+    clients = ", ".join(f"{n} {k}" for k, n in step["clients"].items() if n)
+    o = step["overall"]
+    print(f"\n{clients}: {o['requests']} requests in {step['seconds']:.0f}s "
+          f"({o.get('rps', 0)} req/s, {o.get('errors', 0)} errors)")
+    print(f"  {'request':<20} {'count':>7} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for kind, r in step["requests"].items():
+        budget = r["budget_p95_ms"]
+        over = budget and r["p95_ms"] > budget and r["errors"] < r["requests"]
+        flag = f"  ⚠ p95 over {budget} ms budget" if over else ""
+        print(f"  {kind:<20} {r['requests']:>7} {r['rps']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+              f"{r['errors']:>7}{flag}")
+    s = step["server"]
+    if s:
+        print(f"  server: CPU {s['cpu_avg_pct']}% avg / {s['cpu_max_pct']}% max of one core, "
+              f"RSS {s['rss_max_mb']} MB max")
+    else:
+        print("  server: CPU/RSS not available (no --server-pid, or neither psutil nor /proc)")
+
+
+def compare(steps: list[dict], baseline_path: Path):
+    baseline = {(json.dumps(s["clients"], sort_keys=True), kind): r
+                for s in json.loads(baseline_path.read_text())["steps"] for kind, r in s["requests"].items()}
+    print(f"\nCompared with {baseline_path}:")
+    matched = False
+    for step in steps:
+        key = json.dumps(step["clients"], sort_keys=True)
+        for kind, r in step["requests"].items():
+            old = baseline.get((key, kind))
+            if not old or not old.get("p95_ms") or not old.get("rps"):
+                continue
+            matched = True
+            p95 = r["p95_ms"] / old["p95_ms"]
+            rps = r["rps"] / old["rps"]
+            flag = "  ⚠ regression" if p95 > benchmark.REGRESSION_THRESHOLD or rps < 1 / benchmark.REGRESSION_THRESHOLD else ""
+            print(f"  {kind:<20} x{p95:5.2f} p95  x{rps:5.2f} req/s{flag}")
+    if not matched:
+        print("  ⚠ no step with the same client counts in the baseline")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the API with simulated dashboard/registry/tracker clients")
+    parser.add_argument("--dashboard", type=int, default=5, help="Dashboard clients")
+    parser.add_argument("--registry", type=int, default=10, help="Registry clients")
+    parser.add_argument("--tracker", type=int, default=20, help="Tracker clients")
+    parser.add_argument("--steps", type=float, nargs="+", default=[1.0],
+                        help="Repeat with the client counts multiplied by each factor")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per step")
+    parser.add_argument("--think", type=float, default=1.0, help="Think-time multiplier (0 = closed loop)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--url", help="Test a running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID of the --url server, for CPU/RSS")
+    parser.add_argument("--seed", type=int, default=4589, help="Seed for the clients' request choices")
+    parser.add_argument("--output", type=Path, help="Result file (default bench_results/load-<git-sha>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare against")
+    args = parser.parse_args(argv)
+
+    proc = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port, pid = parts.hostname, parts.port or 80, args.server_pid
+    else:
+        host, port = "127.0.0.1", free_port()
+        proc = start_server(port, args.workers)
+        pid = proc.pid
+        print(f"✓ Started uvicorn on port {port} ({args.workers} worker{'s' if args.workers > 1 else ''})")
+
+    steps = []
+    try:
+        catalog = load_catalog_sample(host, port)
+        print(f"✓ {catalog['total']} satellites in the served catalog")
+        for factor in args.steps:
+            clients = {"dashboard": round(args.dashboard * factor), "registry": round(args.registry * factor),
+                       "tracker": round(args.tracker * factor)}
+            step = run_step(host, port, catalog, clients, args.duration, args.think, pid, args.seed)
+            print_step(step)
+            steps.append(step)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    revision = benchmark.git_revision()
+    output = args.output or benchmark.RESULTS_DIR / f"load-{revision}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "meta": {
+            "revision": revision,
+            "created_utc": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "workers": None if args.url else args.workers,
+            "url": args.url,
+            "duration": args.duration,
+            "think": args.think,
+            "seed": args.seed,
+        },
+        "steps": steps,
+    }, indent=2))
+    print(f"\n✓ Saved results to {output}")
+
+    if args.compare:
+        compare(steps, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Lightweight instrumentation shared by the fetch/parse/write scripts.
+
+    counter("tle_fetch_total", source="n2yo", outcome="ok")
+    observe("http_request_seconds", 0.42, host="api.n2yo.com")
+
+    @timed("parse_tle_block")        # duration histogram + call counter
+    def parse_tle_block(...): ...
+
+    with stage("fetch"):             # timed, logged, cProfile'd with --profile
+        ...
+
+    log("tle_fetched", f"  ✓ Fetched TLE for {norad}", norad_id=norad)
+
+``log`` prints the human message by default; with --log-json every event is
+written to stderr as one JSON object per line instead. Metrics can be written
+in Prometheus text format to --metrics-file at exit or served on
+--metrics-port. Scripts wire this up with ``add_arguments``/``configure_from_args``.
+"""
+
+from __future__ import annotations
+import atexit, bisect, functools, json, sys, threading, time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+PREFIX = "satreg_"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_counters: dict[tuple, float] = {}
+_histograms: dict[tuple, list] = {}  # key -> [per-bucket counts..., overflow, sum, count]
+_config = {"json_logs": False, "profile_dir": None, "metrics_file": None}
+_exporters: set = set()  # metrics files registered at exit / ports being served
+_profiling = threading.local()
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def counter(name: str, value: float = 1, **labels):
+    """Increment a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels):
+    """Record one sample in a histogram."""
+    key = _key(name, labels)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(DEFAULT_BUCKETS) + 3)
+        h[bisect.bisect_left(DEFAULT_BUCKETS, value)] += 1
+        h[-2] += value
+        h[-1] += 1
+
+
+def timed(op: str):
+    """Decorator: record call duration in ``op_duration_seconds`` and count outcomes."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            t0 = time.perf_counter()
+            outcome = "error"
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                observe("op_duration_seconds", time.perf_counter() - t0, op=op)
+                counter("op_calls_total", op=op, outcome=outcome)
+        return inner
+    return wrap
+
+
+@contextmanager
+def stage(name: str):
+    """Time a top-level step, log start/end and profile it when --profile is set."""
+    log("stage_start", None, stage=name)
+    profile_dir = _config["profile_dir"]  # read once: a nested script main() may configure again
+    profiler = None
+    # cProfile allows one active profiler per thread; a stage inside a profiled
+    # stage (pipeline stage -> script main -> its own stages) shows up in the outer profile
+    if profile_dir and not getattr(_profiling, "active", False):
+        import cProfile
+        profiler = cProfile.Profile()
+    t0 = time.perf_counter()
+    if profiler:
+        _profiling.active = True
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            _profiling.active = False
+            out = Path(profile_dir) / f"{name}.prof"
+            out.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(out)
+        elapsed = time.perf_counter() - t0
+        observe("stage_duration_seconds", elapsed, stage=name)
+        log("stage_end", None, stage=name, seconds=round(elapsed, 4))
+
+
+def log(event: str, message: str | None = None, **fields):
+    """Emit a progress event: JSON on stderr with --log-json, else ``message`` on stdout."""
+    if _config["json_logs"]:
+        record = {"ts": datetime.now(timezone.utc).isoformat(), "event": event, **fields}
+        if message:
+            record["msg"] = message.strip()
+        sys.stderr.write(json.dumps(record, default=str) + "\n")
+    elif message is not None:
+        print(message)
+
+
+def _fmt_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render_prometheus() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+    for name in sorted({k[0] for k in counters}):
+        lines.append(f"# TYPE {PREFIX}{name} counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{PREFIX}{name}{_fmt_labels(labels)} {value:g}")
+    for name in sorted({k[0] for k in histograms}):
+        lines.append(f"# TYPE {PREFIX}{name} histogram")
+        for (n, labels), h in sorted(histograms.items()):
+            if n != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(DEFAULT_BUCKETS, h):
+                cumulative += count
+                lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(labels, (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(labels, (('le', '+Inf'),))} {h[-1]}")
+            lines.append(f"{PREFIX}{name}_sum{_fmt_labels(labels)} {h[-2]:g}")
+            lines.append(f"{PREFIX}{name}_count{_fmt_labels(labels)} {h[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> dict:
+    """Counters and histogram sum/count as a plain dict (for summaries and tests)."""
+    with _lock:
+        out = {"counters": {}, "histograms": {}}
+        for (name, labels), value in _counters.items():
+            out["counters"][name + _fmt_labels(labels)] = value
+        for (name, labels), h in _histograms.items():
+            out["histograms"][name + _fmt_labels(labels)] = {"sum": h[-2], "count": h[-1]}
+        return out
+
+
+def write_prometheus(path: Path):
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(render_prometheus())
+    tmp.replace(path)  # atomic for node_exporter's textfile collector
+
+
+def serve_prometheus(port: int) -> "ThreadingHTTPServer":
+    """Serve /metrics on a daemon thread for the lifetime of the process."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # only the exporter needs it
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render_prometheus().encode()
+            self.send_response(200 if self.path == "/metrics" else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def configure(json_logs: bool = False, profile_dir: str | Path | None = None,
+              metrics_file: str | Path | None = None, metrics_port: int | None = None):
+    """Turn on the given options. Options left at their defaults keep their current value,
+    so a script main() called from pipeline.py doesn't undo the pipeline's --log-json/--profile."""
+    with _lock:
+        if json_logs:
+            _config["json_logs"] = True
+        if profile_dir:
+            _config["profile_dir"] = profile_dir
+        if metrics_file:
+            _config["metrics_file"] = metrics_file
+        new_file = bool(metrics_file) and ("file", str(metrics_file)) not in _exporters
+        new_port = bool(metrics_port) and ("port", metrics_port) not in _exporters
+        if new_file:
+            _exporters.add(("file", str(metrics_file)))
+        if new_port:
+            _exporters.add(("port", metrics_port))
+    if new_file:
+        atexit.register(write_prometheus, metrics_file)
+    if new_port:
+        serve_prometheus(metrics_port)
+
+
+def add_arguments(parser):
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--log-json", action="store_true", help="Emit structured JSON log lines on stderr")
+    group.add_argument("--metrics-file", type=Path, help="Write Prometheus text metrics here on exit")
+    group.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while running")
+    group.add_argument("--profile", type=Path, metavar="DIR", help="Write cProfile output per stage into DIR")
+
+
+def configure_from_args(args):
+    configure(json_logs=args.log_json, profile_dir=args.profile,
+              metrics_file=args.metrics_file, metrics_port=args.metrics_port)
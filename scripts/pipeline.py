@@ -0,0 +1,348 @@
+"""Run the catalog update as a dependency graph of stages.
+
+               ┌─> density, geo
+    celestrak ─┼─> decay ─┐            ┌─> feed_master         ┌─> load_db
+               └──────────┼─> master ──┴─> tle_n2yo ───────────┼─> tracks
+    gcat ─────────────────┘                                    ├─> entities
+                                                               └─> feed_tle
+
+Every stage declares the files it reads and writes. After a stage succeeds
+the SHA-256 of those files is stored in data/.pipeline_state.json; on the next
+run a stage whose inputs and outputs still hash the same is skipped. The size
+and modification time of each file are stored too, and files where both are
+unchanged aren't read again, so a run with nothing to do costs a few stat()
+calls per stage. The two download stages have no local inputs and always run,
+but when the data they fetch is unchanged their outputs hash the same and
+everything downstream is skipped. Stages whose dependencies are satisfied run
+in parallel.
+
+Typical nightly cron entry (Linux):
+
+    0 3 * * * cd /path/to/repo && python scripts/pipeline.py >> pipeline.log 2>&1
+
+or ``satreg pipeline`` once the repo is installed with ``pip install -e .``
+(scripts/satreg.py).
+"""
+
+from __future__ import annotations
+import argparse, hashlib, json, os, subprocess, time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import metrics
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / "data"
+STATE_FILE = DATA_DIR / ".pipeline_state.json"
+
+ACTIVE_CSV = DATA_DIR / "active-latest.csv"
+SATCAT_CSV = DATA_DIR / "satcat_master.csv"
+MASTER_CSV = DATA_DIR / "satellite_master_list.csv"
+N2YO_CSV = DATA_DIR / "satellites_with_tle_n2yo.csv"
+N2YO_SCHEMA = DATA_DIR / "postgres_schema_n2yo.sql"
+N2YO_QUARANTINE = DATA_DIR / "quarantine" / N2YO_CSV.name
+DECAY_CSV = DATA_DIR / "decay_forecast.csv"
+DENSITY_DIR = DATA_DIR / "density"
+GEO_DIR = DATA_DIR / "geo"
+TRACKS_PACK = DATA_DIR / "tracks" / "tracks.bin"
+TRACKS_INDEX = DATA_DIR / "tracks" / "index.json"
+ENTITY_MATCHES = DATA_DIR / "entity_matches.csv"
+ENTITY_CONFLICTS = DATA_DIR / "entity_conflicts.csv"
+FEED_DIR = DATA_DIR / "catalog"
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[], None]
+    inputs: list[Path] = field(default_factory=list)
+    outputs: list[Path] = field(default_factory=list)
+    deps: list[str] = field(default_factory=list)
+
+
+def file_hash(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_files(paths: list[Path]) -> dict[str, str | None]:
+    return {str(p.relative_to(ROOT)): file_hash(p) for p in paths}
+
+
+def file_stats(paths: list[Path]) -> dict[str, list[int] | None]:
+    stats = {}
+    for p in paths:
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            stats[str(p.relative_to(ROOT))] = None
+            continue
+        stats[str(p.relative_to(ROOT))] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def load_state() -> dict:
+    if STATE_FILE.exists():
+        return json.loads(STATE_FILE.read_text())
+    return {}
+
+
+def save_state(state: dict):
+    STATE_FILE.write_text(json.dumps(state, indent=2))
+
+
+def is_up_to_date(stage: Stage, state: dict) -> bool:
+    """A stage is skippable when it has local inputs and nothing it touches changed."""
+    prev = state.get(stage.name)
+    if not prev or not stage.inputs:
+        return False
+    if prev.get("stat") and prev["stat"] == file_stats(stage.inputs + stage.outputs):
+        return True  # not touched since the hashes below were taken
+    if prev.get("inputs") != hash_files(stage.inputs):
+        return False
+    current_outputs = hash_files(stage.outputs)
+    return None not in current_outputs.values() and prev.get("outputs") == current_outputs
+
+
+# --- Stage bodies -----------------------------------------------------------
+
+def run_celestrak():
+    import update_active_satellites as ua
+    csv_text = ua.fetch_text(ua.CELESTRAK_URL)
+    records = ua.transform(ua.parse_csv(csv_text))
+    ua.write_json(records, ua.CELESTRAK_URL, ROOT / ua.OUTPUT_JSON)
+    ACTIVE_CSV.write_text(csv_text)
+    archived = ua.maybe_archive(csv_text)
+    if archived:
+        print(f"✓ Archived {archived}")
+
+
+def run_gcat():
+    import scrape_satcat
+    html = scrape_satcat.fetch_satcat_html()
+    if not html:
+        raise RuntimeError("GCAT download failed")
+    result = scrape_satcat.parse_satcat_table(html)
+    if not result:
+        raise RuntimeError("GCAT parse failed")
+    headers, rows = result
+    if not scrape_satcat.save_to_csv(headers, rows, filename=str(SATCAT_CSV)):
+        raise RuntimeError("GCAT save failed")
+
+
+def run_decay():
+    import decay
+    decay.main(["--input", str(ACTIVE_CSV), "--output", str(DECAY_CSV)])
+
+
+def run_density():
+    import density
+    density.main([])
+
+
+def run_geo():
+    import geo
+    geo.main([])
+
+
+def run_master():
+    import scrape_satcat
+    if not scrape_satcat.create_master_list(str(SATCAT_CSV), str(ACTIVE_CSV), str(MASTER_CSV), str(DECAY_CSV)):
+        raise RuntimeError("Master list creation failed")
+
+
+def run_tle_n2yo():
+    import fetch_tle_n2yo
+    fetch_tle_n2yo.main([])
+
+
+def run_tracks():
+    import groundtracks, propagation
+    catalog = propagation.load_catalog(N2YO_CSV)
+    stats = groundtracks.build_all(catalog, groundtracks.DEFAULT_TRACK_TOLERANCE,
+                                   groundtracks.DEFAULT_RING_TOLERANCE)
+    print(f"✓ Ground tracks: {stats['built']} recomputed, {stats['reused']} reused")
+
+
+def run_entities():
+    import entity_resolution
+    entity_resolution.main(["--gcat", str(SATCAT_CSV), "--celestrak", str(ACTIVE_CSV), "--n2yo", str(N2YO_CSV),
+                            "--matches", str(ENTITY_MATCHES), "--conflicts", str(ENTITY_CONFLICTS)])
+
+
+def make_feed(dataset: str, path: Path) -> Callable[[], None]:
+    def run_feed():
+        import catalog_feed
+        catalog_feed.main(["--dataset", dataset, "--input", str(path)])
+    return run_feed
+
+
+def load_db(database_url: str):
+    """Replace the satellites_n2yo table with the N2YO CSV (psql must be on PATH)."""
+    # Same steps fetch_tle_n2yo prints as "Next steps"
+    copy = f"\\copy satellites_n2yo FROM '{N2YO_CSV}' CSV HEADER"
+    subprocess.run(["psql", database_url, "-v", "ON_ERROR_STOP=1", "-f", str(N2YO_SCHEMA)], check=True)
+    subprocess.run(["psql", database_url, "-v", "ON_ERROR_STOP=1", "-c", "TRUNCATE satellites_n2yo"], check=True)
+    subprocess.run(["psql", database_url, "-v", "ON_ERROR_STOP=1", "-c", copy], check=True)
+
+
+def make_load_db(database_url: str) -> Callable[[], None]:
+    def run_load_db():
+        load_db(database_url)
+    return run_load_db
+
+
+def build_stages(database_url: str | None = None) -> list[Stage]:
+    stages = [
+        Stage("celestrak", run_celestrak, outputs=[ACTIVE_CSV]),
+        Stage("gcat", run_gcat, outputs=[SATCAT_CSV]),
+        Stage("density", run_density, inputs=[ACTIVE_CSV],
+              outputs=[DENSITY_DIR / "grids.npy", DENSITY_DIR / "index.json", DENSITY_DIR / "summary.json"],
+              deps=["celestrak"]),
+        Stage("geo", run_geo, inputs=[ACTIVE_CSV], outputs=[GEO_DIR / "state.json", GEO_DIR / "events.json"],
+              deps=["celestrak"]),
+        Stage("decay", run_decay, inputs=[ACTIVE_CSV], outputs=[DECAY_CSV], deps=["celestrak"]),
+        Stage("master", run_master, inputs=[SATCAT_CSV, ACTIVE_CSV, DECAY_CSV], outputs=[MASTER_CSV],
+              deps=["celestrak", "gcat", "decay"]),
+        Stage("tle_n2yo", run_tle_n2yo, inputs=[MASTER_CSV], outputs=[N2YO_CSV, N2YO_SCHEMA, N2YO_QUARANTINE],
+              deps=["master"]),
+        Stage("tracks", run_tracks, inputs=[N2YO_CSV], outputs=[TRACKS_PACK, TRACKS_INDEX],
+              deps=["tle_n2yo"]),
+        Stage("entities", run_entities, inputs=[SATCAT_CSV, ACTIVE_CSV, N2YO_CSV],
+              outputs=[ENTITY_MATCHES, ENTITY_CONFLICTS], deps=["gcat", "celestrak", "tle_n2yo"]),
+        Stage("feed_master", make_feed("master", MASTER_CSV), inputs=[MASTER_CSV],
+              outputs=[FEED_DIR / "master" / "versions.json"], deps=["master"]),
+        Stage("feed_tle", make_feed("tle", N2YO_CSV), inputs=[N2YO_CSV],
+              outputs=[FEED_DIR / "tle" / "versions.json"], deps=["tle_n2yo"]),
+    ]
+    if database_url:
+        stages.append(Stage("load_db", make_load_db(database_url), inputs=[N2YO_CSV, N2YO_SCHEMA],
+                            deps=["tle_n2yo"]))
+    return stages
+
+
+# --- Scheduler ----------------------------------------------------------------
+
+def select_stages(stages: list[Stage], only: list[str] | None) -> list[Stage]:
+    """Restrict to ``only``; dependencies outside the selection are treated as done."""
+    if not only:
+        return stages
+    unknown = set(only) - {s.name for s in stages}
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    return [s for s in stages if s.name in only]
+
+
+def run_pipeline(stages: list[Stage], force: bool = False, jobs: int = 4) -> dict[str, dict]:
+    """Execute stages in dependency order, in parallel where possible.
+
+    Returns:
+        per-stage result dicts with status (ran/skipped/failed/blocked) and seconds
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait  # not needed for --list/--help
+    state = load_state()
+    by_name = {s.name: s for s in stages}
+    pending = dict(by_name)
+    results: dict[str, dict] = {}
+
+    def execute(stage: Stage) -> dict:
+        if not force and is_up_to_date(stage, state):
+            return {"status": "skipped", "seconds": 0.0}
+        t0 = time.perf_counter()
+        with metrics.stage(stage.name):
+            stage.run()
+        missing = [str(p) for p in stage.outputs if not p.exists()]
+        if missing:
+            raise RuntimeError(f"stage produced no {', '.join(missing)}")
+        return {"status": "ran", "seconds": time.perf_counter() - t0}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        while pending or running:
+            for name, stage in list(pending.items()):
+                dep_status = [results.get(d, {}).get("status") for d in stage.deps if d in by_name]
+                if any(s in ("failed", "blocked") for s in dep_status):
+                    results[name] = {"status": "blocked", "seconds": 0.0}
+                    del pending[name]
+                elif all(s in ("ran", "skipped") for s in dep_status):
+                    print(f"▶ {name}")
+                    running[pool.submit(execute, stage)] = stage
+                    del pending[name]
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage = running.pop(fut)
+                try:
+                    results[stage.name] = fut.result()
+                except Exception as e:
+                    print(f"✗ {stage.name} failed: {e}")
+                    results[stage.name] = {"status": "failed", "seconds": 0.0, "error": str(e)}
+                    continue
+                if results[stage.name]["status"] == "ran":
+                    state[stage.name] = {
+                        "inputs": hash_files(stage.inputs),
+                        "outputs": hash_files(stage.outputs),
+                        "stat": file_stats(stage.inputs + stage.outputs),
+                        "finished_utc": datetime.now(timezone.utc).isoformat(),
+                        "seconds": round(results[stage.name]["seconds"], 3),
+                    }
+                    save_state(state)
+                else:
+                    # Same content, maybe rewritten (a download stage re-saving identical data): remember the
+                    # new times so the next run skips without hashing
+                    stat = file_stats(stage.inputs + stage.outputs)
+                    if state[stage.name].get("stat") != stat:
+                        state[stage.name]["stat"] = stat
+                        save_state(state)
+                print(f"✓ {stage.name} {results[stage.name]['status']}")
+    return results
+
+
+def print_timings(stages: list[Stage], results: dict[str, dict]):
+    print("\nStage timings:")
+    for stage in stages:
+        r = results.get(stage.name, {"status": "-", "seconds": 0.0})
+        print(f"  {stage.name:<10} {r['status']:<8} {r['seconds']:8.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the satellite catalog update pipeline")
+    parser.add_argument("--only", nargs="+", help="Run only these stages")
+    parser.add_argument("--force", action="store_true", help="Run stages even if their inputs are unchanged")
+    parser.add_argument("--jobs", type=int, default=4, help="Maximum stages to run in parallel")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="Enable the load_db stage (psql connection string)")
+    parser.add_argument("--list", action="store_true", help="List stages and exit")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+    if args.profile:
+        args.jobs = 1  # cProfile only sees the thread that enabled it; keep stages on one at a time
+
+    stages = select_stages(build_stages(args.database_url), args.only)
+    if args.list:
+        state = load_state()
+        for s in stages:
+            print(f"{s.name:<10} deps={','.join(s.deps) or '-':<16} "
+                  f"{'up-to-date' if is_up_to_date(s, state) else 'stale'}")
+        return
+
+    os.chdir(ROOT)  # the stage scripts resolve some paths relative to the repo root
+    t0 = time.perf_counter()
+    results = run_pipeline(stages, force=args.force, jobs=args.jobs)
+    print_timings(stages, results)
+    print(f"  {'total':<10} {'':<8} {time.perf_counter() - t0:8.2f}s")
+    if any(r["status"] in ("failed", "blocked") for r in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
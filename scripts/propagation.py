@@ -0,0 +1,193 @@
+"""Batched SGP4 propagation over the whole TLE catalog.
+
+One ``SatrecArray.sgp4`` call propagates every satellite at every timestep
+in C; the TEME→ECEF rotation and geodetic conversion are vectorized with
+NumPy. Shapes follow sgp4: positions are (n_sats, n_times, 3) in km.
+
+The catalog is read from the same CSV the tracker pages load
+(data/satellites_with_tle_n2yo.csv) unless SATREG_TLE_CSV points elsewhere.
+"""
+
+from __future__ import annotations
+import hashlib, os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+from sgp4 import omm
+from sgp4.api import Satrec, SatrecArray
+
+import validation
+from satrecord import SatelliteTable
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DEFAULT_TLE_CSV = Path(os.getenv("SATREG_TLE_CSV", DATA_DIR / "satellites_with_tle_n2yo.csv"))
+
+WGS84_A = 6378.137              # km
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+JD_UNIX_EPOCH = 2440587.5
+SIZE_COLUMNS = ("Length", "Diamete", "Span")  # GCAT, metres
+
+
+class Catalog:
+    """Parsed TLEs plus a content version used as a cache key.
+
+    ``sizes`` holds the GCAT Length/Diamete/Span columns (n_sats, 3) in metres,
+    NaN where unknown.
+    """
+
+    def __init__(self, norad_ids: np.ndarray, names: list[str], satrecs: list[Satrec], version: str,
+                 sizes: np.ndarray | None = None):
+        self.norad_ids = norad_ids
+        self.names = names
+        self.satrecs = satrecs
+        self.version = version
+        self.sizes = sizes if sizes is not None else np.full((len(satrecs), 3), np.nan)
+        self._index = {int(n): i for i, n in enumerate(norad_ids)}
+
+    def __len__(self) -> int:
+        return len(self.satrecs)
+
+    def select(self, ids: list[int] | None) -> np.ndarray:
+        """Row indices for ``ids`` (unknown IDs are ignored); all rows when None."""
+        if ids is None:
+            return np.arange(len(self))
+        return np.array([self._index[i] for i in ids if i in self._index], dtype=np.intp)
+
+    def satrec_array(self, rows: np.ndarray) -> SatrecArray:
+        return SatrecArray([self.satrecs[i] for i in rows])
+
+
+def file_version(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def satrec_from_record(rec) -> Satrec | None:
+    """Satrec from TLE_LINE1/2 when present, else from the Celestrak GP (OMM) columns."""
+    l1, l2 = rec.get("TLE_LINE1"), rec.get("TLE_LINE2")
+    try:
+        if l1 and l2:
+            return Satrec.twoline2rv(l1, l2)
+        fields = {k: rec.get(k) for k in ("EPOCH", "MEAN_MOTION", "ECCENTRICITY", "INCLINATION", "RA_OF_ASC_NODE",
+                                         "ARG_OF_PERICENTER", "MEAN_ANOMALY", "BSTAR", "MEAN_MOTION_DOT",
+                                         "MEAN_MOTION_DDOT", "NORAD_CAT_ID")}
+        fields.update(CLASSIFICATION_TYPE=rec.get("CLASSIFICATION_TYPE") or "U", OBJECT_ID=rec.get("OBJECT_ID") or "",
+                      EPHEMERIS_TYPE=rec.get("EPHEMERIS_TYPE") or 0, ELEMENT_SET_NO=rec.get("ELEMENT_SET_NO") or 0,
+                      REV_AT_EPOCH=rec.get("REV_AT_EPOCH") or 0)
+        satrec = Satrec()
+        omm.initialize(satrec, fields)
+        return satrec
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def load_catalog(path: Path = DEFAULT_TLE_CSV) -> Catalog:
+    """Read every row with both TLE lines that passes validation and SGP4 can initialise.
+
+    Epoch staleness isn't checked here: the file's age is the ingest's
+    concern, and an old catalog is still worth propagating.
+    """
+    table = SatelliteTable.from_csv(path, usecols=("NORAD_CAT_ID", "JCAT", "OBJECT_NAME", "N2YO_SAT_NAME", "Name",
+                                                   "TLE_LINE1", "TLE_LINE2", "EPOCH")
+                                    + tuple(col for col, *_ in validation.ELEMENTS) + SIZE_COLUMNS)
+    report = validation.validate_table(table, max_age_days=None)
+    validation.record_metrics(report, "propagation")
+    ids, names, satrecs, sizes = [], [], [], []
+    for rec in (table[i] for i in np.flatnonzero(report.valid)):
+        l1, l2 = rec.get("TLE_LINE1", ""), rec.get("TLE_LINE2", "")
+        if not l1 or not l2:
+            continue
+        try:
+            satrec = Satrec.twoline2rv(l1, l2)
+        except (ValueError, IndexError):
+            continue
+        ids.append(satrec.satnum)
+        names.append(rec.get("N2YO_SAT_NAME") or rec.get("OBJECT_NAME") or rec.get("Name") or f"SAT-{satrec.satnum}")
+        satrecs.append(satrec)
+        sizes.append([rec.get(c, np.nan) for c in SIZE_COLUMNS])
+    return Catalog(np.array(ids, dtype=np.int64), names, satrecs, file_version(path),
+                   np.array(sizes, dtype=float).reshape(-1, 3))
+
+
+_catalog_cache: dict[tuple, Catalog] = {}
+
+
+def get_catalog(path: Path = DEFAULT_TLE_CSV) -> Catalog:
+    """``load_catalog`` memoised on the file's mtime and size."""
+    st = path.stat()
+    key = (str(path), st.st_mtime_ns, st.st_size)
+    if key not in _catalog_cache:
+        _catalog_cache.clear()
+        _catalog_cache[key] = load_catalog(path)
+    return _catalog_cache[key]
+
+
+def time_grid(start: datetime, duration_s: float, step_s: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (offsets_s, jd, fr) for ``start`` + k*step over ``duration_s`` inclusive."""
+    offsets = np.arange(0.0, duration_s + step_s / 2, step_s)
+    unix = start.timestamp() + offsets
+    days = unix / 86400.0
+    jd = np.floor(days) + JD_UNIX_EPOCH
+    fr = days - np.floor(days)
+    return offsets, jd, fr
+
+
+def propagate(sats: SatrecArray, jd: np.ndarray, fr: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """SGP4 for every satellite × time. Returns (error codes, r_teme km, v_teme km/s)."""
+    return sats.sgp4(jd, fr)
+
+
+def gmst(jd: np.ndarray, fr: np.ndarray) -> np.ndarray:
+    """Greenwich mean sidereal time (IAU-82, as used by SGP4) in radians."""
+    t = (jd - 2451545.0 + fr) / 36525.0
+    seconds = (67310.54841 + (876600.0 * 3600 + 8640184.812866) * t
+               + 0.093104 * t ** 2 - 6.2e-6 * t ** 3)
+    return np.mod(np.radians(seconds / 240.0), 2 * np.pi)
+
+
+def teme_to_ecef(r: np.ndarray, jd: np.ndarray, fr: np.ndarray) -> np.ndarray:
+    """Rotate (..., n_times, 3) TEME vectors into the Earth-fixed frame (polar motion ignored)."""
+    theta = gmst(jd, fr)
+    c, s = np.cos(theta), np.sin(theta)
+    out = np.empty_like(r)
+    out[..., 0] = c * r[..., 0] + s * r[..., 1]
+    out[..., 1] = -s * r[..., 0] + c * r[..., 1]
+    out[..., 2] = r[..., 2]
+    return out
+
+
+def ecef_to_geodetic(r: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """WGS84 latitude/longitude (deg) and height (km) from ECEF km, by Bowring's method."""
+    x, y, z = r[..., 0], r[..., 1], r[..., 2]
+    lon = np.degrees(np.arctan2(y, x))
+    p = np.hypot(x, y)
+    b = WGS84_A * (1 - WGS84_F)
+    ep2 = (WGS84_A ** 2 - b ** 2) / b ** 2
+    theta = np.arctan2(z * WGS84_A, p * b)
+    lat = np.arctan2(z + ep2 * b * np.sin(theta) ** 3, p - WGS84_E2 * WGS84_A * np.cos(theta) ** 3)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(lat) ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        alt = np.where(np.abs(np.cos(lat)) > 1e-9, p / np.cos(lat) - n, np.abs(z) - b)
+    return np.degrees(lat), lon, alt
+
+
+def floor_time(t: datetime, step_s: int) -> datetime:
+    """Round ``t`` down to a multiple of ``step_s`` so nearby requests share a cache key."""
+    ts = int(t.timestamp()) // step_s * step_s
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+def parse_time(value: str | None) -> datetime:
+    if not value:
+        return datetime.now(timezone.utc)
+    t = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+
+
+def window_end(start: datetime, duration_s: float) -> datetime:
+    return start + timedelta(seconds=duration_s)
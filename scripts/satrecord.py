@@ -0,0 +1,226 @@
+"""Column-store satellite table shared by the fetch and merge scripts.
+
+CSV rows are parsed once: headers and values are stripped (the master list
+pads both, e.g. ``JCAT `` / ``  900``), numeric columns are typed into
+``array('d')``/``array('q')`` and repeated strings are interned. Rows are
+exposed as ``SatelliteRecord`` views (two slots, no per-row dict), so
+filtering or adding TLE columns never copies a row.
+
+Typed columns read from a file also keep their (stripped) text in
+``raw``, and ``to_csv`` writes that back unchanged: GCAT's ``-`` and
+``1200?`` survive a round trip, where the typed value would come back as
+an empty cell or ``1200.0``. Columns added with ``add_column`` have no
+text and are formatted from their values, floats positionally (``0.00001``,
+not ``1e-05``).
+
+    table = SatelliteTable.from_csv(MASTER_CSV, where=lambda get: get("STATUS") == "ACTIVE")
+    for sat in table:
+        sat["NORAD_CAT_ID"]            # 900 (int), not "  900" or "900.0"
+    table.add_column("TLE_LINE1", lines)
+    table.to_csv(OUT_CSV)
+"""
+
+from __future__ import annotations
+import csv, math, sys
+from array import array
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+csv.field_size_limit(10000000)  # matches fetch_tle_n2yo; GCAT AltNames can be long
+
+MISSING_INT = -(2 ** 63)  # sentinel in 'q' columns; read back as None
+
+INT_FIELDS = {
+    "NORAD_CAT_ID", "JCAT", "ELEMENT_SET_NO", "REV_AT_EPOCH", "EPHEMERIS_TYPE",
+}
+FLOAT_FIELDS = {
+    # Celestrak GP
+    "MEAN_MOTION", "ECCENTRICITY", "INCLINATION", "RA_OF_ASC_NODE", "ARG_OF_PERICENTER",
+    "MEAN_ANOMALY", "SEMIMAJOR_AXIS", "PERIOD", "APOAPSIS", "PERIAPSIS", "BSTAR",
+    "MEAN_MOTION_DOT", "MEAN_MOTION_DDOT",
+    # GCAT
+    "Mass", "DryMass", "TotMass", "Length", "Diamete", "Span", "Perigee", "Apogee", "Inc",
+}
+
+
+def _to_int(value: str) -> int:
+    value = value.lstrip("S")  # GCAT JCAT is "S00900"
+    if not value or value == "-":
+        return MISSING_INT
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return int(float(value))  # pandas wrote "900.0"
+        except ValueError:
+            return MISSING_INT
+
+
+def _to_float(value: str) -> float:
+    if not value or value == "-":
+        return math.nan
+    try:
+        return float(value.rstrip("?"))  # GCAT marks uncertain values with '?'
+    except ValueError:
+        return math.nan
+
+
+def _fmt(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        # Shortest round-tripping digits, but never in exponent form
+        return repr(value) if math.isinf(value) else format(Decimal(repr(value)), "f")
+    return str(value)
+
+
+class SatelliteRecord:
+    """Read-only view of one row; behaves like a small mapping."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "SatelliteTable", index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, name: str):
+        return self._table.value(name, self._index)
+
+    def get(self, name: str, default=None):
+        if name not in self._table.columns:
+            return default
+        value = self._table.value(name, self._index)
+        return default if value is None else value
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._table.columns
+
+    def keys(self) -> list[str]:
+        return list(self._table.columns)
+
+    def as_dict(self) -> dict:
+        return {name: self[name] for name in self._table.columns}
+
+    def __repr__(self) -> str:
+        return f"SatelliteRecord(NORAD_CAT_ID={self.get('NORAD_CAT_ID')!r}, index={self._index})"
+
+
+class SatelliteTable:
+    """Typed columns keyed by (stripped) header name.
+
+    ``raw`` maps typed columns read from a file to their original text, row for row.
+    """
+
+    def __init__(self, columns: dict[str, list | array] | None = None, raw: dict[str, list[str]] | None = None):
+        self.columns: dict[str, list | array] = columns or {}
+        self.raw: dict[str, list[str]] = raw or {}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __iter__(self) -> Iterator[SatelliteRecord]:
+        return (SatelliteRecord(self, i) for i in range(len(self)))
+
+    def __getitem__(self, index: int) -> SatelliteRecord:
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return SatelliteRecord(self, index % len(self))
+
+    def value(self, name: str, index: int):
+        v = self.columns[name][index]
+        if isinstance(v, int) and v == MISSING_INT:
+            return None
+        return v
+
+    def column(self, name: str) -> list | array:
+        return self.columns[name]
+
+    @classmethod
+    def from_rows(cls, header: list[str], rows: Iterable[list[str]],
+                  where: Callable[[Callable[[str], str]], bool] | None = None,
+                  limit: int | None = None, usecols: Iterable[str] | None = None) -> "SatelliteTable":
+        """Build a table from raw string rows.
+
+        ``where`` sees a getter returning the stripped string value of a column,
+        so filtering happens before anything is typed or stored.
+        """
+        header = [h.strip() for h in header]
+        index = {h: i for i, h in enumerate(header) if h}
+        names = [h for h in (usecols or index) if h in index]
+        cols, raw = {}, {}
+        positions = []
+        for h in names:
+            if h in INT_FIELDS:
+                cols[h], convert = array("q"), _to_int
+            elif h in FLOAT_FIELDS:
+                cols[h], convert = array("d"), _to_float
+            else:
+                cols[h] = []
+                positions.append((index[h], cols[h].append, sys.intern, None))
+                continue
+            raw[h] = []
+            positions.append((index[h], cols[h].append, convert, raw[h].append))
+        count = 0
+        for row in rows:
+            if not row:
+                continue  # blank lines (the Celestrak archive has \r\r\n endings); DictReader skips these too
+            if limit is not None and count >= limit:
+                break
+            if where is not None:
+                get = lambda name: row[index[name]].strip() if name in index and index[name] < len(row) else ""
+                if not where(get):
+                    continue
+            width = len(row)
+            for i, append, convert, keep in positions:
+                value = row[i].strip() if i < width else ""
+                append(convert(value))
+                if keep is not None:
+                    keep(sys.intern(value))
+            count += 1
+        return cls(cols, raw)
+
+    @classmethod
+    def from_csv(cls, path: str | Path, **kwargs) -> "SatelliteTable":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            return cls.from_rows(header, reader, **kwargs)
+
+    def add_column(self, name: str, values: Iterable):
+        """Attach (or replace) a column; ``values`` must have one entry per row."""
+        values = list(values)
+        if self.columns and len(values) != len(self):
+            raise ValueError(f"Column {name} has {len(values)} values for {len(self)} rows")
+        self.raw.pop(name, None)  # the new values are what gets written
+        if name in INT_FIELDS:
+            self.columns[name] = array("q", (MISSING_INT if v is None else int(v) for v in values))
+        elif name in FLOAT_FIELDS:
+            self.columns[name] = array("d", (math.nan if v is None else float(v) for v in values))
+        else:
+            self.columns[name] = values
+
+    def take(self, rows: Iterable[int]) -> "SatelliteTable":
+        """New table holding ``rows`` (indices, in the given order) of every column."""
+        rows = list(rows)
+        return SatelliteTable({name: array(col.typecode, (col[i] for i in rows)) if isinstance(col, array)
+                               else [col[i] for i in rows] for name, col in self.columns.items()},
+                              {name: [text[i] for i in rows] for name, text in self.raw.items()})
+
+    def norad_ids(self) -> list[int]:
+        col = self.columns.get("NORAD_CAT_ID") or self.columns.get("JCAT") or array("q")
+        return [v for v in col if v != MISSING_INT]
+
+    def to_csv(self, path: str | Path):
+        names = list(self.columns)
+        # Columns read from a file are written as they were read; only computed ones are formatted
+        cols = [self.raw.get(n, self.columns[n]) for n in names]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            is_int = [isinstance(c, array) and c.typecode == "q" for c in cols]
+            for i in range(len(self)):
+                writer.writerow([_fmt(None if flag and c[i] == MISSING_INT else c[i])
+                                 for c, flag in zip(cols, is_int)])
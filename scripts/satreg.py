@@ -0,0 +1,137 @@
+"""Single entry point for the catalog scripts.
+
+    satreg scrape          Download the GCAT satcat and build the master list    (scrape_satcat.py)
+    satreg master          Rebuild the master list from the saved satcat CSV     (scrape_satcat.py --master-only)
+    satreg fetch-tle       Fetch N2YO TLEs for ACTIVE master-list satellites     (fetch_tle_n2yo.py)
+    satreg update-active   Download Celestrak's active satellites                (update_active_satellites.py)
+    satreg load-db         Load the N2YO CSV into PostgreSQL                     (pipeline.py's load_db stage)
+    satreg serve           Serve the catalog API                                 (api.py)
+    satreg pipeline        Run the whole update as a stage graph                 (pipeline.py)
+    satreg startup         Measure cold-start time of each command and of a no-op pipeline run
+
+Arguments after the command go to that script's own parser, so
+``satreg fetch-tle --help`` shows fetch_tle_n2yo.py's options. A command's
+module is imported only when it runs, and the modules keep pandas, bs4,
+requests and numpy out of their top-level imports where they can, so
+``--help`` and cron runs with nothing to do start in tens of milliseconds.
+``satreg startup`` checks that against STARTUP_BUDGET_MS, including a
+pipeline run of every stage with local inputs once they are all up to date
+(the download stages always run, so they are left out).
+
+Install from the checkout (the scripts read and write data/ in the repo):
+
+    pip install -e .            # or pip install -e ".[scrape]" for satreg scrape/master
+    satreg pipeline --list
+
+Run from the repo root, like the scripts themselves; paths such as
+data/satcat_master.csv are relative to the working directory.
+"""
+
+from __future__ import annotations
+import argparse, importlib, os, subprocess, sys, time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))  # sibling imports, as when a script is run directly
+
+STARTUP_BUDGET_MS = 50.0   # over the bare interpreter's own startup
+
+# command -> (module whose main() runs it, arguments put in front of the user's, help)
+COMMANDS = {
+    "scrape": ("scrape_satcat", [], "Download the GCAT satcat and build the master list"),
+    "master": ("scrape_satcat", ["--master-only"], "Rebuild the master list from the saved satcat CSV"),
+    "fetch-tle": ("fetch_tle_n2yo", [], "Fetch N2YO TLEs for ACTIVE master-list satellites"),
+    "update-active": ("update_active_satellites", [], "Download Celestrak's active satellites"),
+    "load-db": (None, [], "Load the N2YO CSV into PostgreSQL"),
+    "serve": ("api", [], "Serve the catalog API"),
+    "pipeline": ("pipeline", [], "Run the whole update as a stage graph"),
+    "startup": (None, [], "Measure cold-start time of each command and of a no-op pipeline run"),
+}
+
+# Long-running or network-bound anyway; measured but not held to the budget
+NO_BUDGET = {"serve"}
+
+
+def load_db(argv):
+    parser = argparse.ArgumentParser(prog="satreg load-db", description="Load the N2YO CSV into PostgreSQL")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="psql connection string (default $DATABASE_URL)")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    import pipeline
+    pipeline.load_db(args.database_url)
+    print("✓ Loaded satellites_n2yo")
+
+
+def _cold_start(args: list[str], repeat: int) -> float:
+    """Best wall time in ms of ``python <args>`` in a fresh interpreter."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *args], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return min(times)
+
+
+def startup(argv):
+    parser = argparse.ArgumentParser(prog="satreg startup",
+                                     description="Measure cold-start time of satreg, each command's --help "
+                                                 "and a pipeline run with nothing to do")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per command (best is kept)")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help="Allowed time over the bare interpreter's startup")
+    args = parser.parse_args(argv)
+
+    me = str(Path(__file__).resolve())
+    print(f"python -c pass: {_cold_start(['-c', 'pass'], args.repeat):6.1f} ms (subtracted below)")
+    runs = [("--help", [me, "--help"])]
+    runs += [(f"{name} --help", [me, name, "--help"]) for name in COMMANDS if name != "startup"]
+    runs.append(("pipeline --list", [me, "pipeline", "--list"]))
+    over = 0
+    # What a cron run pays when nothing changed: every stage checks its files and is skipped
+    import pipeline
+    local = [s for s in pipeline.build_stages() if s.inputs]
+    state = pipeline.load_state()
+    stale = [s.name for s in local if not pipeline.is_up_to_date(s, state)]
+    if not stale:
+        runs.append(("pipeline (no-op)", [me, "pipeline", "--only", *(s.name for s in local)]))
+    for label, cmd in runs:
+        # Re-measured next to each command so load changes during the run don't skew it
+        ms = _cold_start(cmd, args.repeat) - _cold_start(["-c", "pass"], args.repeat)
+        budget = None if label.split()[0] in NO_BUDGET else args.budget_ms
+        flag = ""
+        if budget is not None and ms > budget:
+            flag = f"  ⚠ over {budget:.0f} ms budget"
+            over += 1
+        print(f"  satreg {label:<22} {ms:7.1f} ms{flag}")
+    if stale:
+        print(f"  satreg {'pipeline (no-op)':<22}       - ms  ⚠ not measured: {', '.join(stale)} not up to date; "
+              f"run 'satreg pipeline' first")
+        over += 1
+    if over:
+        raise SystemExit(1)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog="satreg", description="Satellite catalog tools",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:<15} {help}" for name, (_, _, help) in COMMANDS.items())
+               + "\n\nRun 'satreg <command> --help' for a command's options.")
+    parser.add_argument("command", choices=COMMANDS, metavar="command", help="One of the commands below")
+    # Only the first word is ours: everything after it belongs to the command
+    command = parser.parse_args(argv[:1]).command
+    rest = argv[1:]
+
+    module, prefix, _ = COMMANDS[command]
+    if module is None:
+        return globals()[command.replace("-", "_")](rest)
+    sys.argv[0] = f"satreg {command}"  # so the script's usage line reads "satreg fetch-tle ..."
+    return importlib.import_module(module).main(prefix + rest)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,53 @@
 """
 Satellite Catalog Scraper
 Fetches satellite data from planet4589.org and creates a master CSV list
+
+requests, BeautifulSoup, pandas and entity_resolution (numpy) are imported
+inside the functions that use them, so importing this module - e.g. for
+`satreg scrape --help` - stays cheap.
 """
 
-import requests
-from bs4 import BeautifulSoup
 import csv
-import pandas as pd
+import argparse
 from datetime import datetime
+from pathlib import Path
+
+import metrics
+
+# Joined from decay_forecast.csv when present
+DECAY_COLUMNS = ['LIFETIME_DAYS', 'REENTRY_EARLIEST', 'REENTRY_NOMINAL', 'REENTRY_LATEST', 'DECAY_METHOD']
 
+@metrics.timed("fetch_satcat_html")
 def fetch_satcat_html():
     """Fetch the satellite catalog HTML from planet4589.org"""
+    import requests
+    import http_client
     url = "https://planet4589.org/space/gcat/data/cat/satcat.html"
     
-    print(f"Fetching data from {url}...")
+    metrics.log("fetch_start", f"Fetching data from {url}...", url=url)
     try:
-        response = requests.get(url, timeout=30)
+        response = http_client.get(url)
         response.raise_for_status()
-        print(f"✓ Successfully fetched data ({len(response.content)} bytes)")
+        metrics.log("fetched", f"✓ Successfully fetched data ({len(response.content)} bytes)",
+                    bytes=len(response.content))
         return response.text
     except requests.exceptions.RequestException as e:
-        print(f"✗ Error fetching data: {e}")
+        metrics.log("fetch_failed", f"✗ Error fetching data: {e}", error=str(e))
         return None
 
+@metrics.timed("parse_satcat_table")
 def parse_satcat_table(html_content):
     """Parse the HTML PRE tag and extract satellite data using fixed-width columns"""
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html_content, 'html.parser')
     
     # Find all PRE tags
     pre_tags = soup.find_all('pre')
     if not pre_tags:
-        print("✗ Could not find PRE tags in HTML")
+        metrics.log("parse_failed", "✗ Could not find PRE tags in HTML")
         return None
     
-    print(f"Found {len(pre_tags)} PRE tags")
+    metrics.log("pre_tags", f"Found {len(pre_tags)} PRE tags", count=len(pre_tags))
     
     # The first PRE tag contains the header
     header_text = pre_tags[0].get_text()
@@ -59,7 +73,8 @@ def parse_satcat_table(html_content):
     # Add end position for last column
     col_positions.append(len(header_line))
     
-    print(f"Found {len(headers)} headers: {headers[:10]}... (showing first 10)")
+    metrics.log("headers", f"Found {len(headers)} headers: {headers[:10]}... (showing first 10)",
+                count=len(headers))
     
     # The data is in the subsequent PRE tags
     rows = []
@@ -91,9 +106,10 @@ def parse_satcat_table(html_content):
             if len(row_data) > 0:
                 rows.append(row_data)
     
-    print(f"✓ Extracted {len(rows)} satellite entries")
+    metrics.log("parsed", f"✓ Extracted {len(rows)} satellite entries", rows=len(rows))
     return headers, rows
 
+@metrics.timed("save_to_csv")
 def save_to_csv(headers, rows, filename='data/satcat_master.csv'):
     """Save the parsed data to CSV"""
     try:
@@ -101,44 +117,57 @@ def save_to_csv(headers, rows, filename='data/satcat_master.csv'):
             writer = csv.writer(f)
             writer.writerow(headers)
             writer.writerows(rows)
-        print(f"✓ Saved {len(rows)} entries to {filename}")
+        metrics.log("saved", f"✓ Saved {len(rows)} entries to {filename}", rows=len(rows), path=filename)
         return True
     except Exception as e:
-        print(f"✗ Error saving CSV: {e}")
+        metrics.log("save_failed", f"✗ Error saving CSV: {e}", error=str(e))
         return False
 
+@metrics.timed("load_active_satellites")
 def load_active_satellites(active_csv='data/active-20251004.csv'):
     """Load the active satellites list"""
+    import pandas as pd
     try:
         df = pd.read_csv(active_csv)
-        print(f"✓ Loaded {len(df)} active satellites from {active_csv}")
+        metrics.log("active_loaded", f"✓ Loaded {len(df)} active satellites from {active_csv}",
+                    rows=len(df), path=active_csv)
         return df
     except Exception as e:
-        print(f"✗ Error loading active satellites: {e}")
+        metrics.log("active_load_failed", f"✗ Error loading active satellites: {e}", error=str(e))
         return None
 
+@metrics.timed("create_master_list")
 def create_master_list(satcat_csv='data/satcat_master.csv', 
                        active_csv='data/active-20251004.csv',
-                       output_csv='data/satellite_master_list.csv'):
+                       output_csv='data/satellite_master_list.csv',
+                       decay_csv='data/decay_forecast.csv',
+                       resolve=True):
     """
     Create a master satellite list by cross-referencing satcat with active satellites
+    
+    Active records whose ID has no satcat entry are matched by international
+    designator and name (scripts/entity_resolution.py) when resolve is set.
+    Lifetime/reentry columns from decay_csv (scripts/decay.py) are joined in
+    when that file exists.
     """
-    print("\n=== Creating Master Satellite List ===")
+    import pandas as pd
+    import entity_resolution
+    metrics.log("master_start", "\n=== Creating Master Satellite List ===")
     
     # Load both datasets
     try:
         satcat_df = pd.read_csv(satcat_csv)
         active_df = pd.read_csv(active_csv)
         
-        print(f"✓ Loaded {len(satcat_df)} satellites from satcat")
-        print(f"✓ Loaded {len(active_df)} active satellites")
+        metrics.log("satcat_loaded", f"✓ Loaded {len(satcat_df)} satellites from satcat", rows=len(satcat_df))
+        metrics.log("active_loaded", f"✓ Loaded {len(active_df)} active satellites", rows=len(active_df))
         
         # Identify common key columns (likely NORAD_CAT_ID or similar)
         satcat_cols = satcat_df.columns.tolist()
         active_cols = active_df.columns.tolist()
         
-        print(f"\nSatcat columns: {satcat_cols[:5]}...")
-        print(f"Active columns: {active_cols[:5]}...")
+        metrics.log("columns", f"\nSatcat columns: {satcat_cols[:5]}...\nActive columns: {active_cols[:5]}...",
+                    satcat_columns=len(satcat_cols), active_columns=len(active_cols))
         
         # Try to find common identifier column
         # Common identifiers: NORAD_CAT_ID, OBJECT_ID, INTLDES, etc.
@@ -166,32 +195,45 @@ def create_master_list(satcat_csv='data/satcat_master.csv',
                     active_id_col = col
                     break
         
-        print(f"\nUsing ID columns:")
-        print(f"  Satcat: {satcat_id_col}")
-        print(f"  Active: {active_id_col}")
+        metrics.log("id_columns", f"\nUsing ID columns:\n  Satcat: {satcat_id_col}\n  Active: {active_id_col}",
+                    satcat=satcat_id_col, active=active_id_col)
         
         if not satcat_id_col or not active_id_col:
-            print("✗ Could not identify common ID column")
+            metrics.log("master_failed", "✗ Could not identify common ID column")
             return False
         
         # Convert JCAT to integer (remove 'S' prefix)
         satcat_df[satcat_id_col] = satcat_df[satcat_id_col].str.replace('S', '').astype(int)
-        print(f"✓ Converted {satcat_id_col} from 'S00001' to integer format")
+        metrics.log("ids_converted", f"✓ Converted {satcat_id_col} from 'S00001' to integer format")
+        
+        # Join key: the active ID, or the satcat entry it resolves to by designator/name
+        int_cols = [c for c in active_df.columns if pd.api.types.is_integer_dtype(active_df[c])]
+        active_df['_JOIN_ID'] = active_df[active_id_col].astype(int)
+        unmatched = ~active_df['_JOIN_ID'].isin(satcat_df[satcat_id_col])
+        if resolve and unmatched.any():
+            index = entity_resolution.GcatIndex.from_records(satcat_df.to_dict('records'), satcat_cols)
+            records = active_df.loc[unmatched, ['_JOIN_ID', 'OBJECT_ID', 'OBJECT_NAME']].itertuples(index=False)
+            matches = entity_resolution.resolve_all(index, 'celestrak', records)
+            resolved = {m.source_id: m.jcat for m in matches if entity_resolution.is_resolved(m)}
+            active_df.loc[unmatched, '_JOIN_ID'] = active_df.loc[unmatched, '_JOIN_ID'].replace(resolved)
+            metrics.log("ids_resolved",
+                        f"✓ Resolved {len(resolved)} of {int(unmatched.sum())} unmatched active IDs by designator/name",
+                        unmatched=int(unmatched.sum()), resolved=len(resolved))
         
         # Add STATUS column to satcat
         satcat_df['STATUS'] = 'INACTIVE'
         
         # Mark satellites as ACTIVE if they exist in active list
-        active_ids = set(active_df[active_id_col].astype(int))
+        active_ids = set(active_df['_JOIN_ID'])
         satcat_df.loc[satcat_df[satcat_id_col].isin(active_ids), 'STATUS'] = 'ACTIVE'
         
         active_count = (satcat_df['STATUS'] == 'ACTIVE').sum()
         inactive_count = (satcat_df['STATUS'] == 'INACTIVE').sum()
         
-        print(f"\n✓ Status summary:")
-        print(f"  Active: {active_count}")
-        print(f"  Inactive: {inactive_count}")
-        print(f"  Total: {len(satcat_df)}")
+        metrics.log("status_summary",
+                    f"\n✓ Status summary:\n  Active: {active_count}\n  Inactive: {inactive_count}\n"
+                    f"  Total: {len(satcat_df)}",
+                    active=int(active_count), inactive=int(inactive_count), total=len(satcat_df))
         
         # Merge additional data from active satellites
         if satcat_id_col and active_id_col:
@@ -199,64 +241,100 @@ def create_master_list(satcat_csv='data/satcat_master.csv',
             master_df = satcat_df.merge(
                 active_df, 
                 left_on=satcat_id_col, 
-                right_on=active_id_col, 
+                right_on='_JOIN_ID', 
                 how='left',
                 suffixes=('_SATCAT', '_ACTIVE')
-            )
-            print(f"✓ Merged data from both sources")
+            ).drop(columns='_JOIN_ID')
+            # Unmatched rows are NaN; keep integer columns integral ("900", not "900.0")
+            for col in int_cols:
+                for name in (col, col + '_ACTIVE'):
+                    if name in master_df.columns:
+                        master_df[name] = master_df[name].astype('Int64')
+            metrics.log("merged", "✓ Merged data from both sources", rows=len(master_df))
         else:
             master_df = satcat_df
         
+        if decay_csv and Path(decay_csv).exists():
+            decay_df = pd.read_csv(decay_csv, usecols=['NORAD_CAT_ID'] + DECAY_COLUMNS)
+            master_df = master_df.merge(decay_df.rename(columns={'NORAD_CAT_ID': '_DECAY_ID'}),
+                                        left_on=satcat_id_col, right_on='_DECAY_ID', how='left')
+            master_df = master_df.drop(columns='_DECAY_ID')
+            metrics.log("decay_merged", f"✓ Joined reentry forecasts for {len(decay_df)} objects",
+                        rows=len(decay_df))
+        
         # Add metadata
         master_df['LAST_UPDATED'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         master_df['DATA_SOURCE'] = 'planet4589.org + Celestrak'
         
         # Save master list
         master_df.to_csv(output_csv, index=False)
-        print(f"\n✓ Master list saved to {output_csv}")
-        print(f"  Total entries: {len(master_df)}")
-        print(f"  Columns: {len(master_df.columns)}")
+        metrics.log("master_saved",
+                    f"\n✓ Master list saved to {output_csv}\n  Total entries: {len(master_df)}\n"
+                    f"  Columns: {len(master_df.columns)}",
+                    path=output_csv, rows=len(master_df), columns=len(master_df.columns))
         
         return True
         
     except Exception as e:
-        print(f"✗ Error creating master list: {e}")
+        metrics.log("master_failed", f"✗ Error creating master list: {e}", error=str(e))
         import traceback
         traceback.print_exc()
         return False
 
-def main():
+def main(argv=None):
     """Main execution flow"""
+    parser = argparse.ArgumentParser(description="Scrape the GCAT satcat and build the master list")
+    parser.add_argument("--master-only", action="store_true",
+                        help="Skip the download; rebuild the master list from the saved satcat CSV")
+    parser.add_argument("--satcat", default='data/satcat_master.csv', help="Satcat CSV (written, then read)")
+    parser.add_argument("--active", default='data/active-20251004.csv', help="Active satellites CSV")
+    parser.add_argument("--output", default='data/satellite_master_list.csv', help="Master list CSV")
+    parser.add_argument("--decay", default='data/decay_forecast.csv', help="Decay forecast CSV (joined if present)")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+
+    if args.master_only:
+        with metrics.stage("master"):
+            if not create_master_list(args.satcat, args.active, args.output, args.decay):
+                raise SystemExit(1)
+        return
+
     print("=" * 60)
     print("SATELLITE CATALOG SCRAPER")
     print("=" * 60)
     
     # Step 1: Fetch HTML
-    html_content = fetch_satcat_html()
+    with metrics.stage("fetch"):
+        html_content = fetch_satcat_html()
     if not html_content:
         return
     
     # Step 2: Parse table
-    result = parse_satcat_table(html_content)
+    with metrics.stage("parse"):
+        result = parse_satcat_table(html_content)
     if not result:
         return
     
     headers, rows = result
     
     # Step 3: Save to CSV
-    if not save_to_csv(headers, rows):
+    with metrics.stage("save"):
+        saved = save_to_csv(headers, rows, filename=args.satcat)
+    if not saved:
         return
     
     # Step 4: Create master list
     print("\n" + "=" * 60)
-    create_master_list()
+    with metrics.stage("master"):
+        create_master_list(args.satcat, args.active, args.output, args.decay)
     
     print("\n" + "=" * 60)
     print("✓ COMPLETE!")
     print("=" * 60)
     print("\nGenerated files:")
-    print("  1. data/satcat_master.csv - Raw satellite catalog")
-    print("  2. data/satellite_master_list.csv - Master list with status")
+    print(f"  1. {args.satcat} - Raw satellite catalog")
+    print(f"  2. {args.output} - Master list with status")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,253 @@
+"""Generate synthetic satellite catalogs in every format the scripts ingest.
+
+Objects are drawn from a seeded RNG with a realistic orbit mix (mostly LEO,
+plus MEO, GEO and HEO) and rendered as:
+
+    gcat_html()      planet4589 satcat.html (fixed-width PRE blocks)
+    celestrak_csv()  Celestrak GP CSV, same columns as data/active-*.csv
+    tle_text()       3-line TLE file with valid checksums
+    n2yo_json()      one N2YO /satellite/tle response body per object
+
+NORAD IDs start at 900 and wrap around within 1..99999, since a TLE has
+five columns for them; catalogs over 99,099 objects therefore repeat IDs,
+but every object keeps a distinct OBJECT_ID (international designator).
+
+Used by benchmark.py; can also be run directly to write sample files.
+"""
+
+from __future__ import annotations
+import argparse, csv, io, json, math, random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+MU_EARTH = 398600.4418  # km^3/s^2
+R_EARTH = 6378.137      # km
+
+GCAT_COLUMNS = [
+    "JCAT", "Satcat", "Launch_Tag", "Piece", "Type", "Name", "PLName", "LDate", "Parent",
+    "SDate", "Primary", "DDate", "Status", "Dest", "Owner", "State", "Manufacturer", "Bus",
+    "Motor", "Mass", "DryMass", "TotMass", "Length", "Diamete", "Span", "Shape", "ODate",
+    "Perigee", "Apogee", "Inc", "OpOrbit", "OQUAL", "AltNames",
+]
+
+CELESTRAK_COLUMNS = [
+    "OBJECT_NAME", "OBJECT_ID", "EPOCH", "MEAN_MOTION", "ECCENTRICITY", "INCLINATION",
+    "RA_OF_ASC_NODE", "ARG_OF_PERICENTER", "MEAN_ANOMALY", "EPHEMERIS_TYPE",
+    "CLASSIFICATION_TYPE", "NORAD_CAT_ID", "ELEMENT_SET_NO", "REV_AT_EPOCH", "BSTAR",
+    "MEAN_MOTION_DOT", "MEAN_MOTION_DDOT",
+]
+
+# (weight, orbit class, mean motion range rev/day, eccentricity range, inclination choices)
+ORBIT_MIX = [
+    (0.82, "LEO/I", (14.0, 15.9), (0.0001, 0.004), (53.0, 97.6, 43.0, 70.0, 87.9, 51.6)),
+    (0.06, "MEO", (1.9, 2.3), (0.0001, 0.01), (55.0, 56.0, 64.8)),
+    (0.08, "GEO/S", (1.0020, 1.0035), (0.0, 0.0008), (0.02, 0.05, 0.1, 3.0)),
+    (0.04, "HEO", (2.0, 2.3), (0.6, 0.7), (63.4, 28.5)),
+]
+
+OWNERS = ["SPX", "NASA", "ESA", "CNSA", "ISRO", "JAXA", "ROSCOSMOS", "ONEWEB", "PLANET", "NRL"]
+STATES = ["US", "F", "CN", "IN", "J", "SU", "UK"]
+NAME_STEMS = ["STARLINK", "ONEWEB", "FLOCK", "COSMOS", "IRIDIUM", "GPS BIIF", "GALILEO",
+              "INTELSAT", "SES", "LEMUR", "YAOGAN", "CALSPHERE", "NOAA", "SENTINEL"]
+MAX_NORAD_ID = 99999   # largest ID that fits the 5-digit TLE field
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def tle_checksum(line: str) -> int:
+    """Mod-10 checksum over columns 1-68: digits count their value, '-' counts 1."""
+    return sum(int(c) if c.isdigit() else c == "-" for c in line[:68]) % 10
+
+
+def _tle_decimal(x: float) -> str:
+    """Format first-derivative mean motion as ' .00001381' (10 chars)."""
+    return ("-" if x < 0 else " ") + f"{abs(x):.8f}"[1:]
+
+
+def _tle_exp(x: float) -> str:
+    """Format an assumed-decimal exponent field as ' 14054-2' (8 chars)."""
+    if x == 0:
+        return " 00000-0"
+    exp = math.floor(math.log10(abs(x))) + 1
+    digits = round(abs(x) / 10 ** exp * 1e5)
+    if digits >= 100000:
+        digits //= 10
+        exp += 1
+    return ("-" if x < 0 else " ") + f"{digits:05d}" + ("-" if exp < 0 else "+") + str(abs(exp))
+
+
+def format_tle(obj: dict) -> tuple[str, str]:
+    epoch = obj["EPOCH"]
+    doy = (epoch - datetime(epoch.year, 1, 1, tzinfo=timezone.utc)).total_seconds() / 86400 + 1
+    intl = obj["OBJECT_ID"][2:4] + obj["OBJECT_ID"][5:]
+    l1 = (f"1 {obj['NORAD_CAT_ID']:05d}U {intl:<8} {epoch.year % 100:02d}{doy:012.8f} "
+          f"{_tle_decimal(obj['MEAN_MOTION_DOT'])} {_tle_exp(obj['MEAN_MOTION_DDOT'])} "
+          f"{_tle_exp(obj['BSTAR'])} 0 {obj['ELEMENT_SET_NO']:4d}")
+    l2 = (f"2 {obj['NORAD_CAT_ID']:05d} {obj['INCLINATION']:8.4f} {obj['RA_OF_ASC_NODE']:8.4f} "
+          f"{round(obj['ECCENTRICITY'] * 1e7):07d} {obj['ARG_OF_PERICENTER']:8.4f} "
+          f"{obj['MEAN_ANOMALY']:8.4f} {obj['MEAN_MOTION']:11.8f}{obj['REV_AT_EPOCH'] % 100000:5d}")
+    return l1 + str(tle_checksum(l1)), l2 + str(tle_checksum(l2))
+
+
+def _piece(k: int) -> str:
+    """Piece letters of the k-th object (0-based) from one launch: A..Z, AA..ZZ, AAA.."""
+    letters = ""
+    k += 1
+    while k:
+        k, r = divmod(k - 1, 26)
+        letters = chr(ord("A") + r) + letters
+    return letters
+
+
+def generate_objects(n: int, seed: int = 4589, epoch: datetime | None = None) -> list[dict]:
+    """Draw ``n`` objects with NORAD IDs starting at 900 (like the real catalog), wrapping at MAX_NORAD_ID."""
+    rng = random.Random(seed)
+    base_epoch = epoch or datetime(2025, 10, 3, tzinfo=timezone.utc)
+    weights = [m[0] for m in ORBIT_MIX]
+    objects = []
+    pieces: dict[tuple[int, int], int] = {}  # objects so far per (year, launch number)
+    for i in range(n):
+        _, op_orbit, n_range, e_range, incs = rng.choices(ORBIT_MIX, weights)[0]
+        norad = (900 + i - 1) % MAX_NORAD_ID + 1
+        launch_year = rng.randint(1964, 2025)
+        launch_no = rng.randint(1, 250)
+        piece = pieces.get((launch_year, launch_no), 0)
+        pieces[(launch_year, launch_no)] = piece + 1
+        launch = datetime(launch_year, rng.randint(1, 12), rng.randint(1, 28))
+        mm = rng.uniform(*n_range)
+        ecc = rng.uniform(*e_range)
+        a = (MU_EARTH / (mm * 2 * math.pi / 86400) ** 2) ** (1 / 3)
+        stem = rng.choice(NAME_STEMS)
+        obj = {
+            "NORAD_CAT_ID": norad,
+            "OBJECT_NAME": f"{stem} {rng.randint(1, 9999)}",
+            "OBJECT_ID": f"{launch_year}-{launch_no:03d}{_piece(piece)}",
+            "EPOCH": base_epoch - timedelta(seconds=rng.uniform(0, 5 * 86400)),
+            "MEAN_MOTION": mm,
+            "ECCENTRICITY": ecc,
+            "INCLINATION": min(max(rng.choice(incs) + rng.uniform(-0.05, 0.05), 0.0), 180.0),
+            "RA_OF_ASC_NODE": rng.uniform(0, 360),
+            "ARG_OF_PERICENTER": rng.uniform(0, 360),
+            "MEAN_ANOMALY": rng.uniform(0, 360),
+            "ELEMENT_SET_NO": 999,
+            "REV_AT_EPOCH": rng.randint(1, 99999),
+            "BSTAR": rng.uniform(-1e-4, 2e-3) if op_orbit == "LEO/I" else 0.0,
+            "MEAN_MOTION_DOT": rng.uniform(-1e-5, 1e-4) if op_orbit == "LEO/I" else 0.0,
+            "MEAN_MOTION_DDOT": 0.0,
+            "PERIGEE": round(a * (1 - ecc) - R_EARTH),
+            "APOGEE": round(a * (1 + ecc) - R_EARTH),
+            "OP_ORBIT": op_orbit,
+            "OWNER": rng.choice(OWNERS),
+            "STATE": rng.choice(STATES),
+            "LAUNCH": launch,
+            "MASS": rng.choice([4, 260, 800, 1500, 5500]),
+            "LENGTH": round(rng.uniform(0.1, 15), 1),
+            "DIAMETER": round(rng.uniform(0.1, 4), 1),
+            "SPAN": round(rng.uniform(0, 30), 1),
+            "PLNAME": stem.title(),
+        }
+        objects.append(obj)
+    return objects
+
+
+def _gcat_date(d: datetime) -> str:
+    return f"{d.year} {MONTHS[d.month - 1]} {d.day:2d}"
+
+
+def gcat_rows(objects: list[dict]) -> list[list[str]]:
+    rows = []
+    for o in objects:
+        launch = _gcat_date(o["LAUNCH"])
+        rows.append([
+            f"S{o['NORAD_CAT_ID']:05d}", f"{o['NORAD_CAT_ID']:05d}", o["OBJECT_ID"][:8], o["OBJECT_ID"],
+            "P", o["OBJECT_NAME"].title(), o["PLNAME"], launch, "-", launch + " 1200?", "Earth", "-",
+            "O", "-", o["OWNER"], o["STATE"], o["OWNER"], "-", "-", str(o["MASS"]), str(o["MASS"]),
+            str(o["MASS"]), str(o["LENGTH"]), str(o["DIAMETER"]), str(o["SPAN"]), "Cyl",
+            launch, str(o["PERIGEE"]), str(o["APOGEE"]), f"{o['INCLINATION']:.2f}", o["OP_ORBIT"],
+            "-", "-",
+        ])
+    return rows
+
+
+def gcat_html(objects: list[dict]) -> str:
+    """Render a satcat.html look-alike: one header PRE, then data PREs of 1000 lines."""
+    rows = gcat_rows(objects)
+    widths = [len(h) + 2 for h in GCAT_COLUMNS]
+    for row in rows:
+        for i, v in enumerate(row):
+            widths[i] = max(widths[i], len(v) + 2)
+    fmt = lambda vals: "".join(v.ljust(w) for v, w in zip(vals, widths)).rstrip()
+    out = ["<html><body><h1>GCAT satcat</h1>", "<pre>" + fmt(GCAT_COLUMNS) + "</pre>"]
+    for start in range(0, len(rows), 1000):
+        block = "\n".join(fmt(r) for r in rows[start:start + 1000])
+        out.append("<pre>\n# Generated block\n" + block + "\n</pre>")
+    out.append("</body></html>")
+    return "\n".join(out)
+
+
+def celestrak_rows(objects: list[dict]) -> list[dict]:
+    return [{
+        "OBJECT_NAME": o["OBJECT_NAME"],
+        "OBJECT_ID": o["OBJECT_ID"],
+        "EPOCH": o["EPOCH"].strftime("%Y-%m-%dT%H:%M:%S.%f"),
+        "MEAN_MOTION": f"{o['MEAN_MOTION']:.8f}",
+        "ECCENTRICITY": f"{o['ECCENTRICITY']:.7f}",
+        "INCLINATION": f"{o['INCLINATION']:.4f}",
+        "RA_OF_ASC_NODE": f"{o['RA_OF_ASC_NODE']:.4f}",
+        "ARG_OF_PERICENTER": f"{o['ARG_OF_PERICENTER']:.4f}",
+        "MEAN_ANOMALY": f"{o['MEAN_ANOMALY']:.4f}",
+        "EPHEMERIS_TYPE": "0",
+        "CLASSIFICATION_TYPE": "U",
+        "NORAD_CAT_ID": str(o["NORAD_CAT_ID"]),
+        "ELEMENT_SET_NO": str(o["ELEMENT_SET_NO"]),
+        "REV_AT_EPOCH": str(o["REV_AT_EPOCH"]),
+        "BSTAR": f"{o['BSTAR']:.8E}",
+        "MEAN_MOTION_DOT": f"{o['MEAN_MOTION_DOT']:.8f}",
+        "MEAN_MOTION_DDOT": "0",
+    } for o in objects]
+
+
+def celestrak_csv(objects: list[dict]) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CELESTRAK_COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(celestrak_rows(objects))
+    return buf.getvalue()
+
+
+def tle_text(objects: list[dict]) -> str:
+    lines = []
+    for o in objects:
+        l1, l2 = format_tle(o)
+        lines += [o["OBJECT_NAME"], l1, l2]
+    return "\r\n".join(lines) + "\r\n"
+
+
+def n2yo_json(objects: list[dict]) -> list[str]:
+    out = []
+    for o in objects:
+        l1, l2 = format_tle(o)
+        out.append(json.dumps({
+            "info": {"satid": o["NORAD_CAT_ID"], "satname": o["OBJECT_NAME"], "transactionscount": 1},
+            "tle": f"{l1}\r\n{l2}",
+        }))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic catalog input files")
+    parser.add_argument("size", type=int, help="Number of objects")
+    parser.add_argument("--out", type=Path, default=Path("synthetic"), help="Output directory")
+    parser.add_argument("--seed", type=int, default=4589)
+    args = parser.parse_args()
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    objects = generate_objects(args.size, seed=args.seed)
+    (args.out / "satcat.html").write_text(gcat_html(objects), encoding="utf-8")
+    (args.out / "active.csv").write_text(celestrak_csv(objects), encoding="utf-8")
+    (args.out / "active.tle").write_text(tle_text(objects), encoding="utf-8")
+    (args.out / "n2yo.jsonl").write_text("\n".join(n2yo_json(objects)) + "\n", encoding="utf-8")
+    print(f"✓ Wrote {args.size} synthetic objects to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
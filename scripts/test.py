@@ -1,48 +1,24 @@
-import requests
 import os
-from pathlib import Path
 
-class SpaceTrackError(Exception):
-    pass
-
-def load_env():
-    """Load environment variables from .env file"""
-    env_path = Path(__file__).parent / '.env'
-    if env_path.exists():
-        with open(env_path) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+import http_client
+from http_client import SpaceTrackError
+from fetch_common import load_env
 
 def fetch_latest_tle_csv(norad_id, username, password):
     """
     Fetch the latest TLE data in CSV format for satellites around a NORAD catalog ID.
-    Uses Space-Track.org session-based authentication.
+    Uses Space-Track.org session-based authentication; the login cookie is
+    saved between runs, so repeated queries don't log in again.
 
     Returns:
         CSV text response
     """
     base = "https://www.space-track.org"
-    login_url = base + "/ajaxauth/login"
     query_url = base + f"/basicspacedata/query/class/tle_latest/NORAD_CAT_ID/{norad_id}/orderby/EPOCH%20desc/limit/1/format/csv"
     
-    # Create a session to persist cookies
-    session = requests.Session()
-    
-    # Login to get authentication cookie
-    login_data = {
-        'identity': username,
-        'password': password
-    }
-    
-    resp = session.post(login_url, data=login_data, timeout=10)
-    if not resp.ok:
-        raise SpaceTrackError(f"Login failed - HTTP {resp.status_code}: {resp.text}")
+    session = http_client.SpaceTrackSession(username, password)
     
-    # Now query with the authenticated session
-    resp = session.get(query_url, timeout=10)
+    resp = session.get(query_url)
     if not resp.ok:
         raise SpaceTrackError(f"Query failed - HTTP {resp.status_code}: {resp.text}")
     
@@ -0,0 +1,253 @@
+"""Reconcile TLEs from every configured source into one table.
+
+Celestrak's bulk ``active`` TLE file is fetched first because it covers the
+whole catalog in a single request. Only NORAD IDs that are missing from it, or
+whose epoch is older than ``--max-age-days``, are passed on to Space-Track,
+queried SPACETRACK_BATCH IDs at a time. Whatever is still missing or stale
+after that goes to N2YO, which only answers one ID per request. For every
+object the candidate with the freshest epoch wins and its source is recorded
+in ``TLE_SOURCE``.
+
+Space-Track is used when ST_USERNAME/ST_PASSWORD are set, N2YO when
+NY2_API_KEY is set (both read from .env like the other fetch scripts).
+"""
+
+from __future__ import annotations
+import argparse, csv, os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import http_client
+import metrics
+import validation
+from satrecord import SatelliteTable
+import update_active_satellites as celestrak
+import fetch_tle_batch as spacetrack
+import fetch_tle_n2yo as n2yo
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DEFAULT_INPUT = DATA_DIR / "satellite_master_list.csv"
+DEFAULT_OUTPUT = DATA_DIR / "satellites_tle_reconciled.csv"
+
+OUTPUT_FIELDS = ["NORAD_CAT_ID", "OBJECT_NAME", "TLE_LINE1", "TLE_LINE2", "TLE_EPOCH", "TLE_SOURCE"]
+
+SPACETRACK_BATCH = 200  # NORAD IDs per Space-Track query
+SPACETRACK_DELAY = 0.5  # seconds between Space-Track queries (see fetch_tle_batch)
+N2YO_DELAY = 1.0        # seconds between N2YO queries (see fetch_tle_n2yo)
+
+
+def tle_epoch(line1: str) -> datetime | None:
+    """Decode the epoch field (columns 19-32, YYDDD.DDDDDDDD) of TLE line 1."""
+    try:
+        field = line1[18:32]
+        year = int(field[:2])
+        day = float(field[2:])
+    except (ValueError, IndexError):
+        return None
+    year += 2000 if year < 57 else 1900
+    return datetime(year, 1, 1, tzinfo=timezone.utc) + timedelta(days=day - 1)
+
+
+def read_norad_ids(csv_path: Path) -> list[int]:
+    """Read NORAD IDs from the master list or a Celestrak CSV.
+
+    Headers and values are stripped (the master list pads them), rows with a
+    STATUS column other than ACTIVE are skipped and float-formatted IDs such
+    as ``900.0`` are accepted.
+    """
+    table = SatelliteTable.from_csv(csv_path, usecols=("NORAD_CAT_ID", "JCAT"),
+                                   where=lambda get: get("STATUS") in ("ACTIVE", ""))  # "" = no STATUS column
+    if "NORAD_CAT_ID" not in table.columns and "JCAT" not in table.columns:
+        raise ValueError(f"No NORAD_CAT_ID or JCAT column in {csv_path}")
+    return list(dict.fromkeys(table.norad_ids()))
+
+
+def _candidate(norad: int, name: str, line1: str, line2: str, source: str) -> dict | None:
+    epoch = tle_epoch(line1)
+    if epoch is None or not line2:
+        return None
+    return {
+        "NORAD_CAT_ID": str(norad),
+        "OBJECT_NAME": name,
+        "TLE_LINE1": line1,
+        "TLE_LINE2": line2,
+        "TLE_EPOCH": epoch,
+        "TLE_SOURCE": source,
+    }
+
+
+@metrics.timed("fetch_celestrak")
+def fetch_celestrak() -> dict[int, dict]:
+    """Fetch the Celestrak bulk TLE file and key candidates by NORAD ID."""
+    out = {}
+    for rec in celestrak.parse_tle_block(celestrak.fetch_text(celestrak.CELESTRAK_TLE_URL)):
+        norad = int(rec["NORAD_CAT_ID"])
+        cand = _candidate(norad, rec["OBJECT_NAME"], rec["TLE_LINE1"], rec["TLE_LINE2"], "celestrak")
+        if cand:
+            out[norad] = cand
+    return out
+
+
+@metrics.timed("fetch_spacetrack")
+def fetch_spacetrack(norad_ids: list[int], username: str, password: str) -> dict[int, dict]:
+    """Query Space-Track ``tle_latest`` SPACETRACK_BATCH IDs at a time on a single session."""
+    out = {}
+    session = spacetrack.create_spacetrack_session(username, password)
+    for i in range(0, len(norad_ids), SPACETRACK_BATCH):
+        if i:
+            http_client.throttle(SPACETRACK_DELAY)
+        found = spacetrack.fetch_tles_for_norads(session, norad_ids[i:i + SPACETRACK_BATCH])
+        for norad, data in found.items():
+            cand = _candidate(norad, data.get("OBJECT_NAME", ""), data.get("TLE_LINE1", ""),
+                              data.get("TLE_LINE2", ""), "spacetrack")
+            if cand:
+                out[norad] = cand
+    return out
+
+
+@metrics.timed("fetch_n2yo")
+def fetch_n2yo(norad_ids: list[int], api_key: str) -> dict[int, dict]:
+    """Query the N2YO TLE endpoint one ID at a time."""
+    out = {}
+    for i, norad in enumerate(norad_ids):
+        if i:
+            http_client.throttle(N2YO_DELAY)
+        data = n2yo.fetch_tle_n2yo(norad, api_key)
+        if not data:
+            continue
+        cand = _candidate(norad, data.get("SAT_NAME", ""), data["TLE_LINE1"], data["TLE_LINE2"], "n2yo")
+        if cand:
+            out[norad] = cand
+    return out
+
+
+def needs_fallback(norad_ids: list[int], bulk: dict[int, dict], max_age: timedelta,
+                   now: datetime | None = None) -> list[int]:
+    """Return the IDs with no bulk TLE or with a bulk epoch older than ``max_age``."""
+    cutoff = (now or datetime.now(timezone.utc)) - max_age
+    return [n for n in norad_ids if n not in bulk or bulk[n]["TLE_EPOCH"] < cutoff]
+
+
+def pick_freshest(*sources: dict[int, dict]) -> dict[int, dict]:
+    """Merge candidate maps, keeping the newest epoch per NORAD ID.
+
+    Ties go to the earlier source, so the bulk file wins over per-ID APIs when
+    both return the same element set.
+    """
+    best: dict[int, dict] = {}
+    for source in sources:
+        for norad, cand in source.items():
+            cur = best.get(norad)
+            if cur is None or cand["TLE_EPOCH"] > cur["TLE_EPOCH"]:
+                best[norad] = cand
+    return best
+
+
+def reconcile(norad_ids: list[int], max_age: timedelta, fallback_limit: int | None = None,
+              spacetrack_creds: tuple[str, str] | None = None,
+              n2yo_key: str | None = None) -> tuple[dict[int, dict], dict]:
+    """Run the bulk fetch, then Space-Track, then N2YO for whatever is still unresolved.
+
+    Returns:
+        (records keyed by NORAD ID, summary stats)
+    """
+    bulk = fetch_celestrak()
+    fallback_ids = needs_fallback(norad_ids, bulk, max_age)
+    if fallback_limit is not None:
+        fallback_ids = fallback_ids[:fallback_limit]
+
+    fetchers = []
+    if spacetrack_creds:
+        fetchers.append(("spacetrack", lambda ids: fetch_spacetrack(ids, *spacetrack_creds)))
+    if n2yo_key:
+        fetchers.append(("n2yo", lambda ids: fetch_n2yo(ids, n2yo_key)))
+    results = {}
+    queried = 0
+    best = pick_freshest(bulk)
+    pending = fallback_ids
+    for name, fetch in fetchers:
+        if not pending:
+            break
+        try:
+            results[name] = fetch(pending)
+        except Exception as e:
+            metrics.log("fallback_failed", f"⚠ {name} fallback failed: {e}", source=name, error=str(e))
+            results[name] = {}
+        queried += len(pending)
+        best = pick_freshest(best, results[name])
+        pending = needs_fallback(pending, best, max_age)
+
+    wanted = set(norad_ids)
+    best = {n: c for n, c in best.items() if n in wanted}
+    for source, found in [("celestrak", bulk), *results.items()]:
+        metrics.counter("tle_candidates_total", len(found), source=source)
+    summary = {
+        "requested": len(norad_ids),
+        "bulk_hits": sum(1 for n in norad_ids if n in bulk),
+        "fallback_queried": queried,
+        "resolved": len(best),
+        "by_source": {},
+    }
+    for cand in best.values():
+        summary["by_source"][cand["TLE_SOURCE"]] = summary["by_source"].get(cand["TLE_SOURCE"], 0) + 1
+    return best, summary
+
+
+@metrics.timed("write_reconciled_csv")
+def write_reconciled_csv(records: dict[int, dict], path: Path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+        for norad in sorted(records):
+            rec = dict(records[norad])
+            rec["TLE_EPOCH"] = rec["TLE_EPOCH"].strftime("%Y-%m-%dT%H:%M:%S.%f")
+            writer.writerow(rec)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcile TLEs from Celestrak, Space-Track and N2YO")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="CSV listing the NORAD IDs to resolve")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Reconciled TLE CSV to write")
+    parser.add_argument("--max-age-days", type=float, default=3.0,
+                        help="Bulk TLEs older than this are re-queried from the per-ID APIs")
+    parser.add_argument("--fallback-limit", type=int, default=500,
+                        help="Cap on IDs passed on to Space-Track and N2YO (rate limits)")
+    parser.add_argument("--no-fallback", action="store_true", help="Use the Celestrak bulk file only")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+
+    n2yo.load_env()
+    st_user, st_pass = os.getenv("ST_USERNAME"), os.getenv("ST_PASSWORD")
+    creds = (st_user, st_pass) if st_user and st_pass and not args.no_fallback else None
+    api_key = os.getenv("NY2_API_KEY") if not args.no_fallback else None
+
+    norad_ids = read_norad_ids(args.input)
+    print(f"✓ Loaded {len(norad_ids)} NORAD IDs from {args.input}")
+    sources = ["celestrak"] + (["spacetrack"] if creds else []) + (["n2yo"] if api_key else [])
+    print(f"Sources: {', '.join(sources)}")
+
+    with metrics.stage("reconcile"):
+        records, summary = reconcile(norad_ids, timedelta(days=args.max_age_days),
+                                     fallback_limit=args.fallback_limit,
+                                     spacetrack_creds=creds, n2yo_key=api_key)
+    with metrics.stage("validate"):
+        table = SatelliteTable({f: [records[n][f] for n in sorted(records)] for f in OUTPUT_FIELDS})
+        report = validation.validate_table(table)
+        validation.record_metrics(report, args.output.stem)
+        validation.quarantine(table, report, validation.quarantine_path(args.output))
+        records = {n: rec for (n, rec), ok in zip(sorted(records.items()), report.valid) if ok}
+    print(f"✓ Validated TLEs: {validation.summary(report)}")
+    with metrics.stage("write"):
+        write_reconciled_csv(records, args.output)
+
+    print(f"✓ Saved {len(records)} reconciled TLEs to {args.output}")
+    print(f"  - Bulk hits: {summary['bulk_hits']}/{summary['requested']}")
+    print(f"  - Fallback queries (IDs): {summary['fallback_queried']}")
+    for source, count in sorted(summary["by_source"].items()):
+        print(f"  - From {source}: {count}")
+    print(f"  - Unresolved: {summary['requested'] - summary['resolved']}")
+
+
+if __name__ == "__main__":
+    main()
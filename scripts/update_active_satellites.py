@@ -10,10 +10,12 @@ Source URLs:
 """
 
 from __future__ import annotations
-import csv, json, argparse, ssl, urllib.request, re
+import csv, json, argparse, re
 from pathlib import Path
 from datetime import datetime, timezone
 
+import metrics
+
 CELESTRAK_URL = "https://celestrak.org/NORAD/elements/gp.php?GROUP=active&FORMAT=csv"
 CELESTRAK_TLE_URL = "https://celestrak.org/NORAD/elements/gp.php?GROUP=active&FORMAT=tle"
 OUTPUT_JSON = "active.json"
@@ -46,19 +48,23 @@ SELECT_FIELDS = [
 TLE_LINE1_RE = re.compile(r"^1 (\d{5})")
 TLE_LINE2_RE = re.compile(r"^2 (\d{5})")
 
+@metrics.timed("fetch_text")
 def fetch_text(url: str) -> str:
-    ctx = ssl.create_default_context()
-    with urllib.request.urlopen(url, context=ctx, timeout=60) as resp:
-        if resp.status != 200:
-            raise RuntimeError(f"Failed to fetch data: HTTP {resp.status}")
-        charset = resp.headers.get_content_charset() or "utf-8"
-        return resp.read().decode(charset)
-
+    import http_client  # requests: only needed once something is downloaded
+    resp = http_client.get(url)
+    if resp.status_code != 200:
+        raise RuntimeError(f"Failed to fetch data: HTTP {resp.status_code}")
+    if "charset" not in resp.headers.get("Content-Type", ""):
+        resp.encoding = "utf-8"
+    return resp.text
+
+@metrics.timed("parse_csv")
 def parse_csv(csv_text: str):
     lines = csv_text.splitlines()
     reader = csv.DictReader(lines)
     return list(reader)
 
+@metrics.timed("transform")
 def transform(records: list[dict], limit: int | None = None):
     out = []
     for i, rec in enumerate(records):
@@ -82,6 +88,7 @@ def transform(records: list[dict], limit: int | None = None):
         out.append(filtered)
     return out
 
+@metrics.timed("parse_tle_block")
 def parse_tle_block(tle_text: str):
     """Parse concatenated TLE text (Name, L1, L2 repeating). Return list of dicts."""
     lines = [l.strip() for l in tle_text.splitlines() if l.strip()]
@@ -110,6 +117,7 @@ def parse_tle_block(tle_text: str):
         i += 3
     return out
 
+@metrics.timed("write_json")
 def write_json(records: list[dict], source_url: str, path: Path):
     meta = {
         "source": source_url,
@@ -120,6 +128,7 @@ def write_json(records: list[dict], source_url: str, path: Path):
     data = {"meta": meta, "satellites": records}
     path.write_text(json.dumps(data, indent=2))
 
+@metrics.timed("write_tle_json")
 def write_tle_json(merged: list[dict], path: Path):
     meta = {
         "source_csv": CELESTRAK_URL,
@@ -140,58 +149,71 @@ def maybe_archive(csv_text: str):
         return str(archive_path)
     return None
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Update active satellite JSON from Celestrak")
     parser.add_argument("--no-archive", action="store_true", help="Do not save daily CSV archive copy")
     parser.add_argument("--limit", type=int, default=None, help="Limit number of satellite records (testing)")
     parser.add_argument("--with-tle", action="store_true", help="Also fetch TLE set and produce satellites_tle.json")
-    args = parser.parse_args()
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
 
-    print("Fetching CSV ...", end="", flush=True)
-    csv_text = fetch_text(CELESTRAK_URL)
-    print(" done.")
+    with metrics.stage("fetch_csv"):
+        csv_text = fetch_text(CELESTRAK_URL)
+    metrics.log("csv_fetched", "Fetching CSV ... done.", bytes=len(csv_text))
 
-    print("Parsing CSV ...", end="", flush=True)
-    records = parse_csv(csv_text)
-    print(f" {len(records)} rows.")
+    with metrics.stage("parse_csv"):
+        records = parse_csv(csv_text)
+    metrics.log("csv_parsed", f"Parsing CSV ... {len(records)} rows.", rows=len(records))
 
-    print("Transforming records ...", end="", flush=True)
-    transformed = transform(records, limit=args.limit)
-    print(f" kept {len(transformed)}.")
+    with metrics.stage("transform"):
+        transformed = transform(records, limit=args.limit)
+    metrics.log("transformed", f"Transforming records ... kept {len(transformed)}.", rows=len(transformed))
 
-    print("Writing JSON ...", end="", flush=True)
-    write_json(transformed, CELESTRAK_URL, Path(OUTPUT_JSON))
-    print(" done.")
+    with metrics.stage("write_json"):
+        write_json(transformed, CELESTRAK_URL, Path(OUTPUT_JSON))
+    metrics.log("json_written", "Writing JSON ... done.", path=OUTPUT_JSON)
 
     if args.with_tle:
-        print("Fetching TLE ...", end="", flush=True)
-        tle_text = fetch_text(CELESTRAK_TLE_URL)
-        print(" done.")
-        print("Parsing TLE ...", end="", flush=True)
-        tle_records = parse_tle_block(tle_text)
-        print(f" {len(tle_records)} TLE triplets.")
+        with metrics.stage("fetch_tle"):
+            tle_text = fetch_text(CELESTRAK_TLE_URL)
+        metrics.log("tle_fetched", "Fetching TLE ... done.", bytes=len(tle_text))
+        with metrics.stage("parse_tle"):
+            tle_records = parse_tle_block(tle_text)
+        metrics.log("tle_parsed", f"Parsing TLE ... {len(tle_records)} TLE triplets.", rows=len(tle_records))
         # Merge on NORAD_CAT_ID
-        tle_map = {r["NORAD_CAT_ID"]: r for r in tle_records}
-        merged = []
-        for rec in transformed:
-            norad = str(rec.get("NORAD_CAT_ID"))
-            t = tle_map.get(norad)
-            if t:
-                merged.append({**rec, "TLE_LINE1": t["TLE_LINE1"], "TLE_LINE2": t["TLE_LINE2"]})
-        print(f"Merged {len(merged)} records with TLE.")
-        print("Writing TLE JSON ...", end="", flush=True)
-        write_tle_json(merged, Path(OUTPUT_TLE_JSON))
-        print(" done.")
+        with metrics.stage("merge_tle"):
+            # Keyed as int: the TLE text zero-pads catalog numbers ("00900"), the CSV doesn't
+            tle_map = {int(r["NORAD_CAT_ID"]): r for r in tle_records}
+            merged = []
+            for rec in transformed:
+                t = tle_map.get(int(rec["NORAD_CAT_ID"])) if rec.get("NORAD_CAT_ID") else None
+                if t:
+                    merged.append({**rec, "TLE_LINE1": t["TLE_LINE1"], "TLE_LINE2": t["TLE_LINE2"]})
+        metrics.log("tle_merged", f"Merged {len(merged)} records with TLE.", rows=len(merged))
+        import validation
+        from satrecord import SatelliteTable
+        with metrics.stage("validate_tle"):
+            fields = SELECT_FIELDS + ["TLE_LINE1", "TLE_LINE2"]
+            table = SatelliteTable({k: [rec.get(k) for rec in merged] for k in fields})
+            report = validation.validate_table(table)
+            validation.record_metrics(report, Path(OUTPUT_TLE_JSON).stem)
+            validation.quarantine(table, report, validation.quarantine_path(Path(OUTPUT_TLE_JSON)).with_suffix(".csv"))
+            merged = [rec for rec, ok in zip(merged, report.valid) if ok]
+        metrics.log("tle_validated", f"Validating TLE ... {validation.summary(report)}.",
+                    rows=len(report), quarantined=int((~report.valid).sum()))
+        with metrics.stage("write_tle_json"):
+            write_tle_json(merged, Path(OUTPUT_TLE_JSON))
+        metrics.log("tle_json_written", "Writing TLE JSON ... done.", path=OUTPUT_TLE_JSON)
 
     if not args.no_archive:
-        print("Archiving raw CSV ...", end="", flush=True)
         archived = maybe_archive(csv_text)
         if archived:
-            print(f" saved {archived}")
+            metrics.log("archived", f"Archiving raw CSV ... saved {archived}", path=archived)
         else:
-            print(" already exists for today; skipped")
+            metrics.log("archive_skipped", "Archiving raw CSV ... already exists for today; skipped")
 
-    print("Update complete.")
+    metrics.log("done", "Update complete.")
 
 if __name__ == "__main__":
     main()
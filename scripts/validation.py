@@ -0,0 +1,330 @@
+"""Batch data-quality checks for TLE and catalog rows.
+
+Every check runs over whole columns at once: TLE lines become an
+(n_rows, 69) byte matrix, so checksums and fixed-column fields are NumPy
+operations rather than per-row string parsing. A row failing any check is
+quarantined with the names of the checks it failed:
+
+    tle_incomplete      only one of TLE_LINE1/TLE_LINE2 is present
+    line_length         a line is not 69 characters
+    line_number         line 1 doesn't start "1 " or line 2 doesn't start "2 "
+    checksum            mod-10 checksum (column 69) doesn't match either line
+    norad_mismatch      catalog number differs between the lines or from NORAD_CAT_ID
+    epoch_unreadable    line 1 epoch (columns 19-32) doesn't parse
+    epoch_stale         epoch older than --max-age-days
+    epoch_future        epoch more than a day ahead of now
+    eccentricity_range  eccentricity missing from the TLE or outside [0, 1) in the CSV
+    mean_motion_range   TLE mean motion not in (0, 20] rev/day
+    element_mismatch    CSV orbital elements disagree with the TLE-encoded ones
+    duplicate_norad     NORAD ID already taken by a better row (valid first, newest epoch)
+
+Rows without any TLE are checked as catalog rows only. CSV elements are
+compared field by field within the TLE's printed precision when the CSV
+EPOCH is the TLE's epoch; otherwise the CSV describes an older or newer
+element set and only inclination, eccentricity and mean motion, which
+drift slowly, are compared with loose tolerances.
+
+    python scripts/validation.py
+    python scripts/validation.py --input data/satellites_with_tle_n2yo.csv --max-age-days 14
+"""
+
+from __future__ import annotations
+import argparse
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+import metrics
+from satrecord import MISSING_INT, SatelliteTable
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DEFAULT_INPUT = DATA_DIR / "satellites_with_tle_n2yo.csv"
+QUARANTINE_DIR = DATA_DIR / "quarantine"
+REASON_COLUMN = "QUARANTINE_REASON"
+
+TLE_LENGTH = 69
+DEFAULT_MAX_AGE_DAYS = 30.0
+MAX_FUTURE_DAYS = 1.0
+MAX_MEAN_MOTION = 20.0  # rev/day; decaying objects reach ~16.5
+
+CHECKS = ("tle_incomplete", "line_length", "line_number", "checksum", "norad_mismatch", "epoch_unreadable",
+          "epoch_stale", "epoch_future", "eccentricity_range", "mean_motion_range", "element_mismatch",
+          "duplicate_norad")
+
+# (CSV column, line 2 columns, scale, same-epoch tolerance, different-epoch tolerance or None, is angle)
+ELEMENTS = (
+    ("INCLINATION", (8, 16), 1.0, 2e-4, 0.5, True),
+    ("RA_OF_ASC_NODE", (17, 25), 1.0, 2e-4, None, True),
+    ("ECCENTRICITY", (26, 33), 1e-7, 2e-7, 0.02, False),
+    ("ARG_OF_PERICENTER", (34, 42), 1.0, 2e-4, None, True),
+    ("MEAN_ANOMALY", (43, 51), 1.0, 2e-4, None, True),
+    ("MEAN_MOTION", (52, 63), 1.0, 2e-8, 0.2, False),
+)
+SAME_EPOCH_SECONDS = 1.0
+
+
+@dataclass
+class Report:
+    """Per-check failure masks for one batch; ``valid`` rows failed none."""
+    failures: dict[str, np.ndarray]
+    valid: np.ndarray
+    epochs: np.ndarray  # datetime64[us], NaT without a readable TLE
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def reasons(self) -> list[str]:
+        """';'-joined failed checks per row, '' for valid rows."""
+        out = [""] * len(self.valid)
+        for check in CHECKS:
+            for i in np.flatnonzero(self.failures[check]):
+                out[i] = f"{out[i]};{check}" if out[i] else check
+        return out
+
+    def counts(self) -> dict[str, int]:
+        return {check: int(mask.sum()) for check, mask in self.failures.items() if mask.any()}
+
+
+def _char_matrix(lines: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """(n, 69) uint8 matrix of the lines, space-padded or cut, and their real lengths."""
+    lengths = np.fromiter((len(l) for l in lines), dtype=np.int64, count=len(lines))
+    joined = "".join(l[:TLE_LENGTH].ljust(TLE_LENGTH) for l in lines).encode("ascii", "replace")
+    return np.frombuffer(joined, dtype=np.uint8).reshape(len(lines), TLE_LENGTH), lengths
+
+
+def _checksum_ok(m: np.ndarray) -> np.ndarray:
+    body = m[:, :TLE_LENGTH - 1]
+    digits = np.where((body >= 48) & (body <= 57), body - 48, 0).astype(np.int64)
+    total = digits.sum(axis=1) + (body == ord("-")).sum(axis=1)
+    return total % 10 == m[:, TLE_LENGTH - 1].astype(np.int64) - 48
+
+
+def _field(m: np.ndarray, start: int, end: int) -> np.ndarray:
+    """Fixed columns [start, end) as float; NaN where they don't parse."""
+    raw = np.ascontiguousarray(m[:, start:end]).view(f"S{end - start}").ravel()
+    try:
+        return raw.astype(float)
+    except ValueError:
+        out = np.full(len(raw), np.nan)
+        for i, v in enumerate(raw):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                pass
+        return out
+
+
+def _float_column(values) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+def _id_column(values) -> np.ndarray:
+    """NORAD IDs as int64, -1 where missing or unreadable."""
+    if isinstance(values, array):
+        ids = np.asarray(values, dtype=np.int64)
+        return np.where(ids == MISSING_INT, -1, ids)
+    out = np.full(len(values), -1, dtype=np.int64)
+    for i, v in enumerate(values):
+        try:
+            out[i] = int(v)
+        except (TypeError, ValueError):
+            pass
+    return out
+
+
+def _time_column(values) -> np.ndarray:
+    try:
+        return np.asarray([v or "NaT" for v in values], dtype="datetime64[us]")
+    except ValueError:
+        out = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[us]")
+        for i, v in enumerate(values):
+            try:
+                out[i] = np.datetime64(v or "NaT", "us")
+            except ValueError:
+                pass
+        return out
+
+
+def tle_epochs(m1: np.ndarray) -> np.ndarray:
+    """Line 1 epochs (YYDDD.DDDDDDDD, years 57-99 are 19xx) as datetime64[us]."""
+    year = _field(m1, 18, 20)
+    day = _field(m1, 20, 32)
+    ok = np.isfinite(year) & np.isfinite(day) & (day >= 1) & (day < 367)
+    year = np.where(year < 57, 2000 + year, 1900 + year)
+    start = (np.where(ok, year, 1970) - 1970).astype(np.int64).astype("datetime64[Y]").astype("datetime64[us]")
+    epochs = start + np.round(np.where(ok, day - 1, 0) * 86400e6).astype(np.int64).astype("timedelta64[us]")
+    return np.where(ok, epochs, np.datetime64("NaT"))
+
+
+def validate(line1: list[str], line2: list[str], norad_ids=None, csv_elements: dict | None = None,
+             csv_epochs=None, now: datetime | None = None,
+             max_age_days: float | None = DEFAULT_MAX_AGE_DAYS) -> Report:
+    """Run every check over parallel columns; ``None`` entries count as empty.
+
+    ``norad_ids``, ``csv_elements`` ({column: values}) and ``csv_epochs`` are
+    optional. Pass ``max_age_days=None`` to skip the staleness check, e.g.
+    when the file, not the row, is what's old.
+    """
+    n = len(line1)
+    line1 = [l or "" for l in line1]
+    line2 = [l or "" for l in line2]
+    m1, len1 = _char_matrix(line1)
+    m2, len2 = _char_matrix(line2)
+    has1, has2 = len1 > 0, len2 > 0
+    has_tle = has1 & has2
+    failures = {check: np.zeros(n, dtype=bool) for check in CHECKS}
+
+    failures["tle_incomplete"] = has1 != has2
+    failures["line_length"] = has_tle & ((len1 != TLE_LENGTH) | (len2 != TLE_LENGTH))
+    failures["line_number"] = has_tle & ~((m1[:, 0] == ord("1")) & (m1[:, 1] == ord(" "))
+                                          & (m2[:, 0] == ord("2")) & (m2[:, 1] == ord(" ")))
+    failures["checksum"] = has_tle & ~(_checksum_ok(m1) & _checksum_ok(m2))
+
+    satnum1, satnum2 = _field(m1, 2, 7), _field(m2, 2, 7)
+    mismatch = ~(satnum1 == satnum2)  # NaN (alpha-5 or garbage) never matches
+    if norad_ids is not None:
+        ids = _id_column(norad_ids)
+        mismatch |= (ids >= 0) & ~(satnum1 == ids)
+    failures["norad_mismatch"] = has_tle & mismatch
+
+    epochs = np.where(has_tle, tle_epochs(m1), np.datetime64("NaT"))
+    failures["epoch_unreadable"] = has_tle & np.isnat(epochs)
+    now64 = np.datetime64((now or datetime.now(timezone.utc)).replace(tzinfo=None), "us")
+    age_days = (now64 - epochs) / np.timedelta64(1, "D")
+    if max_age_days is not None:
+        failures["epoch_stale"] = age_days > max_age_days
+    failures["epoch_future"] = age_days < -MAX_FUTURE_DAYS
+
+    tle_values = {col: _field(m2, a, b) * scale for col, (a, b), scale, *_ in ELEMENTS}
+    failures["eccentricity_range"] = has_tle & np.isnan(tle_values["ECCENTRICITY"])
+    mean_motion = tle_values["MEAN_MOTION"]
+    failures["mean_motion_range"] = has_tle & ~((mean_motion > 0) & (mean_motion <= MAX_MEAN_MOTION))
+
+    if csv_elements:
+        if "ECCENTRICITY" in csv_elements:
+            ecc = _float_column(csv_elements["ECCENTRICITY"])
+            failures["eccentricity_range"] |= (ecc < 0) | (ecc >= 1)
+        if csv_epochs is not None:
+            gap = np.abs((_time_column(csv_epochs) - epochs) / np.timedelta64(1, "s"))
+            same_epoch = gap <= SAME_EPOCH_SECONDS  # False when either is NaT
+        else:
+            same_epoch = np.zeros(n, dtype=bool)
+        for col, _, _, tight, loose, angle in ELEMENTS:
+            if col not in csv_elements:
+                continue
+            diff = np.abs(_float_column(csv_elements[col]) - tle_values[col])
+            if angle:
+                diff = np.minimum(diff, 360.0 - diff)
+            tol = np.where(same_epoch, tight, np.inf if loose is None else loose)
+            failures["element_mismatch"] |= has_tle & (diff > tol)  # NaN on either side compares False
+
+    if norad_ids is not None:
+        # Keep one row per ID: valid before invalid, then the newest epoch
+        ids = _id_column(norad_ids)
+        failed = np.zeros(n, dtype=bool)
+        for mask in failures.values():
+            failed |= mask
+        newest_first = np.where(np.isnat(epochs), np.inf, -epochs.astype(np.int64).astype(float))
+        order = np.lexsort((newest_first, failed, ids))
+        sorted_ids = ids[order]
+        repeat = np.r_[False, sorted_ids[1:] == sorted_ids[:-1]] & (sorted_ids >= 0)
+        failures["duplicate_norad"][order[repeat]] = True
+
+    valid = np.ones(n, dtype=bool)
+    for mask in failures.values():
+        valid &= ~mask
+    return Report(failures, valid, epochs)
+
+
+def validate_table(table: SatelliteTable, now: datetime | None = None,
+                   max_age_days: float | None = DEFAULT_MAX_AGE_DAYS) -> Report:
+    """``validate`` over a SatelliteTable's TLE_LINE1/2, NORAD ID, EPOCH and element columns."""
+    cols = table.columns
+    n = len(table)
+    empty = [""] * n
+    ids = cols.get("NORAD_CAT_ID") or cols.get("JCAT")
+    return validate(cols.get("TLE_LINE1", empty), cols.get("TLE_LINE2", empty), ids,
+                    {col: cols[col] for col, *_ in ELEMENTS if col in cols}, cols.get("EPOCH"),
+                    now=now, max_age_days=max_age_days)
+
+
+def record_metrics(report: Report, dataset: str):
+    """Per-run counters: rows by outcome and failures by check."""
+    n_bad = int((~report.valid).sum())
+    metrics.counter("validation_rows_total", len(report) - n_bad, dataset=dataset, outcome="valid")
+    metrics.counter("validation_rows_total", n_bad, dataset=dataset, outcome="quarantined")
+    for check, count in report.counts().items():
+        metrics.counter("validation_failures_total", count, dataset=dataset, check=check)
+
+
+def summary(report: Report) -> str:
+    counts = ", ".join(f"{check} {count}" for check, count in report.counts().items())
+    n_bad = int((~report.valid).sum())
+    return f"{len(report) - n_bad} valid, {n_bad} quarantined" + (f" ({counts})" if counts else "")
+
+
+def quarantine(table: SatelliteTable, report: Report, path: Path) -> SatelliteTable:
+    """Write failing rows plus QUARANTINE_REASON to ``path`` and return the valid rows.
+
+    The file is rewritten every run (header only when nothing failed), so it
+    always describes the latest ingest.
+    """
+    bad = np.flatnonzero(~report.valid)
+    held = table.take(bad)
+    reasons = report.reasons()
+    held.add_column(REASON_COLUMN, [reasons[i] for i in bad])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if len(held):
+        held.to_csv(path)
+    else:
+        path.write_text(",".join([*table.columns, REASON_COLUMN]) + "\n", encoding="utf-8")
+    return table.take(np.flatnonzero(report.valid))
+
+
+def quarantine_path(path: Path) -> Path:
+    return QUARANTINE_DIR / path.name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate TLE/catalog rows and quarantine the failures")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT)
+    parser.add_argument("--output", type=Path, help="Write the valid rows here (default: report only)")
+    parser.add_argument("--quarantine", type=Path, help="Quarantine CSV (default: data/quarantine/<input name>)")
+    parser.add_argument("--max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS,
+                        help="Quarantine TLEs with older epochs (0 disables)")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics.configure_from_args(args)
+
+    if not args.input.exists():
+        print(f"✗ {args.input} not found")
+        return
+    with metrics.stage("read_input"):
+        table = SatelliteTable.from_csv(args.input)
+    with metrics.stage("validate"):
+        report = validate_table(table, max_age_days=args.max_age_days or None)
+    record_metrics(report, args.input.stem)
+    target = args.quarantine or quarantine_path(args.input)
+    valid = quarantine(table, report, target)
+    if args.output:
+        valid.to_csv(args.output)
+    print(f"✓ {args.input.name}: {summary(report)}")
+    print(f"  - Quarantine: {target}")
+    if args.output:
+        print(f"  - Valid rows: {args.output}")
+
+
+if __name__ == "__main__":
+    main()